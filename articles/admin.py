@@ -5,27 +5,32 @@ from .models import Article, Tag
 # Admin 配置
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
-    list_display = ('name',)
-    search_fields = ('name',)
+    list_display = ('name', 'published_article_count')
+    search_fields = ('^name',)  # 前缀匹配，可以利用 name 上的唯一索引
+    readonly_fields = ('published_article_count',)
 
 
 @admin.register(Article)
 class ArticleAdmin(admin.ModelAdmin):
-    list_display = ('title', 'author', 'is_draft', 'published_at', 'created_at')
-    list_filter = ('is_draft', 'published_at', 'tags', 'created_at')
-    search_fields = ('title', 'content')
+    list_display = ('title', 'author', 'status', 'published_at', 'like_count', 'favorite_count', 'created_at')
+    list_filter = ('status', 'is_draft', 'published_at', 'tags', 'created_at')
+    search_fields = ('title',)  # 正文压缩存储，不支持数据库模糊查询（全文检索见 /articles/search/）
     # prepopulated_fields = {'slug': ('title',)}
-    readonly_fields = ('created_at', 'updated_at', 'slug')
+    readonly_fields = ('created_at', 'updated_at', 'slug', 'status', 'like_count', 'favorite_count', 'comment_count',
+                       'excerpt', 'word_count', 'reading_time')
     date_hierarchy = 'published_at'
     filter_horizontal = ('tags',)  # 让多对多字段选择更方便
     fieldsets = (
         ('文章与作者', {
-            'fields': ('title', 'slug', 'content', 'author')
+            'fields': ('title', 'slug', 'content', 'excerpt', 'word_count', 'reading_time', 'author')
         }),
         ('状态与时间', {
-            'fields': ('is_draft', 'published_at', 'created_at', 'updated_at')
+            'fields': ('is_draft', 'published_at', 'status', 'created_at', 'updated_at')
         }),
         ('媒体与分类', {
             'fields': ('cover_pic', 'tags')
         }),
+        ('互动统计', {
+            'fields': ('like_count', 'favorite_count', 'comment_count')
+        }),
     )
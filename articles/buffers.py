@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File Name   : buffers.py
+Author      : wzw
+Date Created: 2026/10/17
+Description : 阅读历史的 Redis 写入缓冲
+              读文章时只向 Redis 列表追加一条 (用户, 文章, 时间) 事件，
+              由 celery 定时任务批量取出、按 (用户, 文章) 去重保留最新时间后批量 upsert。
+"""
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django_redis import get_redis_connection
+from redis.exceptions import ResponseError
+
+from .models import Article, ReadingHistory
+
+User = get_user_model()
+
+
+class ReadingHistoryBuffer:
+    """ 阅读历史的写入缓冲 """
+    CACHE_NAME = 'default'
+    KEY = 'history:events'
+
+    @property
+    def redis(self):
+        return get_redis_connection(self.CACHE_NAME)
+
+    @property
+    def _flushing_key(self):
+        return f'{self.KEY}:flushing'
+
+    def record(self, user_id, article_id, ts=None):
+        """ 追加一条阅读事件，只有一次 RPUSH """
+        ts = time.time() if ts is None else ts
+        self.redis.rpush(self.KEY, f'{user_id}:{article_id}:{ts:.3f}')
+
+    def _take_events(self):
+        """ 取出待落库的事件列表；上次落库中断时优先重放遗留的批次 """
+        if not self.redis.exists(self._flushing_key):
+            try:
+                self.redis.rename(self.KEY, self._flushing_key)
+            except ResponseError:
+                # 没有待落库的事件
+                return False
+        return True
+
+    def _read_latest(self, chunk_size):
+        """ 分段读取事件，按 (用户, 文章) 只保留最新的时间戳 """
+        latest = {}
+        start = 0
+        while True:
+            events = self.redis.lrange(self._flushing_key, start, start + chunk_size - 1)
+            if not events:
+                break
+            for event in events:
+                user_id, article_id, ts = event.decode().split(':')
+                pair = (int(user_id), int(article_id))
+                ts = float(ts)
+                if ts > latest.get(pair, 0):
+                    latest[pair] = ts
+            start += chunk_size
+        return latest
+
+    def flush(self, batch_size=1000):
+        """ 将缓冲中的阅读事件去重后批量写回数据库，返回写入的记录数 """
+        if not self._take_events():
+            return 0
+        latest = self._read_latest(chunk_size=batch_size * 10)
+
+        # 过滤掉缓冲期间已被删除的用户和文章，避免外键错误导致整批失败
+        user_ids = {user_id for user_id, _ in latest}
+        article_ids = {article_id for _, article_id in latest}
+        existing_users = set(User.objects.filter(id__in=user_ids).values_list('id', flat=True))
+        existing_articles = set(Article.objects.filter(id__in=article_ids).values_list('id', flat=True))
+        histories = [
+            ReadingHistory(
+                user_id=user_id,
+                article_id=article_id,
+                last_read_at=datetime.fromtimestamp(ts, tz=dt_timezone.utc),
+            )
+            for (user_id, article_id), ts in latest.items()
+            if user_id in existing_users and article_id in existing_articles
+        ]
+
+        # MySQL 的 ON DUPLICATE KEY UPDATE 不能指定冲突字段，按唯一约束自动判断
+        unique_fields = ['user', 'article'] if connection.features.supports_update_conflicts_with_target else None
+        with transaction.atomic():
+            ReadingHistory.objects.bulk_create(
+                histories,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=unique_fields,
+                update_fields=['last_read_at'],
+            )
+
+        self.redis.delete(self._flushing_key)
+        return len(histories)
+
+
+reading_history_buffer = ReadingHistoryBuffer()
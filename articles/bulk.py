@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File Name   : bulk.py
+Author      : wzw
+Date Created: 2026/10/17
+Description : 文章批量导入/导出（NDJSON，每行一篇文章）
+              导入：逐行流式解析和校验，按批解析标签（一次 IN 查询 + bulk_create 缺失标签），
+                   文章和标签关联均用 bulk_create 写入，每批一个事务，逐行报告错误
+              导出：iterator(chunk_size) 分块读取，内存占用与文章总数无关
+"""
+import json
+
+from django.db import IntegrityError, connection, transaction
+from django.dispatch import Signal
+
+from . import rendering
+from .models import Article, Tag
+from .serializers import ArticleSerializer
+
+# 批量导入的一批文章提交后发送，参数 article_ids 为新建文章的 id 列表。
+# bulk_create 不会触发 post_save，索引、计数、缓存等后续工作由接收方统一处理
+articles_bulk_created = Signal()
+
+BATCH_SIZE = 500
+# 报告中最多返回的错误行数
+MAX_REPORTED_ERRORS = 1000
+
+
+def resolve_tags(names):
+    """ 批量获取标签，不存在的批量创建，返回 {name: Tag} """
+    names = set(names)
+    if not names:
+        return {}
+    tags = Tag.objects.in_bulk(names, field_name='name')
+    missing = names - tags.keys()
+    if missing:
+        # 并发导入或 slug 冲突时个别标签可能插入失败，重新查询后再逐个兜底
+        Tag.objects.bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+        tags.update(Tag.objects.in_bulk(missing, field_name='name'))
+        for name in missing - tags.keys():
+            tags[name] = Tag.objects.get_or_create(name=name)[0]
+        # bulk_create 不触发 post_save，新标签需要手动加入补全索引
+        Tag.sync_suggest_index(tag.pk for name, tag in tags.items() if name in missing)
+    return tags
+
+
+def _build_article(data, author):
+    """ 构造未保存的文章，补上 save() 中才会计算的字段 """
+    article = Article(author=author, **data)
+    article.status = article.compute_status()
+    rendering.render_article(article)
+    return article
+
+
+def _insert_articles(articles):
+    """ 批量插入文章，返回插入失败的文章下标 """
+    try:
+        with transaction.atomic():
+            Article.objects.bulk_create(articles)
+        return []
+    except IntegrityError:
+        # 同批次内标题相同会生成相同的 slug，退回逐行插入，slug 会基于已插入的行重新去重
+        failed = []
+        for index, article in enumerate(articles):
+            article.pk = None
+            try:
+                with transaction.atomic():
+                    Article.objects.bulk_create([article])
+            except IntegrityError:
+                failed.append(index)
+        return failed
+
+
+def _import_batch(rows, author):
+    """ 导入一批已校验的数据 rows: [(行号, validated_data)]，返回 (新建 id 列表, 错误列表) """
+    tags = resolve_tags(name for _, data in rows for name in data.get('tags', []))
+    articles, tag_names = [], []
+    for _, data in rows:
+        tag_names.append(data.pop('tags', []))
+        articles.append(_build_article(data, author))
+
+    errors = []
+    with transaction.atomic():
+        failed = set(_insert_articles(articles))
+        for index in sorted(failed):
+            errors.append({'line': rows[index][0], 'errors': "写入数据库失败"})
+
+        created = [(article, names) for index, (article, names) in enumerate(zip(articles, tag_names))
+                   if index not in failed]
+        if not connection.features.can_return_rows_from_bulk_insert:
+            # MySQL 批量插入拿不到主键，按 slug 回查
+            ids = dict(
+                Article.objects.filter(slug__in=[article.slug for article, _ in created]).values_list('slug', 'id')
+            )
+            for article, _ in created:
+                article.pk = ids[article.slug]
+
+        through = Article.tags.through
+        through.objects.bulk_create(
+            [
+                through(article_id=article.pk, tag_id=tags[name].pk)
+                for article, names in created
+                for name in set(names)
+            ],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        article_ids = [article.pk for article, _ in created]
+        transaction.on_commit(lambda: articles_bulk_created.send(sender=Article, article_ids=article_ids))
+    return article_ids, errors
+
+
+def _parse_line(raw):
+    """ 解析并校验一行，返回 (validated_data, 错误信息) """
+    try:
+        row = json.loads(raw)
+    except (UnicodeDecodeError, ValueError) as e:
+        return None, f"JSON 格式错误: {e}"
+    if not isinstance(row, dict):
+        return None, "每行必须是一个 JSON 对象"
+    serializer = ArticleSerializer(data=row)
+    if not serializer.is_valid():
+        return None, serializer.errors
+    return serializer.validated_data, None
+
+
+def import_articles(lines, author, batch_size=BATCH_SIZE):
+    """ 从可迭代的行（str 或 bytes）中导入文章，作者统一为 author，返回导入报告 """
+    created, errors, error_count = 0, [], 0
+
+    def report_errors(items):
+        nonlocal error_count
+        error_count += len(items)
+        errors.extend(items[:MAX_REPORTED_ERRORS - len(errors)])
+
+    batch = []
+    for line_no, raw in enumerate(lines, start=1):
+        if not raw.strip():
+            continue
+        data, error = _parse_line(raw)
+        if error is not None:
+            report_errors([{'line': line_no, 'errors': error}])
+            continue
+        batch.append((line_no, dict(data)))
+        if len(batch) >= batch_size:
+            article_ids, batch_errors = _import_batch(batch, author)
+            created += len(article_ids)
+            report_errors(batch_errors)
+            batch = []
+    if batch:
+        article_ids, batch_errors = _import_batch(batch, author)
+        created += len(article_ids)
+        report_errors(batch_errors)
+
+    return {'created': created, 'failed': error_count, 'errors': errors}
+
+
+def serialize_article(article):
+    """ 导出一篇文章，字段与导入格式一致（slug、author 仅供参考，导入时忽略） """
+    return {
+        'title': article.title,
+        'slug': article.slug,
+        'content': article.content,
+        'is_draft': article.is_draft,
+        'published_at': article.published_at.isoformat() if article.published_at else None,
+        'tags': [tag.name for tag in article.tags.all()],
+        'author': article.author.username if article.author else None,
+    }
+
+
+def export_articles(queryset, chunk_size=BATCH_SIZE):
+    """ 逐行生成 NDJSON，分块读取数据库 """
+    queryset = (
+        queryset.select_related('author')
+        .prefetch_related('tags')
+        .defer('content_html')
+        .order_by('pk')
+    )
+    for article in queryset.iterator(chunk_size=chunk_size):
+        yield json.dumps(serialize_article(article), ensure_ascii=False) + '\n'
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File Name   : feed.py
+Author      : wzw
+Date Created: 2026/10/17
+Description : 关注动态（首页时间线），推拉结合
+              推：普通作者发布文章时写入每个粉丝的收件箱（Redis 有序集合，分值为发布时间的微秒时间戳，
+                  只保留最近 FEED_MAX_LENGTH 条）；
+              拉：粉丝数达到 FEED_FANOUT_FOLLOWER_THRESHOLD 的大 V 不写扩散，读取时按 (author, status, -published_at)
+                  索引查询其最新文章，与收件箱按 (发布时间, id) 归并
+              收件箱闲置 FEED_INBOX_TTL 后过期，写扩散只写入仍存在的收件箱，读取时收件箱不存在则从数据库重建
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django_redis import get_redis_connection
+
+from social.models import Follow
+from .models import Article
+
+User = get_user_model()
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def to_score(published_at):
+    """ 发布时间 → 整数微秒时间戳（在双精度浮点数范围内可精确表示） """
+    return (published_at - EPOCH) // timedelta(microseconds=1)
+
+
+def from_score(score):
+    return EPOCH + timedelta(microseconds=score)
+
+
+# 只写入已存在的收件箱（过期的收件箱等读取时重建，避免写出只含部分文章的收件箱），并裁掉最旧的部分
+# ARGV[1] 为保留条数，其后为 score, member 对
+PUSH_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('ZADD', KEYS[1], unpack(ARGV, 2))
+redis.call('ZREMRANGEBYRANK', KEYS[1], 0, -tonumber(ARGV[1]) - 1)
+return 1
+"""
+# 收件箱中的占位成员：没有任何文章的收件箱也能以键存在，区分“空”和“已过期”
+PLACEHOLDER = 0
+
+
+class HomeFeed:
+    """ 关注动态 """
+    CACHE_NAME = 'default'
+    KEY_PREFIX = 'feed:inbox'
+    FOLLOWER_CHUNK_SIZE = 1000
+
+    @property
+    def redis(self):
+        return get_redis_connection(self.CACHE_NAME)
+
+    def _key(self, user_id):
+        return f'{self.KEY_PREFIX}:{user_id}'
+
+    @staticmethod
+    def is_celebrity(follower_count):
+        return follower_count >= settings.FEED_FANOUT_FOLLOWER_THRESHOLD
+
+    def _push(self, pipe, user_id, entries):
+        """ 写入已存在的收件箱并裁掉最旧的部分，entries 为 {article_id: score} """
+        args = [settings.FEED_MAX_LENGTH]
+        for article_id, score in entries.items():
+            args.extend((score, article_id))
+        self.redis.register_script(PUSH_SCRIPT)(keys=[self._key(user_id)], args=args, client=pipe)
+
+    def fan_out(self, article_ids):
+        """ 将已发布文章推送到作者粉丝的收件箱（大 V 的文章跳过，读取时再拉取），返回写入的收件箱数 """
+        rows = (
+            Article.objects.filter(
+                id__in=article_ids,
+                status=Article.Status.PUBLISHED,
+                author__follower_count__lt=settings.FEED_FANOUT_FOLLOWER_THRESHOLD,
+            )
+            .values_list('id', 'author_id', 'published_at')
+        )
+        entries_by_author = {}
+        for article_id, author_id, published_at in rows:
+            entries_by_author.setdefault(author_id, {})[article_id] = to_score(published_at)
+
+        pushed = 0
+        for author_id, entries in entries_by_author.items():
+            follower_ids = (
+                Follow.objects.filter(following_id=author_id)
+                .values_list('follower_id', flat=True)
+                .iterator(chunk_size=self.FOLLOWER_CHUNK_SIZE)
+            )
+            pipe = self.redis.pipeline(transaction=False)
+            for follower_id in follower_ids:
+                self._push(pipe, follower_id, entries)
+                pushed += 1
+                if pushed % self.FOLLOWER_CHUNK_SIZE == 0:
+                    pipe.execute()
+            pipe.execute()
+        return pushed
+
+    def _recent_articles(self, author_id):
+        return (
+            Article.objects.filter(author_id=author_id, status=Article.Status.PUBLISHED)
+            .order_by('-published_at', '-id')
+            .values_list('id', 'published_at')[:settings.FEED_MAX_LENGTH]
+        )
+
+    def follow(self, user_id, author_id):
+        """ 新关注普通作者时，将其最近的文章补进收件箱 """
+        author = User.objects.filter(pk=author_id).values('follower_count').first()
+        if author is None or self.is_celebrity(author['follower_count']):
+            return
+        entries = {article_id: to_score(published_at) for article_id, published_at in self._recent_articles(author_id)}
+        if entries:
+            pipe = self.redis.pipeline(transaction=False)
+            self._push(pipe, user_id, entries)
+            pipe.execute()
+
+    def unfollow(self, user_id, author_id):
+        """ 取消关注后从收件箱移除该作者的文章 """
+        article_ids = [article_id for article_id, _ in self._recent_articles(author_id)]
+        if article_ids:
+            self.redis.zrem(self._key(user_id), *article_ids)
+
+    def rebuild(self, user_id):
+        """ 按关注关系从数据库重建收件箱（Redis 数据丢失或首次上线时使用） """
+        author_ids = Follow.objects.filter(
+            follower_id=user_id,
+            following__follower_count__lt=settings.FEED_FANOUT_FOLLOWER_THRESHOLD,
+        ).values_list('following_id', flat=True)
+        rows = (
+            Article.objects.filter(author_id__in=author_ids, status=Article.Status.PUBLISHED)
+            .order_by('-published_at', '-id')
+            .values_list('id', 'published_at')[:settings.FEED_MAX_LENGTH]
+        )
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.delete(self._key(user_id))
+        entries = {article_id: to_score(published_at) for article_id, published_at in rows}
+        pipe.zadd(self._key(user_id), {PLACEHOLDER: 0, **entries})
+        pipe.expire(self._key(user_id), settings.FEED_INBOX_TTL)
+        pipe.execute()
+        return len(entries)
+
+    def _touch(self, user_id):
+        """ 读取前续期收件箱，已过期（或从未建立）时重建 """
+        if not self.redis.expire(self._key(user_id), settings.FEED_INBOX_TTL):
+            self.rebuild(user_id)
+
+    def _pushed(self, user_id, position, count):
+        """ 收件箱中位于 position 之后的前 count 条 (score, id) """
+        if position is None:
+            rows = self.redis.zrevrange(self._key(user_id), 0, count - 1, withscores=True)
+        else:
+            # 分值相同的成员按字符串倒序排列，多取一些再按 (score, id) 过滤
+            rows = self.redis.zrevrangebyscore(
+                self._key(user_id), position[0], '-inf', start=0, num=count + 10, withscores=True
+            )
+        entries = [(int(score), int(member)) for member, score in rows if int(member) != PLACEHOLDER]
+        return [entry for entry in entries if position is None or entry < position]
+
+    def _pulled(self, celebrity_ids, position, count):
+        """ 大 V 的文章中位于 position 之后的前 count 条 (score, id) """
+        if not celebrity_ids:
+            return []
+        queryset = Article.objects.filter(author_id__in=celebrity_ids, status=Article.Status.PUBLISHED)
+        if position is not None:
+            published_at = from_score(position[0])
+            queryset = queryset.filter(
+                Q(published_at__lt=published_at) | Q(published_at=published_at, id__lt=position[1])
+            )
+        rows = queryset.order_by('-published_at', '-id').values_list('id', 'published_at')[:count]
+        return [(to_score(published_at), article_id) for article_id, published_at in rows]
+
+    def timeline(self, user_id, size, position=None, queryset=None):
+        """
+        按发布时间倒序取一页动态，position 为上一页最后一条的 (score, id)。
+        候选按批次归并，已删除或已撤回的文章跳过后继续取下一批，
+        返回 (文章列表, 下一页的 position，没有下一页时为 None)；
+        queryset 为加载文章用的查询集（决定关联和字段），默认连接作者、预取标签
+        """
+        if queryset is None:
+            queryset = (
+                Article.objects.select_related('author')
+                .prefetch_related('tags')
+                .defer(*Article.LIST_DEFERRED_FIELDS)
+            )
+        self._touch(user_id)
+        celebrity_ids = list(
+            Follow.objects.filter(
+                follower_id=user_id,
+                following__follower_count__gte=settings.FEED_FANOUT_FOLLOWER_THRESHOLD,
+            ).values_list('following_id', flat=True)
+        )
+        articles, seen, has_more = [], set(), True
+        while has_more and len(articles) < size:
+            need = size - len(articles)
+            # 两路各取 need + 1 条，归并去重（大 V 曾经是普通作者时收件箱里也会有其文章）后多出的一条用于判断是否还有下一页
+            entries = sorted(
+                set(self._pushed(user_id, position, need + 1)) | set(self._pulled(celebrity_ids, position, need + 1)),
+                reverse=True,
+            )[:need + 1]
+            has_more = len(entries) > need
+            batch = entries[:need]
+            if not batch:
+                break
+            found = queryset.filter(
+                id__in=[article_id for _, article_id in batch], status=Article.Status.PUBLISHED
+            ).in_bulk()
+            for _, article_id in batch:
+                # 撤回后重新发布的文章可能以新旧两个发布时间出现
+                if article_id in found and article_id not in seen:
+                    seen.add(article_id)
+                    articles.append(found[article_id])
+            position = batch[-1]
+        return articles, position if has_more else None
+
+
+home_feed = HomeFeed()
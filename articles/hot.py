@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File Name   : hot.py
+Author      : wzw
+Date Created: 2026/10/17
+Description : 热门文章排行（Redis 有序集合，按时间指数衰减）
+              每次互动给文章加 weight * 2^((now - epoch) / half_life) 分，
+              等价于所有历史互动按半衰期衰减后求和：越新的互动权重越大，排序无需定期全量重算。
+              分值随时间指数增长，由定时任务把 epoch 挪到当前时间并整体缩放，同时裁掉冷门文章
+"""
+import time
+
+from django.conf import settings
+from django_redis import get_redis_connection
+
+# 原子累加：epoch 不存在时以当前时间（ARGV[3]）初始化，按互动发生的时间（ARGV[5]）计算权重；分值不大于 0 的文章移出排行
+RECORD_SCRIPT = """
+local epoch = redis.call('GET', KEYS[2])
+if not epoch then
+    epoch = ARGV[3]
+    redis.call('SET', KEYS[2], epoch)
+end
+local delta = tonumber(ARGV[2]) * 2 ^ ((tonumber(ARGV[5]) - tonumber(epoch)) / tonumber(ARGV[4]))
+local score = tonumber(redis.call('ZINCRBY', KEYS[1], delta, ARGV[1]))
+if score <= 0 then
+    redis.call('ZREM', KEYS[1], ARGV[1])
+end
+return tostring(score)
+"""
+
+# 将 epoch 挪到当前时间并按比例缩小全部分值，然后删除过低的分值并只保留前 N 名
+RESCALE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local epoch = tonumber(redis.call('GET', KEYS[2]) or now)
+local factor = 2 ^ ((epoch - now) / tonumber(ARGV[2]))
+local items = redis.call('ZRANGE', KEYS[1], 0, -1, 'WITHSCORES')
+for i = 1, #items, 2 do
+    redis.call('ZADD', KEYS[1], tonumber(items[i + 1]) * factor, items[i])
+end
+redis.call('SET', KEYS[2], ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[3])
+local size = redis.call('ZCARD', KEYS[1])
+local max_size = tonumber(ARGV[4])
+if size > max_size then
+    redis.call('ZREMRANGEBYRANK', KEYS[1], 0, size - max_size - 1)
+    size = max_size
+end
+return size
+"""
+
+
+class HotRanking:
+    """ 热门文章排行 """
+    CACHE_NAME = 'default'
+    KEY = 'hot:articles'
+    EPOCH_KEY = 'hot:epoch'
+    # 各类互动的权重，取消操作按相反数扣分
+    WEIGHTS = {
+        'read': 1,
+        'like': 3,
+        'comment': 4,
+        'collect': 5,
+        'publish': 10,  # 新发布的文章获得初始热度
+    }
+    # 缩放后低于该分值（约等于衰减后不足一次阅读）的文章移出排行
+    MIN_SCORE = 0.5
+    MAX_SIZE = 5000
+
+    @property
+    def redis(self):
+        return get_redis_connection(self.CACHE_NAME)
+
+    def record(self, article_id, event, count=1, at=None):
+        """
+        记录一次互动，count 为负数表示撤销（取消点赞、删除评论等）。
+        at 为互动发生的时间戳（默认当前时间），权重从该时间起衰减；衰减后已不足 MIN_SCORE 的加分直接忽略
+        """
+        now = time.time()
+        at = now if at is None else min(at, now)
+        weight = self.WEIGHTS[event] * count
+        if at < now and abs(weight) * 2 ** ((at - now) / settings.HOT_HALF_LIFE_SECONDS) < self.MIN_SCORE:
+            return
+        script = self.redis.register_script(RECORD_SCRIPT)
+        script(
+            keys=[self.KEY, self.EPOCH_KEY],
+            args=[article_id, weight, now, settings.HOT_HALF_LIFE_SECONDS, at],
+        )
+
+    def top(self, limit, offset=0):
+        """ 当前排名第 offset 名起的 limit 篇文章 id """
+        return [int(article_id) for article_id in self.redis.zrevrange(self.KEY, offset, offset + limit - 1)]
+
+    def remove(self, *article_ids):
+        if article_ids:
+            self.redis.zrem(self.KEY, *article_ids)
+
+    def rescale(self):
+        """ 缩放分值并裁剪排行，返回剩余文章数 """
+        script = self.redis.register_script(RESCALE_SCRIPT)
+        return script(
+            keys=[self.KEY, self.EPOCH_KEY],
+            args=[time.time(), settings.HOT_HALF_LIFE_SECONDS, self.MIN_SCORE, self.MAX_SIZE],
+        )
+
+
+hot_ranking = HotRanking()
@@ -0,0 +1,93 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+from articles.models import Article
+from articles.serializers import ArticleListDetailSerializer
+from articles.views import ArticleListDetailView
+
+# 各数据库查询文章表占用空间（含索引和 TOAST）及正文列存储字节数的 SQL
+TABLE_SIZE_SQL = {
+    'postgresql': "SELECT pg_total_relation_size('tb_article')",
+    'mysql': (
+        "SELECT data_length + index_length FROM information_schema.tables "
+        "WHERE table_schema = DATABASE() AND table_name = 'tb_article'"
+    ),
+    'sqlite': "SELECT page_count * page_size FROM pragma_page_count(), pragma_page_size()",
+}
+BODY_BYTES_SQL = {
+    'postgresql': "SELECT COALESCE(SUM(octet_length(content) + octet_length(content_html)), 0) FROM tb_article",
+    'mysql': "SELECT COALESCE(SUM(LENGTH(content) + LENGTH(content_html)), 0) FROM tb_article",
+    'sqlite': "SELECT COALESCE(SUM(LENGTH(CAST(content AS BLOB)) + LENGTH(CAST(content_html AS BLOB))), 0) FROM tb_article",
+}
+
+
+def _scalar(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+        return cursor.fetchone()[0] or 0
+
+
+def _format_size(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f'{size:.1f}{unit}'
+        size /= 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "统计文章表大小、正文存储字节数（压缩后/原文）以及详情接口的查询+序列化耗时；"
+        "在 compress_article_bodies 回填前后各运行一次即可对比"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--samples', type=int, default=200, help="参与延迟测试的已发布文章数量")
+        parser.add_argument('--rounds', type=int, default=3, help="每篇文章重复请求的次数")
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in TABLE_SIZE_SQL:
+            raise CommandError(f"暂不支持的数据库: {vendor}")
+
+        stored = _scalar(BODY_BYTES_SQL[vendor])
+        raw = sum(
+            len(article.content.encode()) + len(article.content_html.encode())
+            for article in Article.objects.only('id', 'content', 'content_html').iterator(chunk_size=200)
+        )
+        self.stdout.write(f"文章表占用: {_format_size(_scalar(TABLE_SIZE_SQL[vendor]))}")
+        self.stdout.write(
+            f"正文存储: {_format_size(stored)}（原文 {_format_size(raw)}，"
+            f"压缩比 {stored / raw if raw else 1:.2f}）"
+        )
+
+        # 只测视图的查询和序列化，不经过响应缓存
+        slugs = list(
+            Article.objects.filter(status=Article.Status.PUBLISHED)
+            .order_by('-published_at')
+            .values_list('slug', flat=True)[:options['samples']]
+        )
+        if not slugs:
+            self.stdout.write("没有已发布的文章，跳过延迟测试")
+            return
+
+        # 视图按请求参数（?fields）决定关联查询，这里用不带参数的 GET 请求构造，与线上默认请求一致
+        request = Request(RequestFactory().get('/'))
+        queryset = ArticleListDetailView(request=request).get_queryset()
+        timings = []
+        for _ in range(options['rounds']):
+            for slug in slugs:
+                start = time.perf_counter()
+                ArticleListDetailSerializer(queryset.get(slug=slug)).data
+                timings.append((time.perf_counter() - start) * 1000)
+
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1] if len(timings) >= 20 else timings[-1]
+        self.stdout.write(
+            f"详情查询+序列化: {len(timings)} 次，平均 {statistics.mean(timings):.2f}ms，"
+            f"p50 {statistics.median(timings):.2f}ms，p95 {p95:.2f}ms"
+        )
@@ -0,0 +1,56 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from articles import search
+from articles.models import SearchTerm, SearchPosting
+
+
+class Command(BaseCommand):
+    help = (
+        "统计全文检索的索引规模，并测量 search_articles 的耗时和扫描的倒排记录数；"
+        "不指定查询词时按文档频率从低到高抽取词项（含超过高频上限的词项）及其两两组合"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('queries', nargs='*', help="参与测试的查询")
+        parser.add_argument('--samples', type=int, default=5, help="自动抽取的词项数量")
+        parser.add_argument('--rounds', type=int, default=5, help="每个查询重复执行的次数")
+
+    def _sample_queries(self, samples):
+        terms = list(SearchTerm.objects.filter(doc_freq__gt=0).order_by('doc_freq').values_list('term', flat=True))
+        if not terms:
+            return []
+        # 按文档频率等距抽取，最后一个是最高频的词项
+        step = max(1, (len(terms) - 1) // max(1, samples - 1))
+        picked = list(dict.fromkeys([*terms[::step][:samples - 1], terms[-1]]))
+        return picked + [f'{picked[i]} {picked[-1]}' for i in range(len(picked) - 1)]
+
+    def handle(self, *args, **options):
+        total, avg_length = search.get_stats()
+        self.stdout.write(
+            f"索引：{total} 篇文档，平均长度 {avg_length:.0f}，"
+            f"{SearchTerm.objects.count()} 个词项，{SearchPosting.objects.count()} 条倒排记录"
+        )
+
+        queries = options['queries'] or self._sample_queries(options['samples'])
+        if not queries:
+            self.stdout.write("索引为空，先运行 rebuild_search_index")
+            return
+
+        for query in queries:
+            terms = list(dict.fromkeys(search.tokenize(query, query=True)))[:search.MAX_QUERY_TERMS]
+            doc_freqs = dict(SearchTerm.objects.filter(term__in=terms, doc_freq__gt=0).values_list('id', 'doc_freq'))
+            scanned = sum(search.prune_terms(doc_freqs).values()) if doc_freqs else 0
+
+            timings = []
+            for _ in range(options['rounds']):
+                start = time.perf_counter()
+                hits = search.search_articles(query)
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f"{query!r}: {len(hits)} 条结果，扫描倒排记录 {scanned}/{sum(doc_freqs.values())}，"
+                f"p50 {statistics.median(timings):.2f}ms，最慢 {timings[-1]:.2f}ms"
+            )
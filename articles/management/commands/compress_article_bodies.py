@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from articles.models import Article
+
+
+class Command(BaseCommand):
+    help = "按当前压缩阈值重写文章正文和渲染结果（列类型由文本改为二进制后回填旧数据，或调整阈值后使用）"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help="每批处理的文章数量")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        ids = list(Article.objects.order_by('pk').values_list('pk', flat=True))
+
+        # 读取时字段会兼容旧格式，写回时统一按当前阈值编码；bulk_update 不触发 save() 和信号
+        updated = 0
+        for start in range(0, len(ids), batch_size):
+            articles = list(
+                Article.objects.filter(pk__in=ids[start:start + batch_size]).only('id', 'content', 'content_html')
+            )
+            updated += Article.objects.bulk_update(articles, ['content', 'content_html'])
+
+        self.stdout.write(self.style.SUCCESS(f"已重写 {updated} 篇文章的正文存储"))
@@ -0,0 +1,56 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from articles.models import Article, Tag, ReadingHistory
+from social.models import Comment
+
+# 各数据库执行计划中“全表扫描”的特征
+FULL_SCAN_PATTERNS = {
+    # SQLite：SCAN tb_article（带 USING INDEX 的是按索引扫描）
+    'sqlite': re.compile(r'\bSCAN (?:TABLE )?(\w+)(?!\w| USING)'),
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    # MySQL 8.0.16+ 的 FORMAT=TREE 输出
+    'mysql': re.compile(r'Table scan on (\w+)'),
+}
+
+
+def hot_querysets(user_id=1, article_id=1):
+    """ 线上最频繁的查询，与对应视图中的过滤和排序保持一致 """
+    published = Article.objects.filter(status=Article.Status.PUBLISHED)
+    return {
+        '公开文章列表': published.order_by('-published_at')[:10],
+        '作者文章列表': published.filter(author_id=user_id).order_by('-published_at')[:10],
+        '阅读历史列表': ReadingHistory.objects.filter(user_id=user_id).order_by('-last_read_at')[:10],
+        '标签云': Tag.objects.filter(published_article_count__gte=1).order_by('-published_article_count')[:100],
+        '文章评论列表': Comment.objects.filter(article_id=article_id, parent__isnull=True).order_by('created_at')[:10],
+    }
+
+
+class Command(BaseCommand):
+    help = "对热点查询执行 EXPLAIN，出现全表扫描时失败（可作为 CI 中的查询计划回归检查）"
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        pattern = FULL_SCAN_PATTERNS.get(vendor)
+        if pattern is None:
+            raise CommandError(f"暂不支持的数据库: {vendor}")
+
+        failures = []
+        with transaction.atomic():
+            if vendor == 'postgresql':
+                # 空表或小表上规划器会倾向顺序扫描，这里关闭它以检查索引是否可用
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+
+            for name, queryset in hot_querysets().items():
+                plan = queryset.explain(format='TREE') if vendor == 'mysql' else queryset.explain()
+                self.stdout.write(f"== {name}\n{plan}\n")
+                scanned = pattern.findall(plan)
+                if scanned:
+                    failures.append(f"{name}: 全表扫描 {', '.join(sorted(set(scanned)))}")
+
+        if failures:
+            raise CommandError("\n".join(failures))
+        self.stdout.write(self.style.SUCCESS("所有热点查询均命中索引"))
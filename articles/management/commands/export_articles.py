@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from articles.bulk import export_articles, BATCH_SIZE
+from articles.models import Article
+
+
+class Command(BaseCommand):
+    help = "将文章导出为 NDJSON（每行一篇文章），格式可直接用于 import_articles"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', default='-', help="输出文件路径，默认标准输出")
+        parser.add_argument('--author', help="只导出指定用户名的文章")
+        parser.add_argument('--chunk-size', type=int, default=BATCH_SIZE, help="每次从数据库读取的文章数量")
+
+    def handle(self, *args, **options):
+        queryset = Article.objects.all()
+        if options['author']:
+            queryset = queryset.filter(author__username=options['author'])
+
+        lines = export_articles(queryset, chunk_size=options['chunk_size'])
+        if options['output'] == '-':
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        count = 0
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            for line in lines:
+                f.write(line)
+                count += 1
+        self.stdout.write(self.style.SUCCESS(f"已导出 {count} 篇文章到 {options['output']}"))
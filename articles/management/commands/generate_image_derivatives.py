@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from articles.models import Article
+from articles.tasks import generate_cover_derivatives
+from users.tasks import compress_avatar
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "为尚未生成派生图的文章封面和用户头像投递派生图任务（上线前已上传的图片使用）"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="已有派生图的也重新生成")
+
+    def handle(self, *args, **options):
+        targets = [
+            (Article, 'cover_pic', 'cover_derivatives', generate_cover_derivatives),
+            (User, 'avatar', 'avatar_derivatives', compress_avatar),
+        ]
+        for model, image_field, derivatives_field, task in targets:
+            queryset = model.objects.exclude(**{image_field: model._meta.get_field(image_field).default})
+            queryset = queryset.exclude(**{image_field: ''}).exclude(**{f'{image_field}__isnull': True})
+            if not options['force']:
+                queryset = queryset.filter(**{derivatives_field: {}})
+            total = 0
+            for pk, name in queryset.values_list('pk', image_field).iterator(chunk_size=1000):
+                task.delay(pk, name)
+                total += 1
+            self.stdout.write(self.style.SUCCESS(f"{model._meta.verbose_name}：已投递 {total} 个派生图任务"))
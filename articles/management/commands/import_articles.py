@@ -0,0 +1,34 @@
+import json
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from articles.bulk import import_articles, BATCH_SIZE
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "从 NDJSON 文件（每行一篇文章）批量导入文章"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="NDJSON 文件路径，- 表示标准输入")
+        parser.add_argument('--author', required=True, help="导入文章的作者用户名")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="每批写入的文章数量")
+
+    def handle(self, *args, **options):
+        try:
+            author = User.objects.get(username=options['author'])
+        except User.DoesNotExist:
+            raise CommandError(f"用户不存在: {options['author']}")
+
+        if options['path'] == '-':
+            report = import_articles(sys.stdin.buffer, author, batch_size=options['batch_size'])
+        else:
+            with open(options['path'], 'rb') as f:
+                report = import_articles(f, author, batch_size=options['batch_size'])
+
+        for error in report['errors']:
+            self.stderr.write(f"第 {error['line']} 行: {json.dumps(error['errors'], ensure_ascii=False)}")
+        self.stdout.write(self.style.SUCCESS(f"导入完成：成功 {report['created']} 篇，失败 {report['failed']} 行"))
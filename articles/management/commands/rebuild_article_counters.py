@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery, IntegerField
+from django.db.models.functions import Coalesce
+
+from articles.models import Article, Tag
+from social.models import Like, CollectionItem, Comment
+
+
+def _count_subquery(model):
+    """ 按文章分组统计关联记录数量的子查询 """
+    subquery = (
+        model.objects.filter(article=OuterRef('pk'))
+        .order_by()
+        .values('article')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(subquery, output_field=IntegerField()), 0)
+
+
+class Command(BaseCommand):
+    help = "根据点赞、收藏、评论记录重建文章的冗余计数字段，并重建标签的已发布文章数"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="每批更新的文章数量")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        ids = list(Article.objects.order_by('pk').values_list('pk', flat=True))
+
+        # 按主键分批更新，避免一次性长时间锁表
+        updated = 0
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            updated += Article.objects.filter(pk__in=batch).update(
+                like_count=_count_subquery(Like),
+                favorite_count=_count_subquery(CollectionItem),
+                comment_count=_count_subquery(Comment),
+            )
+
+        tag_ids = list(Tag.objects.order_by('pk').values_list('pk', flat=True))
+        tags_updated = 0
+        for start in range(0, len(tag_ids), batch_size):
+            tags_updated += Tag.refresh_article_counts(tag_ids[start:start + batch_size])
+
+        self.stdout.write(self.style.SUCCESS(f"已重建 {updated} 篇文章、{tags_updated} 个标签的计数"))
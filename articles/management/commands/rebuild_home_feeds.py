@@ -0,0 +1,18 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from articles.feed import home_feed
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "按关注关系重建所有用户的关注动态收件箱（首次上线或 Redis 数据丢失后使用）"
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(following_count__gt=0).order_by('pk').values_list('pk', flat=True)
+        total = 0
+        for user_id in users.iterator(chunk_size=1000):
+            home_feed.rebuild(user_id)
+            total += 1
+        self.stdout.write(self.style.SUCCESS(f"已重建 {total} 个用户的关注动态"))
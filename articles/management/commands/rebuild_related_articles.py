@@ -0,0 +1,15 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from articles.related import compute_related
+
+
+class Command(BaseCommand):
+    help = "全量重算所有已发布文章的相关文章（首次上线或调整相似度算法后使用）"
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        total = compute_related(full=True)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"已重算 {total} 篇文章的相关文章，耗时 {elapsed:.2f}s"))
@@ -0,0 +1,23 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from articles import search
+from articles.models import Article, SearchTerm, SearchPosting, SearchDocument
+
+
+class Command(BaseCommand):
+    help = "清空并重建文章全文检索的倒排索引"
+
+    def handle(self, *args, **options):
+        SearchPosting.objects.all().delete()
+        SearchDocument.objects.all().delete()
+        SearchTerm.objects.all().delete()
+
+        count = 0
+        article_ids = Article.objects.filter(is_draft=False).values_list('id', flat=True)
+        for article_id in article_ids.iterator(chunk_size=1000):
+            search.index_article(article_id)
+            count += 1
+
+        cache.delete(search.STATS_CACHE_KEY)
+        self.stdout.write(self.style.SUCCESS(f"已为 {count} 篇文章重建索引"))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from articles.models import Tag
+from articles.suggest import tag_suggest_index
+
+
+class Command(BaseCommand):
+    help = "清空并重建标签补全索引（Redis 数据丢失或索引规则变化后使用）"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="每批写入的标签数量")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        tag_suggest_index.clear()
+
+        batch, total = [], 0
+        rows = Tag.objects.order_by('pk').values_list('id', 'name', 'slug', 'published_article_count')
+        for row in rows.iterator(chunk_size=batch_size):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                tag_suggest_index.update(batch)
+                total += len(batch)
+                batch = []
+        tag_suggest_index.update(batch)
+        total += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"已为 {total} 个标签重建补全索引"))
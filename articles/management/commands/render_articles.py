@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from articles import rendering
+from articles.models import Article
+
+
+class Command(BaseCommand):
+    help = "为已有文章生成预渲染 HTML、摘要、字数和阅读时长（渲染规则变化后可加 --force 全量重建）"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help="每批处理的文章数量")
+        parser.add_argument('--force', action='store_true', help="忽略正文哈希，全部重新渲染")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        ids = list(Article.objects.order_by('pk').values_list('pk', flat=True))
+
+        # 直接批量更新渲染字段，不走 save()，避免触发索引、缓存版本等信号
+        rendered = 0
+        for start in range(0, len(ids), batch_size):
+            articles = list(
+                Article.objects.filter(pk__in=ids[start:start + batch_size])
+                .only('id', 'content', 'content_html', 'content_hash')
+            )
+            changed = [article for article in articles if rendering.render_article(article, force=options['force'])]
+            Article.objects.bulk_update(changed, rendering.RENDERED_FIELDS)
+            rendered += len(changed)
+
+        self.stdout.write(self.style.SUCCESS(f"已渲染 {rendered} 篇文章"))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from articles.models import Article, Tag
+from articles.related import mark_dirty
+from services.cache_utils import cache_version_service
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "根据 is_draft/published_at 回填文章的发布状态（上线状态字段或手工改库后执行）。"
+        "直接写入目标状态，不发送 article_published 信号：历史文章不会重新计入热度或推送到关注动态；"
+        "未到期的定时文章由 publish_due_articles 定时任务到点发布"
+    )
+
+    def _sync(self, queryset, status):
+        """ 将 queryset 中状态不一致的文章改为 status，返回改动的文章 id """
+        changed = list(queryset.exclude(status=status).values_list('id', flat=True))
+        for start in range(0, len(changed), BATCH_SIZE):
+            Article.objects.filter(id__in=changed[start:start + BATCH_SIZE]).update(status=status)
+        return changed
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        # 按 published_at 一次写入最终状态，已发布的文章不会经过中间状态
+        drafts = self._sync(Article.objects.filter(Q(is_draft=True) | Q(published_at__isnull=True)), Article.Status.DRAFT)
+        live = Article.objects.filter(is_draft=False, published_at__isnull=False)
+        published = self._sync(live.filter(published_at__lte=now), Article.Status.PUBLISHED)
+        scheduled = self._sync(live.filter(published_at__gt=now), Article.Status.SCHEDULED)
+
+        changed = [*drafts, *published, *scheduled]
+        for start in range(0, len(changed), BATCH_SIZE):
+            chunk = changed[start:start + BATCH_SIZE]
+            cache_version_service.bump(*Article.bulk_cache_scopes(chunk))
+            mark_dirty(chunk)
+        if changed:
+            Tag.refresh_article_counts(Tag.objects.values_list('id', flat=True))
+            cache_version_service.bump('tags')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"状态有变化的文章：草稿 {len(drafts)} 篇，已发布 {len(published)} 篇，定时 {len(scheduled)} 篇"
+        ))
@@ -1,18 +1,36 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q, Count, OuterRef, Subquery, IntegerField
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from autoslug import AutoSlugField
 from django.urls import reverse
 from django.utils import timezone
 
-# TODO: 给 slug 字段添加普通的查询索引
+from services.cache_utils import cache_version_service
+from services.fields import CompressedTextField
+from . import rendering
+from .suggest import tag_suggest_index
+
 # TODO: 添加 created_at , is_deleted, updated_at 等通用字段
 # TODO: 反范式设计，粉丝数和作品数设计成冗余字段
 # TODO: celery 定时器定期删除冗余数据
 # TODO: 事务最终一致性，主业务正常执行，其余任务异步执行，最终回到数据一致性
 
 class Article(models.Model):
+    class Status(models.TextChoices):
+        DRAFT = 'draft', '草稿'
+        SCHEDULED = 'scheduled', '定时发布'
+        PUBLISHED = 'published', '已发布'
+
     title = models.CharField(max_length=255, verbose_name="标题")
-    content = models.TextField(verbose_name="正文")
+    # 正文和渲染结果体积较大，超过阈值时压缩存储，避免撑大文章表
+    content = CompressedTextField(verbose_name="正文")
+    # 保存时由正文生成（见 articles.rendering），正文未变化时不会重新渲染
+    content_html = CompressedTextField(blank=True, default='', editable=False, verbose_name="正文HTML")
+    excerpt = models.CharField(max_length=255, blank=True, default='', editable=False, verbose_name="摘要")
+    word_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="字数")
+    reading_time = models.PositiveIntegerField(default=0, editable=False, verbose_name="阅读时长（分钟）")
+    content_hash = models.CharField(max_length=64, blank=True, default='', editable=False, verbose_name="正文哈希")
     slug = AutoSlugField(populate_from='title', unique=True, verbose_name="URL别名")
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -26,18 +44,42 @@ class Article(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
     is_draft = models.BooleanField(default=True, verbose_name="是否为草稿")
+    # 物化的发布状态：保存时由 is_draft/published_at 推导，定时文章到点后由 celery 任务切换为已发布
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.DRAFT, verbose_name="发布状态")
     cover_pic = models.ImageField(
         upload_to='cover/',
         default='cover/default.png',
         verbose_name="封面图片"
     )
+    # 封面派生图 {格式: {宽度: 存储路径}}，上传后由 celery 任务生成（见 services.images）
+    cover_derivatives = models.JSONField(default=dict, blank=True, editable=False, verbose_name="封面派生图")
     tags = models.ManyToManyField("Tag", related_name="articles", verbose_name="标签")
 
+    # 冗余计数字段：由点赞/收藏/评论视图通过 F() 原子更新，可用 rebuild_article_counters 命令重建
+    like_count = models.PositiveIntegerField(default=0, db_index=True, verbose_name="点赞数")
+    favorite_count = models.PositiveIntegerField(default=0, db_index=True, verbose_name="收藏数")
+    comment_count = models.PositiveIntegerField(default=0, verbose_name="评论数")
+
     class Meta:
         db_table = 'tb_article'
         ordering = ['-created_at']
         verbose_name = '文章'
         verbose_name_plural = '文章管理'
+        # slug 为 unique 字段，数据库已自动建立唯一索引
+        indexes = [
+            # 公开列表：status = 'published' ORDER BY -published_at
+            models.Index(fields=['status', '-published_at'], name='idx_article_status_pub'),
+            # 作者文章列表：再加 author_id = ? 条件
+            models.Index(fields=['author', 'status', '-published_at'], name='idx_article_author_pub'),
+            # 只包含已发布行的部分索引（PostgreSQL / SQLite 支持，MySQL 不支持部分索引会跳过创建）
+            models.Index(fields=['-published_at'], condition=Q(status='published'), name='idx_article_published'),
+        ]
+
+    # 列表查询不需要的大字段
+    LIST_DEFERRED_FIELDS = ('content', 'content_html')
+    # 实时浏览量和独立读者数不落文章表，由 articles.pageviews 从 Redis 批量填充，未填充时为 None
+    view_count = None
+    unique_readers = None
 
     def __str__(self):
         return self.title
@@ -45,18 +87,89 @@ class Article(models.Model):
     def get_absolute_url(self):
         return reverse('article-detail', kwargs={'slug': self.slug})
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # 记录加载时的发布状态，保存后据此判断文章是否刚刚发布
+        instance._loaded_status = instance.__dict__.get('status')
+        # 记录加载时的 slug，slug 变化后需要清理 slug → id 缓存
+        instance._loaded_slug = instance.__dict__.get('slug')
+        # 记录加载时的封面，封面变化后重新生成派生图
+        instance._loaded_cover = instance.__dict__.get('cover_pic')
+        return instance
+
+    def compute_status(self, now=None):
+        """ 由 is_draft 和 published_at 推导发布状态 """
+        if self.is_draft or self.published_at is None:
+            return self.Status.DRAFT
+        if self.published_at <= (now or timezone.now()):
+            return self.Status.PUBLISHED
+        return self.Status.SCHEDULED
+
+    def save(self, *args, **kwargs):
+        self.status = self.compute_status()
+        update_fields = kwargs.get('update_fields')
+        extra_fields = {'status'}
+        # 正文未加载（defer）或本次不更新正文时跳过渲染
+        if 'content' not in self.get_deferred_fields() and (update_fields is None or 'content' in update_fields):
+            if rendering.render_article(self):
+                extra_fields.update(rendering.RENDERED_FIELDS)
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, *extra_fields}
+        super().save(*args, **kwargs)
+
     @property
     def is_published(self):
-        return (
-                not self.is_draft
-                and self.published_at is not None
-                and self.published_at <= timezone.now()
-        )
+        return self.status == self.Status.PUBLISHED
+
+    @property
+    def just_published(self):
+        """ 本次保存是否使文章从未发布变为已发布 """
+        return self.is_published and getattr(self, '_loaded_status', None) != self.Status.PUBLISHED
+
+    @classmethod
+    def incr_counter(cls, article_id, field, delta=1):
+        """ 原子更新冗余计数字段，递减时不会减到负数 """
+        qs = cls.objects.filter(pk=article_id)
+        if delta < 0:
+            qs = qs.filter(**{f'{field}__gte': -delta})
+        return qs.update(**{field: F(field) + delta})
+
+    @classmethod
+    def cache_scopes(cls, article_id):
+        """ 文章变更会影响的响应缓存作用域：单篇、作者、所属标签、全局列表 """
+        article = cls.objects.filter(pk=article_id).values('slug', 'author_id').first()
+        if article is None:
+            return []
+        tag_slugs = Tag.objects.filter(articles=article_id).values_list('slug', flat=True)
+        return [
+            'articles',
+            f"article:{article['slug']}",
+            f"author:{article['author_id']}",
+            *[f'tag:{slug}' for slug in tag_slugs],
+        ]
+
+    @classmethod
+    def bulk_cache_scopes(cls, article_ids):
+        """ 批量计算多篇文章的缓存作用域（去重），查询次数与文章数量无关 """
+        scopes = {'articles'}
+        for slug, author_id in cls.objects.filter(pk__in=article_ids).values_list('slug', 'author_id'):
+            scopes.update((f'article:{slug}', f'author:{author_id}'))
+        tag_slugs = Tag.objects.filter(articles__in=article_ids).values_list('slug', flat=True).distinct()
+        scopes.update(f'tag:{slug}' for slug in tag_slugs)
+        return sorted(scopes)
+
+    @classmethod
+    def bump_cache_versions(cls, article_id, *extra_scopes):
+        """ 更新文章相关作用域的缓存版本号 """
+        cache_version_service.bump(*cls.cache_scopes(article_id), *extra_scopes)
 
 
 class Tag(models.Model):
     name = models.CharField(max_length=32, unique=True, verbose_name="标签名称")
     slug = AutoSlugField(populate_from='name', unique=True, verbose_name="URL别名")
+    # 物化的已发布文章数，标签变更或文章发布/撤回时重算
+    published_article_count = models.PositiveIntegerField(default=0, db_index=True, verbose_name="已发布文章数")
 
     class Meta:
         db_table = 'tb_tag'
@@ -70,6 +183,37 @@ class Tag(models.Model):
     def get_absolute_url(self):
         return reverse('tag-article', kwargs={'slug': self.slug})
 
+    @classmethod
+    def refresh_article_counts(cls, tag_ids):
+        """ 按关联表重算指定标签的已发布文章数 """
+        tag_ids = list(tag_ids)
+        if not tag_ids:
+            return 0
+        counts = (
+            Article.tags.through.objects.filter(tag=OuterRef('pk'), article__status=Article.Status.PUBLISHED)
+            .order_by()
+            .values('tag')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        updated = cls.objects.filter(pk__in=tag_ids).update(
+            published_article_count=Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+        )
+        # update() 不触发信号，补全索引中的排序分值在这里同步
+        cls.sync_suggest_index(tag_ids)
+        return updated
+
+    @classmethod
+    def sync_suggest_index(cls, tag_ids):
+        """ 事务提交后，将标签的名称和已发布文章数同步到补全索引 """
+        tag_ids = list(tag_ids)
+
+        def sync():
+            tag_suggest_index.update(
+                cls.objects.filter(pk__in=tag_ids).values_list('id', 'name', 'slug', 'published_article_count')
+            )
+        transaction.on_commit(sync)
+
 
 class ReadingHistory(models.Model):
     user = models.ForeignKey(
@@ -82,7 +226,92 @@ class ReadingHistory(models.Model):
         on_delete=models.CASCADE,
         related_name="read_by_users"
     )
-    last_read_at = models.DateTimeField(auto_now=True)  # 最近一次阅读时间
+    # 最近一次阅读时间，由阅读事件的时间戳决定（批量落库时写入，不能用 auto_now）
+    last_read_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         unique_together = ("user", "article")  # 防止重复记录
+        indexes = [
+            # 用户阅读历史列表：user_id = ? ORDER BY -last_read_at
+            models.Index(fields=['user', '-last_read_at'], name='idx_history_user_read'),
+        ]
+
+
+class SearchTerm(models.Model):
+    """ 全文检索词项（倒排索引的词典） """
+    term = models.CharField(max_length=64, unique=True, verbose_name="词项")
+    doc_freq = models.PositiveIntegerField(default=0, verbose_name="文档频率")
+
+    class Meta:
+        db_table = 'tb_search_term'
+        verbose_name = '检索词项'
+        verbose_name_plural = '检索词项管理'
+
+    def __str__(self):
+        return self.term
+
+
+class SearchPosting(models.Model):
+    """ 倒排记录：词项在某篇文章中出现的次数 """
+    term = models.ForeignKey(SearchTerm, on_delete=models.CASCADE, related_name="postings")
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name="search_postings")
+    tf = models.PositiveIntegerField(verbose_name="词频")
+    doc_len = models.PositiveIntegerField(verbose_name="文章词数")  # 冗余文章长度，BM25 打分时免去关联查询
+
+    class Meta:
+        db_table = 'tb_search_posting'
+        unique_together = ("term", "article")  # 同时作为按词项查倒排表的索引
+        indexes = [
+            # 只含高频词的查询按影响力顺序读取前若干条倒排记录
+            models.Index(fields=['term', '-tf', 'doc_len'], name='idx_posting_term_impact'),
+        ]
+
+
+class SearchDocument(models.Model):
+    """ 已建立索引的文章，用于统计文档总数/平均长度，以及跳过内容未变化的重建 """
+    article = models.OneToOneField(Article, on_delete=models.CASCADE, related_name="search_document")
+    length = models.PositiveIntegerField(verbose_name="文章词数")
+    signature = models.CharField(max_length=40, verbose_name="内容签名")
+
+    class Meta:
+        db_table = 'tb_search_document'
+
+
+class RelatedArticle(models.Model):
+    """ 预计算的相关文章（按标签相似度），由 celery 任务定期增量更新 """
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name="related_links")
+    related = models.ForeignKey(Article, on_delete=models.CASCADE, related_name="+")
+    rank = models.PositiveSmallIntegerField(verbose_name="排名")
+    score = models.FloatField(verbose_name="相似度")
+
+    class Meta:
+        db_table = 'tb_related_article'
+        unique_together = ('article', 'rank')  # 同时作为按文章取相关列表的索引
+
+
+class ArticleDailyStats(models.Model):
+    """ 文章每日浏览统计，由 celery 任务从 Redis 计数器定期落库 """
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name="daily_stats")
+    date = models.DateField(verbose_name="日期")
+    views = models.PositiveIntegerField(default=0, verbose_name="浏览量")
+    unique_readers = models.PositiveIntegerField(default=0, verbose_name="独立读者数（估算）")
+
+    class Meta:
+        db_table = 'tb_article_daily_stats'
+        unique_together = ('article', 'date')  # 同时作为按文章查每日趋势的索引
+        verbose_name = '文章每日统计'
+        verbose_name_plural = '文章每日统计'
+
+
+class ArticleRevision(models.Model):
+    """ 编辑器自动保存的修订：每隔若干版本存一次全文快照，其余只存相对上一版本的增量，不改动文章行 """
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name="revisions")
+    number = models.PositiveIntegerField(verbose_name="修订号")
+    is_snapshot = models.BooleanField(default=False, verbose_name="是否为全文快照")
+    # 快照为全文，增量为 JSON 编码的操作列表（见 articles.revisions.apply_delta）
+    data = CompressedTextField(verbose_name="全文或增量")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
+
+    class Meta:
+        db_table = 'tb_article_revision'
+        unique_together = ('article', 'number')  # 同时防止并发自动保存写出相同的修订号
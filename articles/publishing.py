@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File Name   : publishing.py
+Author      : wzw
+Date Created: 2026/10/17
+Description : 定时发布：将到期的定时文章切换为已发布状态，并广播 article_published 信号
+"""
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import Article
+
+# 文章变为已发布状态后发送，参数 article_ids 为刚刚发布的文章 id 列表（事务提交后发送）
+article_published = Signal()
+
+BATCH_SIZE = 500
+
+
+def notify_published(article_ids):
+    """ 广播文章已发布，由接收方处理缓存失效等后续工作 """
+    if article_ids:
+        article_published.send(sender=Article, article_ids=list(article_ids))
+
+
+def publish_due_articles(article_ids=None, now=None):
+    """ 将已到发布时间的定时文章切换为已发布，返回本次切换的文章 id """
+    now = now or timezone.now()
+    published = []
+    while True:
+        with transaction.atomic():
+            queryset = Article.objects.filter(status=Article.Status.SCHEDULED, published_at__lte=now)
+            if article_ids is not None:
+                queryset = queryset.filter(id__in=article_ids)
+            batch = list(queryset.select_for_update().values_list('id', flat=True)[:BATCH_SIZE])
+            if not batch:
+                break
+            Article.objects.filter(id__in=batch).update(status=Article.Status.PUBLISHED)
+            transaction.on_commit(lambda ids=batch: notify_published(ids))
+        published.extend(batch)
+    return published
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File Name   : related.py
+Author      : wzw
+Date Created: 2026/10/17
+Description : 相关文章预计算：基于标签共现的 Jaccard 相似度
+              按块只加载目标文章的标签列及与其有共同标签的文章，构建稀疏矩阵 A（文章 × 标签，0/1），
+              计算 A[块] · Aᵀ 得到共同标签数，再换算为 Jaccard 相似度，向量化地取每篇文章的前 K 个邻居写入
+              tb_related_article；常见标签只取最新的 MAX_TAG_ARTICLES 篇文章作为候选。
+              标签或发布状态变化的文章记入 Redis 脏集合，增量任务只重算受影响的文章
+"""
+import numpy as np
+from django.db import transaction
+from django.db.models import Count
+from django_redis import get_redis_connection
+from redis.exceptions import ResponseError
+from scipy import sparse
+
+from services.cache_utils import cache_version_service
+from .models import Article, RelatedArticle, Tag
+
+TOP_K = 10
+BLOCK_SIZE = 1000
+QUERY_CHUNK_SIZE = 1000
+# 已发布文章数超过该值的标签只取最新的这么多篇文章作为候选，避免常见标签使共现矩阵膨胀
+MAX_TAG_ARTICLES = 5000
+DIRTY_KEY = 'related:dirty'
+CACHE_NAME = 'default'
+
+
+def _redis():
+    return get_redis_connection(CACHE_NAME)
+
+
+def _chunks(items, size=QUERY_CHUNK_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def mark_dirty(article_ids):
+    """ 记录标签或发布状态发生变化的文章，等待下次增量计算 """
+    article_ids = list(article_ids)
+    if article_ids:
+        _redis().sadd(DIRTY_KEY, *article_ids)
+
+
+def _take_dirty():
+    """ 取出脏集合；上次计算中断时优先重放遗留的批次 """
+    processing_key = f'{DIRTY_KEY}:processing'
+    redis = _redis()
+    if not redis.exists(processing_key):
+        try:
+            redis.rename(DIRTY_KEY, processing_key)
+        except ResponseError:
+            return processing_key, set()
+    return processing_key, {int(article_id) for article_id in redis.smembers(processing_key)}
+
+
+def _published_pairs():
+    return Article.tags.through.objects.filter(article__status=Article.Status.PUBLISHED).order_by()
+
+
+def _tag_pairs(tag_ids):
+    """ 各标签下已发布文章的 (文章 id, 标签 id)；常见标签只取最新的 MAX_TAG_ARTICLES 篇作为候选 """
+    tag_ids = set(tag_ids)
+    common = set()
+    for chunk in _chunks(tag_ids):
+        common.update(
+            Tag.objects.filter(id__in=chunk, published_article_count__gt=MAX_TAG_ARTICLES).values_list('id', flat=True)
+        )
+    pairs = []
+    for chunk in _chunks(tag_ids - common):
+        pairs.extend(_published_pairs().filter(tag_id__in=chunk).values_list('article_id', 'tag_id'))
+    for tag_id in common:
+        pairs.extend(
+            _published_pairs().filter(tag_id=tag_id).order_by('-article_id')
+            .values_list('article_id', 'tag_id')[:MAX_TAG_ARTICLES]
+        )
+    return pairs
+
+
+def build_matrix(sources):
+    """
+    构建 sources 及与其有共同标签的已发布文章的文章 × 标签稀疏矩阵，只包含 sources 的标签列，
+    返回 (按升序排列的文章 id 数组, CSR 矩阵, 各文章的标签总数)。
+    sources 的行包含其全部标签，因此 sources 与任一文章的共同标签数是准确的（常见标签的候选截断除外）；
+    其余行之间的乘积不完整，只能用于以 sources 为行的计算
+    """
+    source_pairs = []
+    for chunk in _chunks(sources):
+        source_pairs.extend(_published_pairs().filter(article_id__in=chunk).values_list('article_id', 'tag_id'))
+    pairs = np.array(
+        sorted(set(source_pairs).union(_tag_pairs(tag_id for _, tag_id in source_pairs))), dtype=np.int64
+    ).reshape(-1, 2)
+    article_ids, rows = np.unique(pairs[:, 0], return_inverse=True)
+    tag_ids, cols = np.unique(pairs[:, 1], return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.float32), (rows, cols)),
+        shape=(len(article_ids), len(tag_ids)),
+    )
+
+    # Jaccard 的分母需要每篇文章的全部标签数，不能用只含部分标签列的行和
+    degrees = np.zeros(len(article_ids), dtype=np.float32)
+    for chunk in _chunks(article_ids.tolist()):
+        counts = np.array(
+            _published_pairs().filter(article_id__in=chunk).values('article_id')
+            .annotate(count=Count('tag_id')).values_list('article_id', 'count'),
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        degrees[np.searchsorted(article_ids, counts[:, 0])] = counts[:, 1]
+    return article_ids, matrix, degrees
+
+
+def _positions(article_ids, targets):
+    """ targets 中位于矩阵内的文章的行下标 """
+    return np.flatnonzero(np.isin(article_ids, list(targets)))
+
+
+def _similarities(matrix, degrees, rows):
+    """ 计算 rows（行下标数组）与所有文章的 Jaccard 相似度，返回 (块内行号, 邻居下标, 相似度)，已去掉自身 """
+    overlap = (matrix[rows] @ matrix.T).tocsr()
+    local = np.repeat(np.arange(len(rows)), np.diff(overlap.indptr))
+    cols = overlap.indices
+    similarity = overlap.data / (degrees[rows][local] + degrees[cols] - overlap.data)
+    keep = cols != rows[local]
+    return local[keep], cols[keep], similarity[keep]
+
+
+def _top_k(matrix, degrees, rows, k=TOP_K):
+    """ rows 中每篇文章的前 k 个邻居，相似度相同时较新的文章（id 较大）在前，返回 (行下标, 邻居下标, 排名, 相似度) """
+    local, cols, similarity = _similarities(matrix, degrees, rows)
+    order = np.lexsort((-cols, -similarity, local))
+    local, cols, similarity = local[order], cols[order], similarity[order]
+    # 按块内行号排好序后，当前位置减去该组的起始位置即为组内排名
+    rank = np.arange(len(local)) - np.searchsorted(local, local, side='left')
+    keep = rank < k
+    return rows[local[keep]], cols[keep], rank[keep], similarity[keep]
+
+
+def _affected(dirty):
+    """
+    增量计算时需要重算的文章：脏文章本身、当前相关列表中含有脏文章的文章，
+    以及与脏文章的相似度足以进入其前 K 名（不低于其当前第 K 名）的文章
+    """
+    affected = set(dirty)
+    for chunk in _chunks(dirty):
+        affected.update(RelatedArticle.objects.filter(related_id__in=chunk).values_list('article_id', flat=True))
+
+    for block in _chunks(dirty, BLOCK_SIZE):
+        article_ids, matrix, degrees = build_matrix(block)
+        positions = _positions(article_ids, block)
+        if not len(positions):
+            continue
+
+        _, cols, similarity = _similarities(matrix, degrees, positions)
+        best = np.zeros(len(article_ids), dtype=np.float32)
+        np.maximum.at(best, cols, similarity)
+        candidates = np.flatnonzero(best)
+        thresholds = {}
+        for chunk in _chunks(article_ids[candidates].tolist()):
+            thresholds.update(
+                RelatedArticle.objects.filter(article_id__in=chunk, rank=TOP_K - 1).values_list('article_id', 'score')
+            )
+        for position in candidates:
+            article_id = int(article_ids[position])
+            if best[position] >= thresholds.get(article_id, 0):
+                affected.add(article_id)
+    return affected
+
+
+def _save(article_ids, rows, sources, neighbours, ranks, similarities):
+    """ 替换 rows 对应文章的相关列表 """
+    with transaction.atomic():
+        RelatedArticle.objects.filter(article_id__in=article_ids[rows].tolist()).delete()
+        RelatedArticle.objects.bulk_create(
+            [
+                RelatedArticle(article_id=int(source), related_id=int(neighbour), rank=int(rank), score=float(score))
+                for source, neighbour, rank, score in zip(
+                    article_ids[sources], article_ids[neighbours], ranks, similarities
+                )
+            ],
+            batch_size=QUERY_CHUNK_SIZE,
+        )
+
+
+def _bump_cache_versions(article_ids):
+    for chunk in _chunks(article_ids):
+        slugs = Article.objects.filter(id__in=chunk).values_list('slug', flat=True)
+        cache_version_service.bump(*[f'related:{slug}' for slug in slugs])
+
+
+def compute_related(full=False):
+    """ 重算相关文章：full 为 True 时全量，否则只处理脏集合影响到的文章，返回重算的文章数 """
+    processing_key, dirty = _take_dirty()
+    if not full and not dirty:
+        return 0
+
+    if full:
+        targets = set(RelatedArticle.objects.values_list('article_id', flat=True).distinct())
+        targets.update(Article.objects.filter(status=Article.Status.PUBLISHED).values_list('id', flat=True))
+    else:
+        targets = _affected(dirty)
+
+    # 按块只加载目标文章的标签列及其候选文章，内存与块大小和标签的候选上限成正比，而不是全部文章
+    for block in _chunks(sorted(targets), BLOCK_SIZE):
+        article_ids, matrix, degrees = build_matrix(block)
+        rows = _positions(article_ids, block)
+        # 已撤回、已删除或没有标签的文章不在矩阵中，只清空其相关列表
+        stale = set(block) - set(article_ids[rows].tolist())
+        if stale:
+            RelatedArticle.objects.filter(article_id__in=stale).delete()
+        if len(rows):
+            _save(article_ids, rows, *_top_k(matrix, degrees, rows))
+
+    _redis().delete(processing_key)
+    _bump_cache_versions(targets)
+    return len(targets)
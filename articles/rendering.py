@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File Name   : rendering.py
+Author      : wzw
+Date Created: 2026/10/17
+Description : 文章正文的保存时处理：Markdown 渲染为 HTML，生成纯文本摘要、字数和预计阅读时长
+              渲染结果按正文哈希缓存在 Redis 中，内容未变化的重复保存不会重新渲染
+"""
+import hashlib
+import math
+import re
+from html import unescape
+
+import markdown
+from django.core.cache import caches
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+from markdown.extensions import Extension
+from markdown.treeprocessors import Treeprocessor
+
+# 渲染规则变化时递增，使旧的渲染缓存失效
+RENDER_VERSION = 3
+RENDER_CACHE_NAME = 'default'
+RENDER_CACHE_SECONDS = 60 * 60 * 24 * 7
+# 不使用 extra：其中的 attr_list 允许作者用 {: onclick=... } 给任意元素加属性；md_in_html 依赖原始 HTML，本就被禁用
+MARKDOWN_EXTENSIONS = ['abbr', 'def_list', 'fenced_code', 'footnotes', 'tables', 'sane_lists', 'toc']
+MARKDOWN_EXTENSION_CONFIGS = {
+    # 表格对齐输出为 align 属性，不输出 style
+    'tables': {'use_align_attribute': True},
+}
+
+EXCERPT_LENGTH = 200
+# 阅读速度：中日文按字计，其余按单词计（每分钟）
+CJK_CHARS_PER_MINUTE = 400
+WORDS_PER_MINUTE = 200
+
+CJK_CHARS = r'\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+CJK_RE = re.compile(f'[{CJK_CHARS}]')
+# 中日文以外的单词（允许 don't、well-known 这类带连接符的词）
+WORD_RE = re.compile(rf"[^\W{CJK_CHARS}]+(?:['\u2019-][^\W{CJK_CHARS}]+)*")
+SAFE_URL_SCHEMES = {'', 'http', 'https', 'mailto'}
+# 浏览器取 URL 协议前会解码 HTML 实体、去掉首尾的控制字符和空格、删除其中的制表符和换行；
+# 这里删除全部 ASCII 控制字符和空白后再取协议，宁可多删也不放过 java&#x09;script: 这类写法
+URL_IGNORED_RE = re.compile(r'[\x00-\x20\x7f]')
+URL_SCHEME_RE = re.compile(r'([a-z][a-z0-9+.\-]*):', re.IGNORECASE)
+# 渲染结果中允许保留的属性（扩展自身生成的链接、锚点、缩写标题、代码语言和表格对齐），其余一律删除
+ALLOWED_ATTRIBUTES = {'href', 'src', 'alt', 'title', 'id', 'class', 'align'}
+
+# 渲染结果写回文章的字段
+RENDERED_FIELDS = ('content_html', 'excerpt', 'word_count', 'reading_time', 'content_hash')
+
+
+def url_scheme(url):
+    """ 按浏览器看到的地址取协议（小写），没有协议时返回空字符串 """
+    match = URL_SCHEME_RE.match(URL_IGNORED_RE.sub('', unescape(url)))
+    return match.group(1).lower() if match else ''
+
+
+class SafeLinkTreeprocessor(Treeprocessor):
+    """ 删除白名单以外的属性（如 on* 事件、style），去掉 javascript: 等不安全协议的链接和图片地址 """
+
+    def run(self, root):
+        for element in root.iter():
+            for attr in [attr for attr in element.attrib if attr.lower() not in ALLOWED_ATTRIBUTES]:
+                del element.attrib[attr]
+            for attr in ('href', 'src'):
+                url = element.get(attr)
+                if url is not None and url_scheme(url) not in SAFE_URL_SCHEMES:
+                    del element.attrib[attr]
+
+
+class SafeMarkdownExtension(Extension):
+    """ 用户输入中的原始 HTML 按文本转义输出，不直接插入页面 """
+
+    def extendMarkdown(self, md):
+        md.preprocessors.deregister('html_block')
+        md.inlinePatterns.deregister('html')
+        md.treeprocessors.register(SafeLinkTreeprocessor(md), 'safe_link', 0)
+
+
+def content_hash(content):
+    return hashlib.sha256((content or '').encode()).hexdigest()
+
+
+def render_markdown(content):
+    """ Markdown → HTML """
+    md = markdown.Markdown(
+        extensions=[*MARKDOWN_EXTENSIONS, SafeMarkdownExtension()],
+        extension_configs=MARKDOWN_EXTENSION_CONFIGS,
+    )
+    return md.convert(content or '')
+
+
+def count_words(text):
+    """ 统计字数，返回 (中日文字数, 其他单词数) """
+    return len(CJK_RE.findall(text)), len(WORD_RE.findall(text))
+
+
+def render_content(content):
+    """ 渲染正文，返回写回文章的字段值（不含 content_hash）；结果按正文哈希缓存 """
+    digest = content_hash(content)
+    cache = caches[RENDER_CACHE_NAME]
+    key = f'render:v{RENDER_VERSION}:{digest}'
+    rendered = cache.get(key)
+    if rendered is None:
+        html = render_markdown(content)
+        text = ' '.join(unescape(strip_tags(html)).split())
+        cjk_count, word_count = count_words(text)
+        minutes = cjk_count / CJK_CHARS_PER_MINUTE + word_count / WORDS_PER_MINUTE
+        rendered = {
+            'content_html': html,
+            'excerpt': Truncator(text).chars(EXCERPT_LENGTH),
+            'word_count': cjk_count + word_count,
+            'reading_time': max(1, math.ceil(minutes)) if text else 0,
+        }
+        cache.set(key, rendered, RENDER_CACHE_SECONDS)
+    return rendered
+
+
+def render_article(article, force=False):
+    """ 正文变化时渲染并写到文章对象上（不保存），返回是否重新渲染 """
+    digest = content_hash(article.content)
+    if not force and digest == article.content_hash and article.content_html:
+        return False
+    for field, value in render_content(article.content).items():
+        setattr(article, field, value)
+    article.content_hash = digest
+    return True
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File Name   : revisions.py
+Author      : wzw
+Date Created: 2026/10/17
+Description : 草稿自动保存（增量修订）
+              编辑器提交相对某个修订号的增量，只在 tb_article_revision 追加一行，不写文章表；
+              每 ARTICLE_REVISION_SNAPSHOT_INTERVAL 个修订存一次全文快照，重建任意版本最多回放这么多个增量。
+              显式提交时才把最新修订写回文章正文，之前的修订随之清理。
+              修订号 0 表示文章当前已保存的正文
+"""
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+
+from .models import ArticleRevision
+
+# 最新修订全文的缓存时间，连续自动保存时无需每次从快照重建
+TEXT_CACHE_SECONDS = 60 * 60
+
+
+class RevisionConflict(Exception):
+    """ 基准修订号不是最新修订（其他窗口已保存过），客户端需要重新拉取 """
+
+    def __init__(self, head):
+        super().__init__(head)
+        self.head = head
+
+
+def apply_delta(text, ops):
+    """
+    将增量应用到 text 上并返回新文本，ops 为按顺序执行的操作列表：
+    {"retain": n} 保留 n 个字符，{"delete": n} 删除 n 个字符，{"insert": "..."} 插入文本，
+    操作未覆盖的末尾部分原样保留。长度按 Unicode 字符计算，格式错误时抛出 ValueError
+    """
+    parts, position = [], 0
+    for op in ops:
+        if not isinstance(op, dict) or len(op) != 1:
+            raise ValueError("每个操作必须是只含一个键的对象")
+        (kind, value), = op.items()
+        if kind == 'insert' and isinstance(value, str):
+            parts.append(value)
+        elif kind in ('retain', 'delete') and type(value) is int and value > 0:
+            if position + value > len(text):
+                raise ValueError("操作超出了基准修订的长度")
+            if kind == 'retain':
+                parts.append(text[position:position + value])
+            position += value
+        else:
+            raise ValueError(f"无效的操作: {op}")
+    parts.append(text[position:])
+    return ''.join(parts)
+
+
+def _cache_key(article_id, number):
+    return f'revision:{article_id}:{number}'
+
+
+def head(article_id):
+    """ 最新修订号，没有未提交的修订时为 0 """
+    return (
+        ArticleRevision.objects.filter(article_id=article_id)
+        .order_by('-number')
+        .values_list('number', flat=True)
+        .first()
+    ) or 0
+
+
+def text_at(article, number):
+    """ 重建指定修订的全文：从不晚于它的最近快照开始依次回放增量 """
+    if number == 0:
+        return article.content
+    text = cache.get(_cache_key(article.id, number))
+    if text is not None:
+        return text
+    revisions = ArticleRevision.objects.filter(article_id=article.id)
+    snapshot = (
+        revisions.filter(is_snapshot=True, number__lte=number)
+        .order_by('-number')
+        .values_list('number', 'data')
+        .first()
+    )
+    if snapshot is None:
+        raise ArticleRevision.DoesNotExist(f"修订 {number} 不存在")
+    snapshot_number, text = snapshot
+    deltas = revisions.filter(number__gt=snapshot_number, number__lte=number).order_by('number')
+    for data in deltas.values_list('data', flat=True):
+        text = apply_delta(text, json.loads(data))
+    return text
+
+
+def autosave(article, base_revision, ops):
+    """ 在 base_revision 的基础上应用增量并追加一个修订，返回新修订号 """
+    current = head(article.id)
+    if base_revision != current:
+        raise RevisionConflict(current)
+    text = apply_delta(text_at(article, base_revision), ops)
+
+    number = base_revision + 1
+    last_snapshot = (
+        ArticleRevision.objects.filter(article_id=article.id, is_snapshot=True)
+        .order_by('-number')
+        .values_list('number', flat=True)
+        .first()
+    )
+    # 第一个修订没有可回放的基准，必须是快照
+    is_snapshot = last_snapshot is None or number - last_snapshot >= settings.ARTICLE_REVISION_SNAPSHOT_INTERVAL
+    try:
+        with transaction.atomic():
+            ArticleRevision.objects.create(
+                article_id=article.id,
+                number=number,
+                is_snapshot=is_snapshot,
+                data=text if is_snapshot else json.dumps(ops, ensure_ascii=False, separators=(',', ':')),
+            )
+    except IntegrityError:
+        # 并发的另一次自动保存先写入了相同的修订号
+        raise RevisionConflict(head(article.id))
+    cache.set(_cache_key(article.id, number), text, TEXT_CACHE_SECONDS)
+    return number
+
+
+def _compact(article_id, number, text):
+    """ 将 number 转为全文快照并删除更早的修订 """
+    ArticleRevision.objects.filter(article_id=article_id, number=number).update(is_snapshot=True, data=text)
+    ArticleRevision.objects.filter(article_id=article_id, number__lt=number).delete()
+
+
+def commit(article):
+    """ 将最新修订写回文章正文（只更新正文相关字段，不改动标签），返回提交的修订号 """
+    number = head(article.id)
+    if number == 0:
+        return 0
+    text = text_at(article, number)
+    with transaction.atomic():
+        if text != article.content:
+            article.content = text
+            article.save(update_fields=['content', 'updated_at'])
+        _compact(article.id, number, text)
+    return number
+
+
+def reset(article, content):
+    """ 正文通过完整更新接口修改后，追加一个全文快照作为新的最新修订，旧的修订号随之失效 """
+    number = head(article.id)
+    if number == 0:
+        return 0
+    with transaction.atomic():
+        ArticleRevision.objects.create(article_id=article.id, number=number + 1, is_snapshot=True, data=content)
+        ArticleRevision.objects.filter(article_id=article.id, number__lte=number).delete()
+    return number + 1
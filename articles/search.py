@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File Name   : search.py
+Author      : wzw
+Date Created: 2026/10/17
+Description : 基于自建倒排索引的文章全文检索
+              分词：字母/数字（含带重音的拉丁字母等非中日文文字）按单词切分；中日文同时建立单字和相邻两字（bigram）
+                    词项，检索时多字片段用 bigram 匹配，单字查询用单字词项匹配
+              排序：BM25，打分在数据库中按词项聚合完成；按文档频率从低到高选取参与打分的词项，单个词项和整个查询
+                    扫描的倒排记录数都有固定上限（与文档总数无关），只取得分最高的 SEARCH_TOP_K 篇
+"""
+import hashlib
+import math
+import re
+import unicodedata
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Case, Count, ExpressionWrapper, F, FloatField, Sum, Value, When
+
+from .models import Article, SearchTerm, SearchPosting, SearchDocument
+
+CJK_CHARS = r'\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+# 连续的中日文字符，或由字母/数字组成的单词（Unicode 字符类，café 不会被截成 caf）
+TOKEN_RE = re.compile(rf'(?P<cjk>[{CJK_CHARS}]+)|(?P<word>[^\W_{CJK_CHARS}]+)')
+MAX_TERM_LENGTH = 64
+MAX_QUERY_TERMS = 32
+TITLE_WEIGHT = 3  # 标题中的词按多次出现计算
+# 不建索引的停用词
+STOPWORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'in', 'is', 'it', 'of', 'on', 'or', 'the', 'to', 'with',
+    '的', '了', '是', '在', '和', '也', '就', '都',
+})
+# 只返回得分最高的前若干篇（分页在这个结果集内进行，不再单独 COUNT）
+SEARCH_TOP_K = 1000
+# 文档频率超过该值的词项视为高频词，查询中还有更稀有的词项时不参与打分（其倒排列表过长，且 IDF 很低，对排序几乎没有贡献）；
+# 查询只含高频词时，只扫描最稀有的那个词项按影响力（词频从高到低、文章从短到长）排序的前这么多条倒排记录
+SEARCH_MAX_DOC_FREQ = 50000
+# 一次检索参与聚合的倒排记录总数上限，更常见的词项超出时被舍弃
+SEARCH_MAX_POSTINGS = 100000
+
+# BM25 参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+STATS_CACHE_KEY = 'search:stats'
+STATS_CACHE_SECONDS = 60 * 10
+BATCH_SIZE = 500
+
+
+def tokenize(text, query=False):
+    """
+    分词：单词整体作为词项；中日文连续片段建索引时切成单字和相邻两字的 bigram，
+    检索时（query=True）多字片段只用 bigram，单字片段用单字。停用词被丢弃
+    """
+    tokens = []
+    for match in TOKEN_RE.finditer(unicodedata.normalize('NFKC', text or '').lower()):
+        if match.group('word'):
+            word = match.group('word')
+            if len(word) <= MAX_TERM_LENGTH and word not in STOPWORDS:
+                tokens.append(word)
+            continue
+        run = match.group('cjk')
+        bigrams = [run[i:i + 2] for i in range(len(run) - 1)]
+        if query:
+            tokens.extend(bigrams or [run])
+        else:
+            tokens.extend(char for char in run if char not in STOPWORDS)
+            tokens.extend(bigrams)
+    return tokens
+
+
+def _term_counts(article):
+    counts = Counter(tokenize(article.content))
+    for token in tokenize(article.title):
+        counts[token] += TITLE_WEIGHT
+    return counts
+
+
+def _signature(article):
+    return hashlib.sha1(f'{article.title}\n{article.content}'.encode()).hexdigest()
+
+
+def _chunks(items, size=BATCH_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _get_or_create_terms(terms):
+    """ 批量获取词项 id，不存在的词项批量创建，返回 {term: id} """
+    term_ids = {}
+    for chunk in _chunks(terms):
+        term_ids.update(SearchTerm.objects.filter(term__in=chunk).values_list('term', 'id'))
+    missing = [term for term in terms if term not in term_ids]
+    if missing:
+        SearchTerm.objects.bulk_create(
+            [SearchTerm(term=term) for term in missing], batch_size=BATCH_SIZE, ignore_conflicts=True
+        )
+        for chunk in _chunks(missing):
+            term_ids.update(SearchTerm.objects.filter(term__in=chunk).values_list('term', 'id'))
+    return term_ids
+
+
+def _remove_postings(article_id):
+    """ 删除文章的倒排记录，并扣减对应词项的文档频率 """
+    term_ids = list(SearchPosting.objects.filter(article_id=article_id).values_list('term_id', flat=True))
+    for chunk in _chunks(term_ids):
+        SearchTerm.objects.filter(id__in=chunk, doc_freq__gt=0).update(doc_freq=F('doc_freq') - 1)
+    SearchPosting.objects.filter(article_id=article_id).delete()
+
+
+def _lock_article(article_id):
+    """ 锁定文章行，同一篇文章的索引更新串行执行（并发写入会违反 (term, article) 唯一约束、重复累加文档频率） """
+    return Article.objects.select_for_update().filter(pk=article_id).only('id', 'title', 'content', 'is_draft').first()
+
+
+def unindex_article(article_id):
+    """ 从索引中移除文章 """
+    with transaction.atomic():
+        _lock_article(article_id)
+        _remove_postings(article_id)
+        SearchDocument.objects.filter(article_id=article_id).delete()
+
+
+def index_article(article_id):
+    """ 增量更新单篇文章的索引：草稿或已删除的文章会被移除，内容未变化时直接跳过 """
+    with transaction.atomic():
+        # 加锁后再读取正文，后到的调用会看到先到者写入的签名并直接跳过
+        article = _lock_article(article_id)
+        # 定时文章也建立索引，检索时按发布状态过滤，到点发布后无需重建
+        if article is None or article.is_draft:
+            _remove_postings(article_id)
+            SearchDocument.objects.filter(article_id=article_id).delete()
+            return
+
+        signature = _signature(article)
+        document = SearchDocument.objects.filter(article_id=article_id).first()
+        if document and document.signature == signature:
+            return
+
+        counts = _term_counts(article)
+        length = sum(counts.values())
+
+        _remove_postings(article_id)
+        term_ids = _get_or_create_terms(list(counts))
+        SearchPosting.objects.bulk_create(
+            [
+                SearchPosting(term_id=term_ids[term], article_id=article_id, tf=tf, doc_len=length)
+                for term, tf in counts.items()
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        for chunk in _chunks(term_ids.values()):
+            SearchTerm.objects.filter(id__in=chunk).update(doc_freq=F('doc_freq') + 1)
+        SearchDocument.objects.update_or_create(
+            article_id=article_id,
+            defaults={'length': length, 'signature': signature},
+        )
+
+
+def get_stats():
+    """ 文档总数与平均长度，短时间缓存，避免每次检索都做全表聚合 """
+    stats = cache.get(STATS_CACHE_KEY)
+    if stats is None:
+        result = SearchDocument.objects.aggregate(total=Count('pk'), avg_length=Avg('length'))
+        stats = (result['total'], result['avg_length'] or 1.0)
+        cache.set(STATS_CACHE_KEY, stats, STATS_CACHE_SECONDS)
+    return stats
+
+
+def prune_terms(doc_freqs):
+    """
+    选出参与打分的词项，返回 {term_id: 扫描的倒排记录数}：按文档频率从低到高选取，不超过 SEARCH_MAX_DOC_FREQ
+    的词项累计到 SEARCH_MAX_POSTINGS 为止；全部是高频词时只保留最稀有的一个，只扫描其前 SEARCH_MAX_DOC_FREQ 条
+    """
+    kept, scanned = {}, 0
+    for term_id, df in sorted(doc_freqs.items(), key=lambda item: (item[1], item[0])):
+        if df > SEARCH_MAX_DOC_FREQ or scanned + df > SEARCH_MAX_POSTINGS:
+            break
+        kept[term_id] = df
+        scanned += df
+    if not kept:
+        term_id = min(doc_freqs, key=lambda term_id: (doc_freqs[term_id], term_id))
+        kept = {term_id: SEARCH_MAX_DOC_FREQ}
+    return kept
+
+
+def _idf(total, df):
+    return math.log(1 + (total - df + 0.5) / (df + 0.5))
+
+
+def _search_common_term(term_id, df, total, avg_length):
+    """ 只含高频词的查询：按 (term, -tf, doc_len) 索引读取影响力最高的部分倒排记录，在 Python 中打分 """
+    idf = _idf(total, df)
+    postings = (
+        SearchPosting.objects.filter(term_id=term_id, article__status=Article.Status.PUBLISHED)
+        .order_by('-tf', 'doc_len')
+        .values_list('article_id', 'tf', 'doc_len')[:SEARCH_MAX_DOC_FREQ]
+    )
+    scored = [
+        {
+            'article_id': article_id,
+            'score': idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * doc_len / avg_length)),
+        }
+        for article_id, tf, doc_len in postings
+    ]
+    scored.sort(key=lambda hit: (-hit['score'], -hit['article_id']))
+    return scored[:SEARCH_TOP_K]
+
+
+def search_articles(query):
+    """ 检索已发布文章，返回按 BM25 得分降序的前 SEARCH_TOP_K 条 {'article_id', 'score'} """
+    terms = list(dict.fromkeys(tokenize(query, query=True)))[:MAX_QUERY_TERMS]
+    doc_freqs = dict(
+        SearchTerm.objects.filter(term__in=terms, doc_freq__gt=0).values_list('id', 'doc_freq')
+    ) if terms else {}
+    if not doc_freqs:
+        return []
+
+    total, avg_length = get_stats()
+    kept = prune_terms(doc_freqs)
+    if len(kept) == 1:
+        (term_id, _), = kept.items()
+        if doc_freqs[term_id] > SEARCH_MAX_DOC_FREQ:
+            return _search_common_term(term_id, doc_freqs[term_id], total, float(avg_length))
+    idf = Case(
+        *[When(term_id=term_id, then=Value(_idf(total, doc_freqs[term_id]))) for term_id in kept],
+        output_field=FloatField(),
+    )
+    norm = Value(BM25_K1) * (Value(1 - BM25_B) + Value(BM25_B) * F('doc_len') / Value(float(avg_length)))
+    score = ExpressionWrapper(
+        idf * F('tf') * Value(BM25_K1 + 1) / (F('tf') + norm),
+        output_field=FloatField(),
+    )
+    return list(
+        SearchPosting.objects.filter(
+            term_id__in=list(kept),
+            article__status=Article.Status.PUBLISHED,
+        )
+        .values('article_id')
+        .annotate(score=Sum(score))
+        .order_by('-score', '-article_id')[:SEARCH_TOP_K]
+    )
@@ -1,6 +1,9 @@
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
+from services.images import build_srcset
+from services.serializers import DynamicFieldsMixin
+from social.buffers import has_liked
 from .models import Article, Tag, ReadingHistory
 
 User = get_user_model()
@@ -8,11 +11,15 @@ User = get_user_model()
 
 # 嵌套序列化作者信息（仅展示部分字段）
 class AuthorNestedSerializer(serializers.ModelSerializer):
-    followers = serializers.IntegerField(source="followers.count", read_only=True)  # 统计关注者数量
+    followers = serializers.IntegerField(source="follower_count", read_only=True)  # 关注者数量（冗余字段）
+    avatar_srcset = serializers.SerializerMethodField(read_only=True)  # 头像派生图 {格式: srcset}
 
     class Meta:
         model = User
-        fields = ['id', 'username', 'followers']
+        fields = ['id', 'username', 'followers', 'avatar_srcset']
+
+    def get_avatar_srcset(self, obj):
+        return build_srcset(obj.avatar_derivatives)
 
 
 # 嵌套序列化标签信息，用于文章列表
@@ -32,8 +39,9 @@ class TagNestedSerializer(serializers.ModelSerializer):
 
 
 # 标签序列化器（带文章数量统计）
-class TagSerializer(serializers.ModelSerializer):
-    article_count = serializers.SerializerMethodField(read_only=True)  # 统计已发布文章数量
+class TagSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    # 已发布文章数量，读取物化字段，不再逐个标签 COUNT
+    article_count = serializers.IntegerField(source='published_article_count', read_only=True)
     url = serializers.SerializerMethodField()
 
     class Meta:
@@ -47,27 +55,58 @@ class TagSerializer(serializers.ModelSerializer):
     def get_url(self, obj):
         return obj.get_absolute_url()
 
-    def get_article_count(self, obj):
-        # 统计已发布的文章数量（非草稿，发布时间 <= 当前时间）
-        return obj.articles.filter(
-            is_draft=False,
-            published_at__lte=timezone.now()
-        ).count()
+
+
+# 标签云序列化器（直接序列化 values() 结果）
+class TagCloudSerializer(serializers.Serializer):
+    name = serializers.CharField()
+    slug = serializers.CharField()
+    count = serializers.IntegerField(source='published_article_count')
+
+
+# 热门文章查询参数
+class HotArticleQuerySerializer(serializers.Serializer):
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=20)
+
+
+# 标签补全结果
+class TagSuggestionSerializer(serializers.Serializer):
+    name = serializers.CharField()
+    slug = serializers.CharField()
+    count = serializers.IntegerField()
+
+
+# 标签补全查询参数
+class TagSuggestQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=32)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
+
+
+# 标签云查询参数
+class TagCloudQuerySerializer(serializers.Serializer):
+    top = serializers.IntegerField(min_value=1, max_value=500, default=100)
+    min_count = serializers.IntegerField(min_value=0, default=1)
 
 
 # 文章列表序列化器（用于列表接口）
-class ArticleListSerializer(serializers.ModelSerializer):
+class ArticleListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     tags = TagNestedSerializer(many=True, read_only=True)
     author = AuthorNestedSerializer(read_only=True)
     url = serializers.SerializerMethodField(read_only=True)
+    cover_srcset = serializers.SerializerMethodField(read_only=True)  # 封面派生图 {格式: srcset}
 
     like_count = serializers.IntegerField(read_only=True)
     favorite_count = serializers.IntegerField(read_only=True)
+    comment_count = serializers.IntegerField(read_only=True)
+    # 浏览量和独立读者数来自 Redis，由视图批量填充（见 articles.pageviews）
+    view_count = serializers.IntegerField(read_only=True)
+    unique_readers = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Article
-        # 列表接口不返回 content 字段
-        exclude = ['created_at', 'updated_at', 'content', 'is_draft', 'slug']
+        # 列表接口不返回正文，只返回摘要和阅读时长
+        exclude = ['created_at', 'updated_at', 'content', 'content_html', 'content_hash', 'is_draft', 'status', 'slug',
+                   'cover_derivatives']
         extra_kwargs = {
             'published_at': {'read_only': True},
             'cover_pic': {'required': False},
@@ -76,19 +115,28 @@ class ArticleListSerializer(serializers.ModelSerializer):
     def get_url(self, obj):
         return obj.get_absolute_url()
 
+    def get_cover_srcset(self, obj):
+        return build_srcset(obj.cover_derivatives)
+
 
-# 文章详情序列化器（比列表多 content 字段）
-class ArticleListDetailSerializer(serializers.ModelSerializer):
+# 文章详情序列化器（比列表多预渲染的 content_html 字段）
+class ArticleListDetailSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     tags = TagNestedSerializer(many=True, read_only=True)
     author = AuthorNestedSerializer(read_only=True)
     url = serializers.SerializerMethodField(read_only=True)
+    cover_srcset = serializers.SerializerMethodField(read_only=True)  # 封面派生图 {格式: srcset}
 
     like_count = serializers.IntegerField(read_only=True)
     favorite_count = serializers.IntegerField(read_only=True)
+    comment_count = serializers.IntegerField(read_only=True)
+    view_count = serializers.IntegerField(read_only=True)
+    unique_readers = serializers.IntegerField(read_only=True)
+    is_liked = serializers.SerializerMethodField(read_only=True)  # 当前用户是否已点赞
 
     class Meta:
         model = Article
-        exclude = ['created_at', 'updated_at', 'is_draft', 'slug']
+        # 正文以保存时渲染好的 HTML 返回，不再返回 Markdown 原文
+        exclude = ['created_at', 'updated_at', 'content', 'content_hash', 'is_draft', 'status', 'slug', 'cover_derivatives']
         extra_kwargs = {
             'published_at': {'read_only': True},
             'cover_pic': {'required': False},
@@ -97,24 +145,36 @@ class ArticleListDetailSerializer(serializers.ModelSerializer):
     def get_url(self, obj):
         return obj.get_absolute_url()
 
+    def get_cover_srcset(self, obj):
+        return build_srcset(obj.cover_derivatives)
+
+    def get_is_liked(self, obj):
+        request = self.context.get('request')
+        if not request or not request.user.is_authenticated:
+            return False
+        return has_liked(obj.id, request.user.id)
+
 
 # 用于创建/更新文章接口，支持前端传入标签列表
-class ArticleSerializer(serializers.ModelSerializer):
+class ArticleSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     tags = serializers.ListField(
-        child=serializers.CharField(),  # 允许前端传字符串列表
+        child=serializers.CharField(max_length=32),  # 允许前端传字符串列表，长度与 Tag.name 一致
         write_only=True,
         required=False,
     )
     tag_list = TagNestedSerializer(many=True, read_only=True, source="tags")  # 返回嵌套标签信息
     url = serializers.SerializerMethodField(read_only=True)
+    cover_srcset = serializers.SerializerMethodField(read_only=True)  # 封面派生图 {格式: srcset}
 
     like_count = serializers.IntegerField(read_only=True)
     favorite_count = serializers.IntegerField(read_only=True)
+    comment_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Article
-        exclude = ['created_at', 'updated_at', 'author', 'slug']
+        exclude = ['created_at', 'updated_at', 'author', 'slug', 'content_html', 'content_hash', 'cover_derivatives']
         extra_kwargs = {
+            'status': {'read_only': True},  # 由 is_draft/published_at 推导
             'published_at': {'required': False},
             'cover_pic': {'required': False},
         }
@@ -141,6 +201,9 @@ class ArticleSerializer(serializers.ModelSerializer):
     def get_url(self, obj):
         return obj.get_absolute_url()
 
+    def get_cover_srcset(self, obj):
+        return build_srcset(obj.cover_derivatives)
+
     def _handle_tags(self, tags_data):
         """创建或获取 Tag 对象列表"""
         if not tags_data:
@@ -163,6 +226,22 @@ class ArticleSerializer(serializers.ModelSerializer):
         return instance
 
 
+class ArticleAutosaveSerializer(serializers.Serializer):
+    """ 草稿自动保存参数 """
+    base_revision = serializers.IntegerField(min_value=0, help_text="增量所基于的修订号，0 表示已保存的正文")
+    delta = serializers.ListField(
+        child=serializers.DictField(),
+        max_length=10000,
+        help_text='操作列表：{"retain": n} / {"delete": n} / {"insert": "文本"}',
+    )
+
+
+class ArticleDraftSerializer(serializers.Serializer):
+    """ 草稿最新修订 """
+    revision = serializers.IntegerField()
+    content = serializers.CharField()
+
+
 # 阅读历史序列化器
 class ReadingHistorySerializer(serializers.ModelSerializer):
     article = ArticleListSerializer(read_only=True)  # 嵌套返回文章信息
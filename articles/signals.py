@@ -0,0 +1,157 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+
+from articles import search
+from articles.bulk import articles_bulk_created
+from articles.hot import hot_ranking
+from articles.models import Article, Tag, RelatedArticle
+from articles.publishing import article_published, notify_published
+from articles.related import mark_dirty
+from articles.slugs import article_slug_resolver
+from articles.suggest import tag_suggest_index
+from articles.tasks import update_search_index, index_articles, publish_article, fan_out_articles, \
+    generate_cover_derivatives
+from services.cache_utils import cache_version_service
+
+User = get_user_model()
+
+
+def schedule_publish(article_id, published_at):
+    """ 发布时间在 ETA 窗口内的定时文章投递 ETA 任务，其余由定时扫描兜底 """
+    if published_at - timezone.now() <= timedelta(seconds=settings.ARTICLE_PUBLISH_ETA_WINDOW):
+        publish_article.apply_async((article_id,), eta=published_at)
+
+
+@receiver(post_save, sender=Article)
+def article_saved(sender, instance, **kwargs):
+    # 事务提交后再异步更新全文索引，避免任务读到未提交的数据
+    transaction.on_commit(lambda: update_search_index.delay(instance.id))
+    # 标签列表中的文章数量也可能变化
+    transaction.on_commit(lambda: Article.bump_cache_versions(instance.id, 'tags'))
+
+    if kwargs.get('created'):
+        User.incr_counter(instance.author_id, 'article_count')
+
+    # 发布状态变化（发布/撤回为草稿）会影响所属标签的已发布文章数
+    if not kwargs.get('created') and instance.status != getattr(instance, '_loaded_status', None):
+        Tag.refresh_article_counts(instance.tags.values_list('id', flat=True))
+        transaction.on_commit(lambda: mark_dirty([instance.id]))
+
+    if instance.status == Article.Status.SCHEDULED:
+        published_at = instance.published_at
+        transaction.on_commit(lambda: schedule_publish(instance.id, published_at))
+    elif instance.just_published:
+        transaction.on_commit(lambda: notify_published([instance.id]))
+    instance._loaded_status = instance.status
+
+    old_slug = getattr(instance, '_loaded_slug', None)
+    if old_slug and old_slug != instance.slug:
+        transaction.on_commit(lambda: article_slug_resolver.invalidate(old_slug))
+    instance._loaded_slug = instance.slug
+
+    # 封面变化后异步生成派生图（新建文章未加载过封面，按默认封面比较）
+    cover = instance.cover_pic.name
+    if cover != getattr(instance, '_loaded_cover', Article._meta.get_field('cover_pic').default):
+        transaction.on_commit(lambda: generate_cover_derivatives.delay(instance.id, cover))
+    instance._loaded_cover = cover
+
+
+@receiver(pre_delete, sender=Article)
+def article_deleting(sender, instance, **kwargs):
+    # 倒排记录会随文章级联删除，这里先同步扣减词项的文档频率
+    search.unindex_article(instance.id)
+    # 删除后就查不到文章的标签了，先算好作用域和标签，提交后再更新版本号和标签计数
+    scopes = Article.cache_scopes(instance.id)
+    tag_ids = list(instance.tags.values_list('id', flat=True))
+    article_id = instance.id
+    # 相关列表中的这一行会被级联删除，引用了它的文章需要补位
+    related_dirty = [article_id, *RelatedArticle.objects.filter(related_id=article_id).values_list('article_id', flat=True)]
+    transaction.on_commit(lambda: cache_version_service.bump(*scopes, 'tags'))
+    transaction.on_commit(lambda: mark_dirty(related_dirty))
+    slug = instance.slug
+    transaction.on_commit(lambda: article_slug_resolver.invalidate(slug))
+    transaction.on_commit(lambda: hot_ranking.remove(article_id))
+    transaction.on_commit(lambda: Tag.refresh_article_counts(tag_ids))
+
+
+@receiver(post_delete, sender=Article)
+def article_deleted(sender, instance, **kwargs):
+    User.incr_counter(instance.author_id, 'article_count', -1)
+
+
+@receiver(m2m_changed, sender=Article.tags.through)
+def article_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # 清空前当前标签仍在，直接按文章作用域更新，并记下受影响的标签留待清空后重算
+        if reverse:
+            instance._cleared_article_ids = list(instance.articles.values_list('id', flat=True))
+            for article_id in instance._cleared_article_ids:
+                Article.bump_cache_versions(article_id, 'tags')
+        else:
+            instance._cleared_tag_ids = list(instance.tags.values_list('id', flat=True))
+            Article.bump_cache_versions(instance.id, 'tags')
+    elif action == 'post_clear':
+        Tag.refresh_article_counts([instance.id] if reverse else getattr(instance, '_cleared_tag_ids', []))
+        cleared = getattr(instance, '_cleared_article_ids', []) if reverse else [instance.id]
+        transaction.on_commit(lambda: mark_dirty(cleared))
+    elif action in ('post_add', 'post_remove') and pk_set:
+        # 标签变化的文章等待相关文章任务增量重算
+        changed_articles = list(pk_set) if reverse else [instance.id]
+        transaction.on_commit(lambda: mark_dirty(changed_articles))
+        if reverse:
+            Tag.refresh_article_counts([instance.id])
+            for article_id in pk_set:
+                Article.bump_cache_versions(article_id, 'tags', f'tag:{instance.slug}')
+        else:
+            Tag.refresh_article_counts(pk_set)
+            changed_tags = [f'tag:{slug}' for slug in Tag.objects.filter(pk__in=pk_set).values_list('slug', flat=True)]
+            Article.bump_cache_versions(instance.id, 'tags', *changed_tags)
+
+
+@receiver(post_save, sender=Tag)
+def tag_saved(sender, instance, **kwargs):
+    # 新建或改名的标签进入补全索引
+    Tag.sync_suggest_index([instance.id])
+
+
+@receiver(post_delete, sender=Tag)
+def tag_deleted(sender, instance, **kwargs):
+    tag_id = instance.id
+    transaction.on_commit(lambda: tag_suggest_index.remove([tag_id]))
+
+
+@receiver(article_published)
+def articles_published(sender, article_ids, **kwargs):
+    # 定时发布通过 update 切换状态，不会触发 post_save，这里统一更新标签计数和缓存版本号
+    Tag.refresh_article_counts(
+        Article.tags.through.objects.filter(article_id__in=article_ids).values_list('tag_id', flat=True).distinct()
+    )
+    cache_version_service.bump(*Article.bulk_cache_scopes(article_ids), 'tags')
+    # 初始热度从发布时间开始衰减：补发的旧文章、导入的历史文章不会获得新文章的热度
+    for article_id, published_at in Article.objects.filter(id__in=article_ids).values_list('id', 'published_at'):
+        hot_ranking.record(article_id, 'publish', at=published_at.timestamp() if published_at else None)
+    transaction.on_commit(lambda: mark_dirty(article_ids))
+    # 普通作者的文章写扩散到粉丝收件箱
+    transaction.on_commit(lambda: fan_out_articles.delay(article_ids))
+
+
+@receiver(articles_bulk_created)
+def articles_bulk_imported(sender, article_ids, **kwargs):
+    # 批量导入不触发 post_save，这里按批完成作者计数、索引、定时发布和发布通知
+    rows = list(Article.objects.filter(id__in=article_ids).values_list('id', 'author_id', 'status', 'published_at'))
+    for author_id, total in Counter(author_id for _, author_id, _, _ in rows).items():
+        User.incr_counter(author_id, 'article_count', total)
+    index_articles.delay(article_ids)
+    for article_id, _, status, published_at in rows:
+        if status == Article.Status.SCHEDULED:
+            schedule_publish(article_id, published_at)
+    # 已发布文章的标签计数和缓存版本号由 article_published 的接收方处理
+    notify_published([article_id for article_id, _, status, _ in rows if status == Article.Status.PUBLISHED])
+    cache_version_service.bump('tags')
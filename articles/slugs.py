@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File Name   : slugs.py
+Author      : wzw
+Date Created: 2026/10/17
+Description : 文章 slug → id 两级解析缓存
+              第一级为进程内 LRU（带过期时间），第二级为 Redis 哈希，都未命中时只查询 id 一列并回填。
+              文章删除或 slug 变化时删除 Redis 中的映射和本进程的条目，其他进程的条目在过期后失效
+"""
+from django.conf import settings
+from django_redis import get_redis_connection
+from rest_framework.exceptions import NotFound
+
+from services.cache_utils import LocalLRUCache
+from .models import Article
+
+
+class ArticleSlugResolver:
+    """ 文章 slug → id 解析 """
+    CACHE_NAME = 'default'
+    KEY = 'article:slug_ids'
+
+    def __init__(self):
+        self.local = LocalLRUCache(settings.SLUG_RESOLVER_LOCAL_SIZE, settings.SLUG_RESOLVER_LOCAL_TTL)
+
+    @property
+    def redis(self):
+        return get_redis_connection(self.CACHE_NAME)
+
+    def resolve(self, slug):
+        """ 返回文章 id，文章不存在时返回 None（不存在的 slug 不缓存） """
+        article_id = self.local.get(slug)
+        if article_id is not None:
+            return article_id
+        article_id = self.redis.hget(self.KEY, slug)
+        if article_id is None:
+            article_id = Article.objects.filter(slug=slug).values_list('id', flat=True).first()
+            if article_id is None:
+                return None
+            self.redis.hset(self.KEY, slug, article_id)
+        article_id = int(article_id)
+        self.local.set(slug, article_id)
+        return article_id
+
+    def resolve_or_404(self, slug):
+        article_id = self.resolve(slug)
+        if article_id is None:
+            raise NotFound("文章不存在")
+        return article_id
+
+    def invalidate(self, *slugs):
+        """ 文章删除或 slug 变化后调用 """
+        if slugs:
+            self.redis.hdel(self.KEY, *slugs)
+            self.local.delete(*slugs)
+
+
+article_slug_resolver = ArticleSlugResolver()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File Name   : suggest.py
+Author      : wzw
+Date Created: 2026/10/17
+Description : 标签前缀补全索引（Redis 有序集合）
+              标签名规范化后的每个前缀对应一个有序集合，成员为 "名称␟slug␟id"，
+              分值为已发布文章数的相反数：ZRANGE 取前 N 个即为按文章数降序、同分按名称升序的结果，
+              一次请求只有一次 O(log N) 的 Redis 查询
+"""
+from django_redis import get_redis_connection
+
+
+class TagSuggestIndex:
+    """ 标签补全索引 """
+    CACHE_NAME = 'default'
+    KEY_PREFIX = 'tags:suggest'
+    # 超过该长度的前缀不再单独建集合，查询时取最长前缀的集合再过滤
+    MAX_PREFIX_LENGTH = 16
+    MAX_SCAN = 1000
+    SEP = '\x1f'
+
+    @property
+    def redis(self):
+        return get_redis_connection(self.CACHE_NAME)
+
+    def _prefix_key(self, prefix):
+        return f'{self.KEY_PREFIX}:p:{prefix}'
+
+    @property
+    def _members_key(self):
+        # id → 当前成员，标签改名或删除时据此清理旧前缀
+        return f'{self.KEY_PREFIX}:members'
+
+    @staticmethod
+    def normalize(text):
+        """ 忽略大小写和多余空白 """
+        return ' '.join((text or '').casefold().split())
+
+    def _prefixes(self, name):
+        name = self.normalize(name)
+        return [name[:i] for i in range(1, min(len(name), self.MAX_PREFIX_LENGTH) + 1)]
+
+    def _member(self, tag_id, name, slug):
+        return self.SEP.join((name, slug, str(tag_id)))
+
+    def _remove_member(self, pipe, member):
+        name = member.split(self.SEP)[0]
+        for prefix in self._prefixes(name):
+            pipe.zrem(self._prefix_key(prefix), member)
+
+    def update(self, tags):
+        """ 新增或更新标签，tags 为 (id, name, slug, 已发布文章数) 的可迭代对象 """
+        tags = list(tags)
+        if not tags:
+            return
+        old_members = self.redis.hmget(self._members_key, [tag_id for tag_id, *_ in tags])
+        pipe = self.redis.pipeline(transaction=False)
+        for (tag_id, name, slug, count), old_member in zip(tags, old_members):
+            member = self._member(tag_id, name, slug)
+            if old_member is not None and old_member.decode() != member:
+                self._remove_member(pipe, old_member.decode())
+            for prefix in self._prefixes(name):
+                pipe.zadd(self._prefix_key(prefix), {member: -count})
+            pipe.hset(self._members_key, tag_id, member)
+        pipe.execute()
+
+    def remove(self, tag_ids):
+        """ 从索引中移除标签 """
+        tag_ids = list(tag_ids)
+        if not tag_ids:
+            return
+        pipe = self.redis.pipeline(transaction=False)
+        for member in self.redis.hmget(self._members_key, tag_ids):
+            if member is not None:
+                self._remove_member(pipe, member.decode())
+        pipe.hdel(self._members_key, *tag_ids)
+        pipe.execute()
+
+    def suggest(self, query, limit=10):
+        """ 返回名称以 query 开头的标签，按已发布文章数降序 """
+        query = self.normalize(query)
+        if not query:
+            return []
+        key = self._prefix_key(query[:self.MAX_PREFIX_LENGTH])
+        if len(query) <= self.MAX_PREFIX_LENGTH:
+            rows = self.redis.zrange(key, 0, limit - 1, withscores=True)
+        else:
+            rows = [
+                (member, score)
+                for member, score in self.redis.zrange(key, 0, self.MAX_SCAN - 1, withscores=True)
+                if self.normalize(member.decode().split(self.SEP)[0]).startswith(query)
+            ][:limit]
+        suggestions = []
+        for member, score in rows:
+            name, slug, _ = member.decode().split(self.SEP)
+            suggestions.append({'name': name, 'slug': slug, 'count': int(-score)})
+        return suggestions
+
+    def clear(self):
+        """ 删除全部索引数据 """
+        keys = list(self.redis.scan_iter(match=f'{self.KEY_PREFIX}:*', count=1000))
+        for start in range(0, len(keys), 1000):
+            self.redis.delete(*keys[start:start + 1000])
+
+
+tag_suggest_index = TagSuggestIndex()
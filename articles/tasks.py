@@ -1,19 +1,85 @@
-from django.contrib.auth import get_user_model
-from django.utils import timezone
-
-from articles.models import Article, ReadingHistory
+from articles import search, publishing, related
+from articles.buffers import reading_history_buffer
+from articles.feed import home_feed
+from articles.hot import hot_ranking
+from articles.models import Article
+from articles.pageviews import article_view_counter
 from mysite.celery import app
+from services import images
+
+
+@app.task
+def flush_reading_history():
+    """ 定时将缓冲中的阅读事件去重后批量落库 """
+    return reading_history_buffer.flush()
+
+
+@app.task
+def persist_article_views():
+    """ 定时将今天和昨天的浏览量、独立读者数落库到每日统计表 """
+    return article_view_counter.persist_recent()
+
+
+@app.task
+def rescale_hot_articles():
+    """ 定时缩放热门排行分值并裁掉冷门文章 """
+    return hot_ranking.rescale()
+
+
+@app.task
+def update_related_articles():
+    """ 定时增量重算标签变化（及受其影响）的文章的相关文章 """
+    return related.compute_related()
+
+
+@app.task
+def fan_out_articles(article_ids):
+    """ 将新发布的文章推送到粉丝的关注动态收件箱 """
+    return home_feed.fan_out(article_ids)
+
 
-User = get_user_model()
+@app.task
+def sync_follow_feed(user_id, author_id, followed):
+    """ 关注时补入作者最近的文章，取消关注时移除 """
+    if followed:
+        home_feed.follow(user_id, author_id)
+    else:
+        home_feed.unfollow(user_id, author_id)
+
+
+@app.task
+def bump_article_cache_versions(article_id):
+    """ 更新文章相关作用域的缓存版本号（需要查询文章的作者和标签，不在请求中同步执行） """
+    Article.bump_cache_versions(article_id)
+
+
+@app.task
+def generate_cover_derivatives(article_id, name):
+    """ 为文章封面生成各尺寸的 JPEG / WebP 派生图，封面已被再次替换时跳过 """
+    if images.refresh_derivatives(Article.objects.filter(pk=article_id), 'cover_pic', 'cover_derivatives', name):
+        Article.bump_cache_versions(article_id)
+
+
+@app.task
+def update_search_index(article_id):
+    """ 增量更新文章的全文索引 """
+    search.index_article(article_id)
+
+
+@app.task
+def index_articles(article_ids):
+    """ 批量更新文章的全文索引（批量导入后使用） """
+    for article_id in article_ids:
+        search.index_article(article_id)
+
+
+@app.task
+def publish_article(article_id):
+    """ 定时发布（ETA 任务）：到达发布时间后切换为已发布状态，重复执行无副作用 """
+    return publishing.publish_due_articles(article_ids=[article_id])
 
 
 @app.task
-def record_reading_history(user_id, article_id):
-    """ 异步记录用户阅读历史 """
-    user = User.objects.get(id=user_id)
-    article = Article.objects.get(id=article_id)
-    ReadingHistory.objects.get_or_create(
-        user=user,
-        article=article,
-        defaults={'last_read_at': timezone.now()}
-    )
+def publish_due_articles():
+    """ 定时扫描兜底：发布所有已到期的定时文章（ETA 任务丢失或超出窗口时） """
+    return publishing.publish_due_articles()
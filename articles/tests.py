@@ -1,3 +1,1628 @@
-from django.test import TestCase
+import io
+import json
+import random
+import shutil
+import tempfile
+import time
+import zlib
+from unittest import mock
 
-# Create your tests here.
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection, models
+from django.db.migrations.exceptions import IrreversibleError
+from django.db.migrations.state import ModelState, ProjectState
+from django.test.utils import CaptureQueriesContext
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from articles import rendering, search, publishing, related, revisions
+from services import images
+from articles.bulk import import_articles
+from articles.buffers import reading_history_buffer
+from articles.feed import home_feed
+from articles.hot import hot_ranking
+from articles.models import Article, ArticleDailyStats, ArticleRevision, ReadingHistory, RelatedArticle, \
+    SearchPosting, Tag
+from articles.pageviews import article_view_counter
+from articles.slugs import article_slug_resolver
+from articles.suggest import tag_suggest_index
+from services.cache_utils import LocalLRUCache
+from services.fields import CompressedTextField, AlterToCompressedTextField
+from services.pagination import encode_cursor
+from social.buffers import like_buffer
+from services.testing import RedisAPITestCase
+
+User = get_user_model()
+
+
+class RenderMarkdownTests(SimpleTestCase):
+    """ 正文渲染：原始 HTML 转义、属性白名单和链接协议过滤 """
+
+    def test_raw_html_is_escaped(self):
+        html = rendering.render_markdown('<script>alert(1)</script>\n\n<b onclick="x">b</b>')
+        self.assertNotIn('<script', html)
+        self.assertNotIn('<b ', html)
+
+    def test_attr_list_is_disabled(self):
+        html = rendering.render_markdown('# title {: onclick="alert(1)" }\n\npara\n{: style="x" }')
+        self.assertNotRegex(html, r'<[^>]+(onclick|style)=')
+
+    def test_safe_links_are_kept(self):
+        html = rendering.render_markdown(
+            '[a](https://example.com/?a=1&b=2) [b](/articles/x/) [c](mailto:a@example.com) ![d](http://example.com/d.png)'
+        )
+        self.assertIn('href="https://example.com/?a=1&amp;b=2"', html)
+        self.assertIn('href="/articles/x/"', html)
+        self.assertIn('href="mailto:a@example.com"', html)
+        self.assertIn('src="http://example.com/d.png"', html)
+
+    def test_unsafe_schemes_are_removed(self):
+        sources = [
+            '[x](javascript:alert(1))',
+            '[x](JaVaScRiPt:alert(1))',
+            '[x]( javascript:alert(1))',
+            '[x](&#106;avascript:alert(1))',
+            '[x](&#x6A;avascript&colon;alert(1))',
+            '[x](&#0000106avascript:alert(1))',
+            '[x](java&#x09;script:alert(1))',
+            '[x](java&NewLine;script:alert(1))',
+            '[x](jav&#x0A;ascript:alert(1))',
+            '[x][1]\n\n[1]: &#106;avascript:alert(1)',
+            '[x](data:text/html;base64,PHNjcmlwdD4=)',
+            '[x](DaTa:text/html,<script>)',
+            '[x](&#100;ata:text/html,x)',
+            '![x](data:image/svg+xml,<svg onload=alert(1)>)',
+            '![x](Data&#x09;:image/svg+xml,x)',
+            '![x](&#x64;ata:image/svg+xml,x)',
+            '![x](vbscript:msgbox(1))',
+        ]
+        for source in sources:
+            with self.subTest(source=source):
+                html = rendering.render_markdown(source)
+                self.assertNotIn('href=', html)
+                self.assertNotIn('src=', html)
+
+    def test_url_scheme(self):
+        self.assertEqual(rendering.url_scheme('&#106;ava&#x09;script:x'), 'javascript')
+        self.assertEqual(rendering.url_scheme(' \x01HTTPS://example.com'), 'https')
+        self.assertEqual(rendering.url_scheme('/a:b'), '')
+        self.assertEqual(rendering.url_scheme('%6Aavascript:x'), '')
+
+
+class PruneTermsTests(SimpleTestCase):
+    """ 检索词项裁剪：单个词项和整个查询扫描的倒排记录数都有固定上限 """
+
+    @mock.patch.object(search, 'SEARCH_MAX_DOC_FREQ', 100)
+    @mock.patch.object(search, 'SEARCH_MAX_POSTINGS', 200)
+    def test_rarest_terms_within_budget(self):
+        kept = search.prune_terms({1: 90, 2: 10, 3: 100, 4: 101, 5: 50})
+        # 按文档频率从低到高：10 + 50 + 90 = 150，再加 100 超出总预算；101 超过单词项上限
+        self.assertEqual(kept, {2: 10, 5: 50, 1: 90})
+
+    @mock.patch.object(search, 'SEARCH_MAX_DOC_FREQ', 100)
+    @mock.patch.object(search, 'SEARCH_MAX_POSTINGS', 250)
+    def test_only_common_terms(self):
+        # 全部是高频词时只保留最稀有的一个，且只扫描上限条数
+        self.assertEqual(search.prune_terms({1: 10 ** 6, 2: 5000, 3: 10 ** 5}), {2: 100})
+
+    @mock.patch.object(search, 'SEARCH_MAX_DOC_FREQ', 100)
+    @mock.patch.object(search, 'SEARCH_MAX_POSTINGS', 250)
+    def test_cost_does_not_grow_with_query_terms(self):
+        doc_freqs = {term_id: 100 for term_id in range(search.MAX_QUERY_TERMS)}
+        self.assertLessEqual(sum(search.prune_terms(doc_freqs).values()), 250)
+
+
+class SearchArticlesTests(TestCase):
+    """ 全文检索：分词、BM25 排序和高频词查询 """
+
+    def setUp(self):
+        cache.delete(search.STATS_CACHE_KEY)
+        self.author = User.objects.create_user('author', 'author@example.com', 'pw123456')
+
+    def _article(self, title, content, **kwargs):
+        kwargs.setdefault('is_draft', False)
+        kwargs.setdefault('published_at', timezone.now())
+        article = Article.objects.create(title=title, content=content, author=self.author, **kwargs)
+        search.index_article(article.id)
+        return article
+
+    def _ids(self, query):
+        return [hit['article_id'] for hit in search.search_articles(query)]
+
+    def test_cjk_and_unicode_words(self):
+        cjk = self._article('数据库索引', '倒排索引的原理')
+        latin = self._article('Café notes', 'naïve résumé')
+        self.assertEqual(self._ids('索引'), [cjk.id])
+        self.assertEqual(self._ids('数'), [cjk.id])
+        self.assertEqual(self._ids('café'), [latin.id])
+        self.assertEqual(self._ids('CAFE'), [])
+
+    def test_drafts_are_not_returned(self):
+        self._article('draft python', 'python', is_draft=True)
+        published = self._article('python', 'python')
+        self.assertEqual(self._ids('python'), [published.id])
+
+    def test_title_and_rarer_terms_rank_higher(self):
+        body = self._article('notes', 'django ' * 3 + 'filler ' * 50)
+        title = self._article('django', 'filler ' * 50)
+        both = self._article('django orm', 'django orm')
+        self.assertEqual(self._ids('django orm'), [both.id, title.id, body.id])
+
+    def test_query_of_only_common_terms(self):
+        articles = [self._article(f'python {i}', 'python ' * (i + 1)) for i in range(5)]
+        with mock.patch.object(search, 'SEARCH_MAX_DOC_FREQ', 3), mock.patch.object(search, 'SEARCH_TOP_K', 2):
+            hits = search.search_articles('python')
+        # 只扫描影响力最高的 3 条倒排记录，返回其中得分最高的 2 篇
+        self.assertEqual([hit['article_id'] for hit in hits], [articles[4].id, articles[3].id])
+        self.assertGreater(hits[0]['score'], hits[1]['score'])
+
+    def test_common_term_is_pruned_when_rarer_term_exists(self):
+        for i in range(4):
+            self._article(f'python {i}', 'python')
+        rare = self._article('python asyncio', 'asyncio')
+        with mock.patch.object(search, 'SEARCH_MAX_DOC_FREQ', 3):
+            self.assertEqual(self._ids('python asyncio'), [rare.id])
+
+    def test_reindex_and_unindex(self):
+        article = self._article('golang', 'channels')
+        article.content = 'goroutines'
+        article.save()
+        search.index_article(article.id)
+        self.assertEqual(self._ids('channels'), [])
+        self.assertEqual(self._ids('goroutines'), [article.id])
+        search.unindex_article(article.id)
+        self.assertEqual(self._ids('goroutines'), [])
+
+
+class KeysetPaginationTests(RedisAPITestCase):
+    """ 公开列表的键集分页 """
+
+    def setUp(self):
+        super().setUp()
+        author = self.create_user('author')
+        now = timezone.now()
+        # 每三篇共用一个发布时间，翻页需要按 id 区分同值的文章
+        self.articles = [
+            self.create_article(author, f'page {i}', tags=['python'], published_at=now - timezone.timedelta(minutes=i // 3))
+            for i in range(25)
+        ]
+        self.expected = [a.id for a in sorted(self.articles, key=lambda a: (a.published_at, a.id), reverse=True)]
+
+    def _walk(self, url):
+        ids, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(item['id'] for item in response.data['results'])
+            url, pages = response.data['next'], pages + 1
+        return ids, pages
+
+    def test_walk_all_pages(self):
+        ids, pages = self._walk('/articles/?cursor=')
+        self.assertEqual(ids, self.expected)
+        self.assertEqual(pages, 3)
+
+    def test_tag_listing(self):
+        ids, _ = self._walk('/articles/tags/python/?cursor=')
+        self.assertEqual(ids, self.expected)
+
+    def test_previous_link(self):
+        first = self.client.get('/articles/?cursor=').data
+        self.assertIsNone(first['previous'])
+        second = self.client.get(first['next']).data
+        back = self.client.get(second['previous']).data
+        self.assertEqual([item['id'] for item in back['results']], self.expected[:10])
+
+    def test_ordering_by_counter(self):
+        for i, article in enumerate(self.articles):
+            Article.objects.filter(pk=article.pk).update(like_count=i % 4)
+        ids, _ = self._walk('/articles/?cursor=&ordering=-like_count')
+        expected = sorted(self.articles, key=lambda a: (self.articles.index(a) % 4, a.id), reverse=True)
+        self.assertEqual(ids, [a.id for a in expected])
+
+    def test_page_number_mode_is_kept(self):
+        response = self.client.get('/articles/?page=2')
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_forged_cursors(self):
+        valid = {'v': timezone.now().isoformat(), 'id': 1, 'o': '-published_at'}
+        cursors = [
+            'not-base64!',
+            encode_cursor([1, 2]),
+            encode_cursor({'v': 1}),
+            encode_cursor({**valid, 'id': '1'}),
+            encode_cursor({**valid, 'id': None}),
+            encode_cursor({**valid, 'v': 'not a date'}),
+            encode_cursor({**valid, 'v': None}),
+            encode_cursor({**valid, 'v': {'a': 1}}),
+            encode_cursor({**valid, 'o': '-like_count'}),
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get('/articles/', {'cursor': cursor}).status_code, 404)
+
+    def test_cursor_from_another_ordering(self):
+        cursor = self.client.get('/articles/?cursor=').data['next']
+        self.assertEqual(self.client.get(cursor + '&ordering=-like_count').status_code, 404)
+
+
+class HotQueryPlanTests(TestCase):
+    """ 热点查询的执行计划回归检查 """
+
+    def test_hot_queries_use_indexes(self):
+        out = io.StringIO()
+        call_command('explain_hot_queries', stdout=out)
+        self.assertIn("所有热点查询均命中索引", out.getvalue())
+
+    def test_full_scan_is_detected(self):
+        from articles.management.commands.explain_hot_queries import FULL_SCAN_PATTERNS
+
+        if connection.vendor != 'sqlite':
+            self.skipTest("只在 SQLite 上检查（其他数据库的规划器在空表上的选择不稳定）")
+        plan = Article.objects.filter(reading_time=3).order_by('word_count').explain()
+        self.assertEqual(FULL_SCAN_PATTERNS['sqlite'].findall(plan), ['tb_article'])
+
+
+class ArticleSearchViewTests(RedisAPITestCase):
+    """ 搜索接口：索引随文章保存、撤回和删除增量更新 """
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.login(self.create_user('author'))
+
+    def _titles(self, query):
+        response = self.client.get('/articles/search/', {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [item['title'] for item in response.data['results']]
+
+    def test_index_follows_article_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/articles/my/', {'title': '倒排索引', 'content': 'BM25 scoring', 'is_draft': False, 'tags': ['search']},
+                format='json',
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self._titles('bm25'), ['倒排索引'])
+        self.assertEqual(self._titles('索引'), ['倒排索引'])
+
+        article = Article.objects.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            article.is_draft = True
+            article.save()
+        self.assertEqual(self._titles('bm25'), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            article.is_draft = False
+            article.content = 'tf-idf'
+            article.save()
+        self.assertEqual(self._titles('bm25'), [])
+        self.assertEqual(self._titles('idf'), ['倒排索引'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            article.delete()
+        self.assertEqual(self._titles('idf'), [])
+        self.assertFalse(SearchPosting.objects.exists())
+
+    def test_scheduled_articles_are_hidden(self):
+        self.create_article(self.author, 'future', 'kotlin', published_at=timezone.now() + timezone.timedelta(days=1))
+        self.create_article(self.author, 'present', 'kotlin')
+        self.assertEqual(self._titles('kotlin'), ['present'])
+
+    def test_empty_query(self):
+        self.create_article(self.author, 'anything')
+        self.assertEqual(self._titles(''), [])
+        self.assertEqual(self._titles('the of'), [])
+
+
+class ResponseCacheTests(RedisAPITestCase):
+    """ 匿名公开接口的版本化响应缓存 """
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.article = self.create_article(self.author, 'cached', tags=['django'])
+        self.reader = self.create_user('reader')
+
+    def test_anonymous_response_is_cached(self):
+        self.client.get('/articles/cached/')
+        self.client.get('/articles/')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/articles/cached/').data['title'], 'cached')
+            self.assertEqual(self.client.get('/articles/').data['results'][0]['title'], 'cached')
+
+    def test_edit_invalidates_scopes(self):
+        for url in ('/articles/cached/', '/articles/', '/articles/tags/django/', f'/articles/?user_id={self.author.id}'):
+            self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.title = 'renamed'
+            self.article.save()
+        self.assertEqual(self.client.get('/articles/cached/').data['title'], 'renamed')
+        for url in ('/articles/', '/articles/tags/django/', f'/articles/?user_id={self.author.id}'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).data['results'][0]['title'], 'renamed')
+
+    def test_new_tag_invalidates_tag_list(self):
+        self.assertEqual([tag['name'] for tag in self.client.get('/articles/tags/').data['results']], ['django'])
+        self.create_article(self.author, 'other', tags=['flask'])
+        names = [tag['name'] for tag in self.client.get('/articles/tags/').data['results']]
+        self.assertEqual(sorted(names), ['django', 'flask'])
+
+    @mock.patch('social.views.bump_article_cache_versions.delay')
+    def test_toggle_is_visible_without_waiting_for_tasks(self, delay):
+        """ 异步任务尚未执行（broker 延迟、写回尚未落库）时点赞数也要立即可见 """
+        for write_behind in (False, True):
+            with self.subTest(write_behind=write_behind), override_settings(SOCIAL_WRITE_BEHIND=write_behind):
+                self.client.force_authenticate(None)
+                self.assertEqual(self.client.get('/articles/cached/').data['like_count'], 0)
+                self.assertEqual(self.client.get('/articles/').data['results'][0]['like_count'], 0)
+
+                self.client.force_authenticate(self.reader)
+                self.client.post('/social/like/cached/')
+                self.client.force_authenticate(None)
+                self.assertEqual(self.client.get('/articles/cached/').data['like_count'], 1)
+                self.assertEqual(self.client.get('/articles/').data['results'][0]['like_count'], 1)
+
+                self.client.force_authenticate(self.reader)
+                self.client.post('/social/like/cached/')
+                like_buffer.flush()
+
+    def test_comment_invalidates_detail(self):
+        self.client.get('/articles/cached/')
+        self.login(self.reader)
+        self.client.post('/social/comment/cached/create/', {'content': 'hi'}, format='json')
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get('/articles/cached/').data['comment_count'], 1)
+
+    def test_authenticated_responses_are_not_cached(self):
+        self.login(self.reader)
+        self.client.get('/articles/cached/')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/articles/cached/')
+        self.assertGreater(len(queries), 0)
+
+
+class ScheduledPublishingTests(RedisAPITestCase):
+    """ 物化的发布状态与定时发布 """
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.now = timezone.now()
+
+    def _scheduled(self, title, minutes=10, **kwargs):
+        return self.create_article(
+            self.author, title, tags=['later'], published_at=self.now + timezone.timedelta(minutes=minutes), **kwargs
+        )
+
+    def test_status_is_derived_on_save(self):
+        self.assertEqual(self.create_article(self.author, 'draft', is_draft=True).status, Article.Status.DRAFT)
+        self.assertEqual(self.create_article(self.author, 'now').status, Article.Status.PUBLISHED)
+        # ETA 任务在测试中立即执行，未到发布时间时不会提前发布
+        self.assertEqual(self._scheduled('later').status, Article.Status.SCHEDULED)
+        self.assertEqual(Article.objects.get(title='later').status, Article.Status.SCHEDULED)
+
+    def test_scheduled_article_is_hidden_until_due(self):
+        article = self._scheduled('later')
+        self.assertEqual(self.client.get('/articles/later/').status_code, 404)
+        self.assertEqual(self.client.get('/articles/').data['results'], [])
+        self.assertEqual(Tag.objects.get(name='later').published_article_count, 0)
+
+        received = []
+        publishing.article_published.connect(lambda sender, article_ids, **kwargs: received.append(article_ids),
+                                             weak=False, dispatch_uid='test-received')
+        self.addCleanup(publishing.article_published.disconnect, dispatch_uid='test-received')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(publishing.publish_due_articles(now=self.now + timezone.timedelta(minutes=11)), [article.id])
+        self.assertEqual(received, [[article.id]])
+
+        self.assertEqual(self.client.get('/articles/later/').status_code, 200)
+        self.assertEqual([item['title'] for item in self.client.get('/articles/').data['results']], ['later'])
+        self.assertEqual(Tag.objects.get(name='later').published_article_count, 1)
+
+        # 重复执行（ETA 任务与定时扫描都触发）不会再次发布
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(publishing.publish_due_articles(now=self.now + timezone.timedelta(minutes=12)), [])
+        self.assertEqual(received, [[article.id]])
+
+    def test_publish_only_requested_articles(self):
+        first, second = self._scheduled('first', 1), self._scheduled('second', 2)
+        due = self.now + timezone.timedelta(minutes=5)
+        self.assertEqual(publishing.publish_due_articles(article_ids=[second.id], now=due), [second.id])
+        first.refresh_from_db()
+        self.assertEqual(first.status, Article.Status.SCHEDULED)
+
+    def test_unpublish_updates_tag_counts(self):
+        article = self.create_article(self.author, 'live', tags=['now'])
+        self.assertEqual(Tag.objects.get(name='now').published_article_count, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            article.is_draft = True
+            article.save()
+        self.assertEqual(Tag.objects.get(name='now').published_article_count, 0)
+        self.assertEqual(self.client.get('/articles/live/').status_code, 404)
+
+    def test_sync_article_status_backfill(self):
+        published = self.create_article(self.author, 'published')
+        scheduled = self._scheduled('scheduled')
+        draft = self.create_article(self.author, 'draft', is_draft=True)
+        # 模拟上线状态字段前的数据：状态全部为默认值
+        Article.objects.update(status=Article.Status.DRAFT)
+
+        received = []
+        publishing.article_published.connect(lambda sender, article_ids, **kwargs: received.append(article_ids),
+                                             weak=False, dispatch_uid='test-received')
+        self.addCleanup(publishing.article_published.disconnect, dispatch_uid='test-received')
+        call_command('sync_article_status', stdout=io.StringIO())
+
+        statuses = dict(Article.objects.values_list('id', 'status'))
+        self.assertEqual(statuses, {
+            published.id: Article.Status.PUBLISHED,
+            scheduled.id: Article.Status.SCHEDULED,
+            draft.id: Article.Status.DRAFT,
+        })
+        # 回填不是新发布：不发送发布信号
+        self.assertEqual(received, [])
+
+
+class TagCloudTests(RedisAPITestCase):
+    """ 标签云与物化的已发布文章数 """
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.create_article(self.author, 'a1', tags=['python', 'django'])
+        self.create_article(self.author, 'a2', tags=['python'])
+        self.create_article(self.author, 'a3', tags=['python', 'redis'], is_draft=True)
+
+    def _cloud(self, query=''):
+        response = self.client.get(f'/articles/tags/cloud/{query}')
+        self.assertEqual(response.status_code, 200)
+        return [(item['name'], item['count']) for item in response.data]
+
+    def test_cloud_orders_by_published_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self._cloud(), [('python', 2), ('django', 1)])
+        self.assertEqual(len(queries), 1)
+
+    def test_cloud_parameters(self):
+        self.assertEqual(self._cloud('?top=1'), [('python', 2)])
+        self.assertEqual(self._cloud('?min_count=0'), [('python', 2), ('django', 1), ('redis', 0)])
+        self.assertEqual(self.client.get('/articles/tags/cloud/?top=0').status_code, 400)
+
+    def test_counts_follow_tag_changes(self):
+        article = Article.objects.get(title='a2')
+        self._cloud()  # 写入响应缓存
+        with self.captureOnCommitCallbacks(execute=True):
+            article.tags.add(Tag.objects.get(name='redis'))
+        self.assertEqual(self._cloud(), [('python', 2), ('django', 1), ('redis', 1)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            article.tags.remove(Tag.objects.get(name='python'))
+        self.assertEqual(self._cloud(), [('django', 1), ('python', 1), ('redis', 1)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            article.tags.clear()
+        self.assertEqual(self._cloud(), [('django', 1), ('python', 1)])
+
+    def test_counts_follow_reverse_tag_changes(self):
+        python = Tag.objects.get(name='python')
+        with self.captureOnCommitCallbacks(execute=True):
+            python.articles.clear()
+        self.assertEqual(Tag.objects.get(name='python').published_article_count, 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            python.articles.add(*Article.objects.all())
+        self.assertEqual(Tag.objects.get(name='python').published_article_count, 2)
+
+    def test_counts_follow_status_changes(self):
+        draft = Article.objects.get(title='a3')
+        with self.captureOnCommitCallbacks(execute=True):
+            draft.is_draft = False
+            draft.save()
+        self.assertEqual(self._cloud(), [('python', 3), ('django', 1), ('redis', 1)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Article.objects.get(title='a1').delete()
+        self.assertEqual(self._cloud(), [('python', 2), ('redis', 1)])
+
+    def test_tag_list_reads_materialized_count(self):
+        response = self.client.get('/articles/tags/')
+        counts = {item['name']: item['article_count'] for item in response.data['results']}
+        self.assertEqual(counts, {'python': 2, 'django': 1, 'redis': 0})
+
+
+class ReadingHistoryBufferTests(RedisAPITestCase):
+    """ 阅读历史：读路径只追加 Redis 事件，定时任务去重后批量落库 """
+
+    def setUp(self):
+        super().setUp()
+        author = self.create_user('author')
+        self.first = self.create_article(author, 'first')
+        self.second = self.create_article(author, 'second')
+        self.reader = self.login(self.create_user('reader'))
+
+    def _history(self):
+        return list(
+            ReadingHistory.objects.filter(user=self.reader).order_by('-last_read_at')
+            .values_list('article_id', 'last_read_at')
+        )
+
+    def test_detail_records_without_writing(self):
+        self.client.get('/articles/first/')
+        self.client.get('/articles/first/')
+        self.assertFalse(ReadingHistory.objects.exists())
+
+        self.client.force_authenticate(None)
+        self.client.get('/articles/second/')  # 匿名访问不记录
+
+        self.assertEqual(reading_history_buffer.flush(), 1)
+        self.assertEqual([article_id for article_id, _ in self._history()], [self.first.id])
+
+    def test_flush_keeps_latest_read(self):
+        reading_history_buffer.record(self.reader.id, self.first.id, ts=1000)
+        reading_history_buffer.record(self.reader.id, self.second.id, ts=1500)
+        reading_history_buffer.record(self.reader.id, self.first.id, ts=2000)
+        reading_history_buffer.record(self.reader.id, self.first.id, ts=1200)
+        self.assertEqual(reading_history_buffer.flush(), 2)
+        self.assertEqual(
+            [(article_id, read_at.timestamp()) for article_id, read_at in self._history()],
+            [(self.first.id, 2000), (self.second.id, 1500)],
+        )
+
+        # 已有记录按唯一约束更新阅读时间
+        reading_history_buffer.record(self.reader.id, self.second.id, ts=3000)
+        self.assertEqual(reading_history_buffer.flush(), 1)
+        self.assertEqual(ReadingHistory.objects.count(), 2)
+        self.assertEqual(self._history()[0][0], self.second.id)
+
+        response = self.client.get('/articles/history/')
+        self.assertEqual([item['article']['title'] for item in response.data['results']], ['second', 'first'])
+
+    def test_flush_is_idempotent(self):
+        reading_history_buffer.record(self.reader.id, self.first.id, ts=1000)
+        self.assertEqual(reading_history_buffer.flush(), 1)
+        self.assertEqual(reading_history_buffer.flush(), 0)
+        self.assertEqual(ReadingHistory.objects.count(), 1)
+
+    def test_interrupted_flush_is_replayed(self):
+        reading_history_buffer.record(self.reader.id, self.first.id, ts=1000)
+        # 模拟上次落库在取出事件后中断，新事件留到下一次
+        self.assertTrue(reading_history_buffer._take_events())
+        reading_history_buffer.record(self.reader.id, self.second.id, ts=2000)
+
+        self.assertEqual(reading_history_buffer.flush(), 1)
+        self.assertEqual([article_id for article_id, _ in self._history()], [self.first.id])
+        self.assertEqual(reading_history_buffer.flush(), 1)
+        self.assertEqual(ReadingHistory.objects.count(), 2)
+
+    def test_deleted_article_is_skipped(self):
+        reading_history_buffer.record(self.reader.id, self.first.id, ts=1000)
+        reading_history_buffer.record(self.reader.id, self.second.id, ts=1000)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.second.delete()
+        self.assertEqual(reading_history_buffer.flush(), 1)
+        self.assertEqual([article_id for article_id, _ in self._history()], [self.first.id])
+
+
+class ConditionalRequestTests(RedisAPITestCase):
+    """ 基于缓存版本号的 ETag / Last-Modified 条件请求 """
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.article = self.create_article(self.author, 'etag')
+        self.reader = self.create_user('reader')
+
+    def test_anonymous_revalidation(self):
+        response = self.client.get('/articles/etag/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertNotIn('private', response['Cache-Control'])
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/articles/etag/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(self.client.get('/articles/etag/', HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        self.assertEqual(self.client.get('/articles/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.title = 'changed'
+            self.article.save()
+        response = self.client.get('/articles/etag/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_authenticated_validators_are_per_user(self):
+        anonymous = self.client.get('/articles/etag/')['ETag']
+        self.login(self.reader)
+        response = self.client.get('/articles/etag/')
+        self.assertIn('private', response['Cache-Control'])
+        self.assertNotEqual(response['ETag'], anonymous)
+        # 匿名响应的校验值不能用于登录用户
+        self.assertEqual(self.client.get('/articles/etag/', HTTP_IF_NONE_MATCH=anonymous).status_code, 200)
+
+        self.login(self.create_user('other'))
+        self.assertNotEqual(self.client.get('/articles/etag/')['ETag'], response['ETag'])
+
+    @mock.patch('social.views.bump_article_cache_versions.delay')
+    def test_own_toggle_invalidates_viewer_state(self, delay):
+        for write_behind in (False, True):
+            with self.subTest(write_behind=write_behind), override_settings(SOCIAL_WRITE_BEHIND=write_behind):
+                self.login(self.reader)
+                for url in ('/articles/etag/', '/articles/'):
+                    etag = self.client.get(url)['ETag']
+                    self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+                    self.client.post('/social/like/etag/')
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                    self.assertEqual(response.status_code, 200)
+                    if url == '/articles/etag/':
+                        self.assertTrue(response.data['is_liked'])
+                    else:
+                        self.assertEqual(response.data['results'][0]['like_count'], 1)
+                    self.client.post('/social/like/etag/')
+                like_buffer.flush()
+
+
+class ArticleRenderingTests(RedisAPITestCase):
+    """ 保存时预渲染正文 HTML、摘要、字数和阅读时长 """
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+
+    def test_rendered_on_save(self):
+        article = self.create_article(self.author, 'rendered', content='# Title\n\nSome **bold** words here.')
+        self.assertIn('<strong>bold</strong>', article.content_html)
+        self.assertEqual(article.excerpt, 'Title Some bold words here.')
+        self.assertEqual((article.word_count, article.reading_time), (5, 1))
+        self.assertEqual(article.content_hash, rendering.content_hash(article.content))
+
+    def test_reading_time_counts_cjk_and_words(self):
+        content = '中' * 800 + '\n\n' + 'word ' * 400
+        article = self.create_article(self.author, 'long', content=content)
+        self.assertEqual(article.word_count, 1200)
+        # 800 / 400 + 400 / 200 = 4 分钟
+        self.assertEqual(article.reading_time, 4)
+        self.assertEqual(len(article.excerpt), rendering.EXCERPT_LENGTH)
+
+    def test_unchanged_content_is_not_rerendered(self):
+        article = self.create_article(self.author, 'same', content='text')
+        with mock.patch('articles.rendering.render_content') as render_content, \
+                self.captureOnCommitCallbacks(execute=True):
+            article.title = 'renamed'
+            article.save()
+        render_content.assert_not_called()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            article.content = 'new *text*'
+            article.save()
+        self.assertIn('<em>text</em>', Article.objects.get(pk=article.pk).content_html)
+
+    def test_detail_returns_html_and_list_defers_body(self):
+        self.create_article(self.author, 'body', content='hello *world*')
+        detail = self.client.get('/articles/body/').data
+        self.assertIn('<em>world</em>', detail['content_html'])
+        self.assertNotIn('content', detail)
+
+        with CaptureQueriesContext(connection) as queries:
+            result = self.client.get('/articles/').data['results'][0]
+        self.assertEqual(result['excerpt'], 'hello world')
+        self.assertNotIn('content', result)
+        self.assertNotIn('content_html', result)
+        article_queries = [query['sql'] for query in queries if 'FROM "tb_article"' in query['sql']]
+        self.assertTrue(article_queries)
+        for sql in article_queries:
+            self.assertNotRegex(sql, r'"tb_article"\."content(_html)?"')
+
+    def test_render_articles_backfill(self):
+        article = self.create_article(self.author, 'old', content='old *body*')
+        Article.objects.filter(pk=article.pk).update(content_html='', excerpt='', word_count=0, reading_time=0,
+                                                     content_hash='')
+        call_command('render_articles', stdout=io.StringIO())
+        article.refresh_from_db()
+        self.assertIn('<em>body</em>', article.content_html)
+        self.assertEqual((article.excerpt, article.word_count), ('old body', 2))
+
+
+@override_settings(TEXT_COMPRESS_THRESHOLD=64)
+class CompressedTextFieldTests(RedisAPITestCase):
+    """ 压缩文本字段：存储格式、旧数据兼容和回填 """
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.field = CompressedTextField()
+
+    @staticmethod
+    def _raw_content(article_id):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT content FROM tb_article WHERE id = %s', [article_id])
+            return cursor.fetchone()[0]
+
+    def test_encoding(self):
+        self.assertEqual(self.field.compress('short'), b'\xfeshort')
+        long_text = 'repeat ' * 100
+        stored = self.field.compress(long_text)
+        self.assertEqual(stored[:1], CompressedTextField.COMPRESSED)
+        self.assertLess(len(stored), len(long_text))
+        self.assertEqual(self.field.decompress(stored), long_text)
+        self.assertEqual(CompressedTextField(threshold=10_000).compress(long_text)[:1], CompressedTextField.PLAIN)
+
+    def test_incompressible_text_is_stored_plain(self):
+        text = 'x' * 100
+        with mock.patch('services.fields.zlib.compress', return_value=b'x' * 1000):
+            self.assertEqual(self.field.compress(text), CompressedTextField.PLAIN + text.encode())
+
+    def test_legacy_headerless_data(self):
+        # 由文本列直接转换、尚未回填的旧数据没有头部
+        self.assertEqual(self.field.decompress('旧的 \\ 正文'.encode()), '旧的 \\ 正文')
+        self.assertEqual(self.field.from_db_value('text', None, connection), 'text')
+        self.assertIsNone(self.field.from_db_value(None, None, connection))
+
+    def test_database_round_trip(self):
+        content = '# 标题\n\n' + '正文 with \\backslash\\ ' * 50
+        article = self.create_article(self.author, 'big', content=content)
+        self.assertEqual(bytes(self._raw_content(article.id))[:1], CompressedTextField.COMPRESSED)
+        self.assertEqual(Article.objects.get(pk=article.pk).content, content)
+
+        small = self.create_article(self.author, 'small', content='tiny')
+        self.assertEqual(bytes(self._raw_content(small.id)), b'\xfetiny')
+        self.assertEqual(Article.objects.get(pk=small.pk).content, 'tiny')
+
+    def test_compress_article_bodies_backfill(self):
+        content = 'legacy body ' * 20
+        article = self.create_article(self.author, 'legacy', content=content)
+        with connection.cursor() as cursor:
+            cursor.execute('UPDATE tb_article SET content = %s WHERE id = %s', [content.encode(), article.id])
+        self.assertEqual(Article.objects.get(pk=article.pk).content, content)
+
+        call_command('compress_article_bodies', batch_size=1, stdout=io.StringIO())
+        raw = bytes(self._raw_content(article.id))
+        self.assertEqual(raw[:1], CompressedTextField.COMPRESSED)
+        self.assertEqual(zlib.decompress(raw[1:]).decode(), content)
+        self.assertEqual(Article.objects.get(pk=article.pk).content, content)
+
+
+class AlterToCompressedTextFieldTests(TransactionTestCase):
+    """ 文本列改为压缩文本字段的迁移操作 """
+
+    def setUp(self):
+        self.from_state = ProjectState()
+        self.from_state.add_model(ModelState('articles', 'Note', [
+            ('id', models.AutoField(primary_key=True)),
+            ('body', models.TextField()),
+        ], options={'db_table': 'test_note'}))
+        self.to_state = self.from_state.clone()
+        self.operation = AlterToCompressedTextField('note', 'body', CompressedTextField())
+        self.operation.state_forwards('articles', self.to_state)
+
+    def test_postgresql_copies_utf8_bytes(self):
+        editor = mock.Mock()
+        editor.connection.vendor = 'postgresql'
+        editor.connection.alias = 'default'
+        editor.quote_name = lambda name: f'"{name}"'
+        self.operation.database_forwards('articles', editor, self.from_state, self.to_state)
+        self.assertEqual([call.args[0] for call in editor.execute.call_args_list], [
+            'ALTER TABLE "test_note" ADD COLUMN "body__bytea" bytea',
+            'UPDATE "test_note" SET "body__bytea" = convert_to("body", \'UTF8\')',
+            'ALTER TABLE "test_note" DROP COLUMN "body"',
+            'ALTER TABLE "test_note" RENAME COLUMN "body__bytea" TO "body"',
+            'ALTER TABLE "test_note" ALTER COLUMN "body" SET NOT NULL',
+        ])
+        with self.assertRaises(IrreversibleError):
+            self.operation.database_backwards('articles', editor, self.to_state, self.from_state)
+
+    def test_other_databases_use_alter_field(self):
+        with connection.schema_editor() as editor:
+            editor.create_model(self.from_state.apps.get_model('articles', 'Note'))
+        self.addCleanup(self._drop_table)
+        self.from_state.apps.get_model('articles', 'Note').objects.create(body='旧 \\x00 正文')
+
+        with connection.schema_editor() as editor:
+            self.operation.database_forwards('articles', editor, self.from_state, self.to_state)
+        note = self.to_state.apps.get_model('articles', 'Note')
+        self.assertEqual(note.objects.get().body, '旧 \\x00 正文')
+        note.objects.create(body='new ' * 100)
+        self.assertEqual(note.objects.order_by('id').last().body, 'new ' * 100)
+
+    def _drop_table(self):
+        with connection.schema_editor() as editor:
+            editor.delete_model(self.to_state.apps.get_model('articles', 'Note'))
+
+
+class ArticleImportExportTests(RedisAPITestCase):
+    """ NDJSON 批量导入/导出 """
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.login(self.create_user('author'))
+
+    def _import(self, rows):
+        lines = [row if isinstance(row, str) else json.dumps(row) for row in rows]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/articles/my/import/', '\n'.join(lines).encode(), content_type='application/x-ndjson'
+            )
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_import_reports_errors_per_line(self):
+        report = self._import([
+            {'title': 'ok', 'content': 'fine', 'is_draft': False},
+            '{not json',
+            '',
+            '[1, 2]',
+            {'content': 'no title'},
+            {'title': 'draft', 'content': 'later', 'is_draft': True, 'published_at': '2030-01-01T00:00:00Z'},
+        ])
+        self.assertEqual((report['created'], report['failed']), (1, 4))
+        self.assertEqual([error['line'] for error in report['errors']], [2, 4, 5, 6])
+        self.assertIn('title', report['errors'][2]['errors'])
+        self.assertEqual(list(Article.objects.values_list('title', flat=True)), ['ok'])
+
+    def test_imported_articles_get_save_side_effects(self):
+        future = (timezone.now() + timezone.timedelta(days=1)).isoformat()
+        self._import([
+            {'title': 'published', 'content': 'unique *words*', 'is_draft': False, 'tags': ['python', 'django']},
+            {'title': 'scheduled', 'content': 'later', 'is_draft': False, 'published_at': future, 'tags': ['python']},
+            {'title': 'draft', 'content': 'draft', 'tags': ['python']},
+        ])
+        published = Article.objects.get(title='published')
+        self.assertEqual(published.status, Article.Status.PUBLISHED)
+        self.assertIn('<em>words</em>', published.content_html)
+        self.assertEqual(Article.objects.get(title='scheduled').status, Article.Status.SCHEDULED)
+        self.assertEqual(Article.objects.get(title='draft').status, Article.Status.DRAFT)
+
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.article_count, 3)
+        self.assertEqual(dict(Tag.objects.values_list('name', 'published_article_count')), {'python': 1, 'django': 1})
+        self.assertEqual([item['title'] for item in self.client.get('/articles/').data['results']], ['published'])
+        self.assertEqual(
+            [item['title'] for item in self.client.get('/articles/search/?q=unique').data['results']], ['published']
+        )
+
+    def test_same_title_in_one_batch(self):
+        report = self._import([{'title': 'same', 'content': str(index), 'is_draft': False} for index in range(3)])
+        self.assertEqual(report['created'], 3)
+        self.assertEqual(len(set(Article.objects.values_list('slug', flat=True))), 3)
+
+    def test_import_in_batches(self):
+        lines = [json.dumps({'title': f'post {index}', 'content': 'x', 'tags': ['t']}).encode() for index in range(5)]
+        with self.captureOnCommitCallbacks(execute=True):
+            report = import_articles(lines, self.author, batch_size=2)
+        self.assertEqual(report, {'created': 5, 'failed': 0, 'errors': []})
+        self.assertEqual(Tag.objects.count(), 1)
+        self.assertEqual(Article.tags.through.objects.count(), 5)
+
+    def test_export_round_trip(self):
+        self.create_article(self.author, 'mine', content='中文 \\ body', tags=['python'])
+        self.create_article(self.author, 'draft', is_draft=True, published_at=None)
+        self.create_article(self.create_user('other'), 'theirs')
+
+        response = self.client.get('/articles/my/export/')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['title'] for row in rows], ['mine', 'draft'])
+        self.assertEqual((rows[0]['content'], rows[0]['tags'], rows[0]['author']), ('中文 \\ body', ['python'], 'author'))
+
+        # 导出的文件可以直接导入
+        self.login(self.create_user('copy'))
+        self.assertEqual(self._import(rows)['created'], 2)
+        copied = Article.objects.get(author__username='copy', title='mine')
+        self.assertEqual(copied.content, '中文 \\ body')
+        self.assertEqual(list(copied.tags.values_list('name', flat=True)), ['python'])
+
+    def test_export_command(self):
+        self.create_article(self.author, 'mine')
+        self.create_article(self.create_user('other'), 'theirs')
+        out = io.StringIO()
+        call_command('export_articles', author='author', stdout=out)
+        self.assertEqual([json.loads(line)['title'] for line in out.getvalue().splitlines()], ['mine'])
+
+
+class TagSuggestTests(RedisAPITestCase):
+    """ 标签前缀补全：Redis 有序集合，按已发布文章数降序 """
+
+    def setUp(self):
+        super().setUp()
+        author = self.create_user('author')
+        self.create_article(author, 'a1', tags=['Python', 'PyTorch'])
+        self.create_article(author, 'a2', tags=['Python', 'pytest'])
+        self.create_article(author, 'a3', tags=['PyTorch'])
+        self.create_article(author, 'a4', tags=['Python'])
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.create(name='Pyramid')
+
+    def _suggest(self, query, limit=None):
+        url = f'/articles/tags/suggest/?q={query}' + (f'&limit={limit}' if limit else '')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [(item['name'], item['count']) for item in response.data]
+
+    def test_prefix_ordered_by_count(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self._suggest('PY'), [('Python', 3), ('PyTorch', 2), ('pytest', 1), ('Pyramid', 0)]
+            )
+        self.assertEqual(self._suggest('pyt', limit=2), [('Python', 3), ('PyTorch', 2)])
+        self.assertEqual(self._suggest('pyth'), [('Python', 3)])
+        self.assertEqual(self._suggest('java'), [])
+        self.assertEqual(self.client.get('/articles/tags/suggest/').status_code, 400)
+
+    def test_query_longer_than_indexed_prefix(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.create(name='internationalization-a')
+            Tag.objects.create(name='internationalization-b')
+        self.assertEqual(self._suggest('Internationalization-B'), [('internationalization-b', 0)])
+        self.assertEqual(len(self._suggest('internationalizat')), 2)
+
+    def test_counts_follow_publishing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Article.objects.get(title='a1').delete()
+        self.assertEqual(self._suggest('py', limit=2), [('Python', 2), ('PyTorch', 1)])
+
+    def test_rename_and_delete(self):
+        tag = Tag.objects.get(name='PyTorch')
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.name = 'Torch'
+            tag.save()
+        self.assertNotIn('PyTorch', [name for name, _ in self._suggest('py')])
+        self.assertEqual(self._suggest('tor'), [('Torch', 2)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.delete()
+        self.assertEqual(self._suggest('tor'), [])
+
+    def test_rebuild_index(self):
+        tag_suggest_index.clear()
+        self.assertEqual(self._suggest('py'), [])
+        call_command('rebuild_tag_suggest_index', batch_size=2, stdout=io.StringIO())
+        self.assertEqual(self._suggest('py', limit=1), [('Python', 3)])
+
+
+@override_settings(SOCIAL_WRITE_BEHIND=False, HOT_HALF_LIFE_SECONDS=3600)
+class HotRankingTests(RedisAPITestCase):
+    """ 按时间指数衰减的热门文章排行 """
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.quiet = self.create_article(self.author, 'quiet')
+        self.busy = self.create_article(self.author, 'busy')
+
+    @staticmethod
+    def _score(article_id):
+        return hot_ranking.redis.zscore(hot_ranking.KEY, article_id)
+
+    def _hot(self, query=''):
+        return [item['title'] for item in self.client.get(f'/articles/hot/{query}').data]
+
+    def test_interactions_rank_articles(self):
+        self.assertAlmostEqual(self._score(self.busy.id), hot_ranking.WEIGHTS['publish'], places=3)
+        self.login(self.create_user('reader'))
+        self.client.post('/social/like/busy/')
+        self.client.post('/social/comment/busy/create/', {'content': 'hi'}, format='json')
+        self.assertEqual(self._hot(), ['busy', 'quiet'])
+        self.assertEqual(self._hot('?limit=1'), ['busy'])
+
+        # 取消点赞按相反数扣分
+        self.client.post('/social/like/busy/')
+        self.assertAlmostEqual(
+            self._score(self.busy.id), hot_ranking.WEIGHTS['publish'] + hot_ranking.WEIGHTS['comment'], places=3
+        )
+
+    def test_unpublished_and_deleted_articles_are_skipped(self):
+        hot_ranking.record(self.busy.id, 'like', 10)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.busy.is_draft = True
+            self.busy.save()
+        self.assertEqual(self._hot(), ['quiet'])
+
+        quiet_id = self.quiet.id
+        with self.captureOnCommitCallbacks(execute=True):
+            self.quiet.delete()
+        self.assertIsNone(self._score(quiet_id))
+        self.assertEqual(self._hot(), [])
+
+    def test_older_interactions_weigh_less(self):
+        now = time.time()
+        hot_ranking.record(self.quiet.id, 'like', at=now)
+        hot_ranking.record(self.busy.id, 'like', at=now - 3600)
+        self.assertAlmostEqual(
+            self._score(self.quiet.id) - self._score(self.busy.id), hot_ranking.WEIGHTS['like'] / 2, places=2
+        )
+        # 衰减后不足 MIN_SCORE 的加分直接忽略
+        before = self._score(self.busy.id)
+        hot_ranking.record(self.busy.id, 'like', at=now - 3600 * 20)
+        self.assertEqual(self._score(self.busy.id), before)
+
+    def test_rescale_keeps_order_and_trims(self):
+        hot_ranking.record(self.busy.id, 'like', 5)
+        later = time.time() + 3600
+        with mock.patch('articles.hot.time.time', return_value=later):
+            self.assertEqual(hot_ranking.rescale(), 2)
+        # epoch 挪后一个半衰期，分值整体减半
+        self.assertAlmostEqual(self._score(self.quiet.id), hot_ranking.WEIGHTS['publish'] / 2, places=2)
+        self.assertEqual(hot_ranking.top(10), [self.busy.id, self.quiet.id])
+
+        with mock.patch('articles.hot.time.time', return_value=later + 3600 * 4):
+            self.assertEqual(hot_ranking.rescale(), 1)
+        self.assertEqual(hot_ranking.top(10), [self.busy.id])
+
+        with mock.patch.object(hot_ranking, 'MAX_SIZE', 1):
+            hot_ranking.record(self.quiet.id, 'collect', 20)
+            self.assertEqual(hot_ranking.rescale(), 1)
+        self.assertEqual(hot_ranking.top(10), [self.quiet.id])
+
+
+class RelatedArticlesTests(RedisAPITestCase):
+    """ 基于标签 Jaccard 相似度的相关文章预计算 """
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        rng = random.Random(0)
+        names = [f'tag{index}' for index in range(8)]
+        for index in range(30):
+            self.create_article(self.author, f'post-{index}', tags=rng.sample(names, rng.randint(1, 4)))
+
+    @staticmethod
+    def _expected():
+        """ 暴力计算每篇已发布文章的前 K 个相关文章 """
+        tags = {}
+        for article_id, tag_id in Article.tags.through.objects.filter(
+            article__status=Article.Status.PUBLISHED
+        ).values_list('article_id', 'tag_id'):
+            tags.setdefault(article_id, set()).add(tag_id)
+        expected = {}
+        for article_id, own in tags.items():
+            scores = [
+                (len(own & other) / len(own | other), other_id)
+                for other_id, other in tags.items()
+                if other_id != article_id and own & other
+            ]
+            scores.sort(key=lambda item: (-item[0], -item[1]))
+            expected[article_id] = scores[:related.TOP_K]
+        return expected
+
+    def assertMatchesBruteForce(self):
+        actual = {}
+        for link in RelatedArticle.objects.order_by('article_id', 'rank'):
+            actual.setdefault(link.article_id, []).append((link.score, link.related_id))
+        expected = {article_id: rows for article_id, rows in self._expected().items() if rows}
+        self.assertEqual(actual.keys(), expected.keys())
+        for article_id, rows in expected.items():
+            self.assertEqual([related_id for _, related_id in actual[article_id]], [related_id for _, related_id in rows])
+            for (score, _), (expected_score, _) in zip(actual[article_id], rows):
+                self.assertAlmostEqual(score, expected_score, places=5)
+
+    def test_full_computation_matches_brute_force(self):
+        with mock.patch.object(related, 'BLOCK_SIZE', 7), mock.patch.object(related, 'QUERY_CHUNK_SIZE', 5):
+            call_command('rebuild_related_articles', stdout=io.StringIO())
+        self.assertMatchesBruteForce()
+
+    def test_incremental_matches_full(self):
+        related.compute_related(full=True)
+        first, second, third = Article.objects.order_by('id')[:3]
+        with self.captureOnCommitCallbacks(execute=True):
+            first.tags.set([Tag.objects.get(name='tag0'), Tag.objects.get(name='tag1')])
+            second.is_draft = True
+            second.save()
+            third.delete()
+        self.assertGreater(related.compute_related(), 0)
+        self.assertMatchesBruteForce()
+        self.assertFalse(RelatedArticle.objects.filter(article=second).exists())
+        self.assertFalse(RelatedArticle.objects.filter(related=second).exists())
+        # 脏集合已处理完
+        self.assertEqual(related.compute_related(), 0)
+
+    def test_related_endpoint(self):
+        article = Article.objects.order_by('id').first()
+        self.assertEqual(self.client.get(f'/articles/{article.slug}/related/').data, [])
+        related.compute_related(full=True)
+        titles = [item['title'] for item in self.client.get(f'/articles/{article.slug}/related/').data]
+        related_ids = [related_id for _, related_id in self._expected()[article.id]]
+        self.assertTrue(related_ids)
+        self.assertEqual(titles, [Article.objects.get(pk=related_id).title for related_id in related_ids])
+
+
+@override_settings(FEED_FANOUT_FOLLOWER_THRESHOLD=3)
+class HomeFeedTests(RedisAPITestCase):
+    """ 关注动态：普通作者写扩散到收件箱，大 V 读取时拉取，两路归并 """
+
+    def setUp(self):
+        super().setUp()
+        self.now = timezone.now()
+        self.writer = self.create_user('writer')
+        self.celebrity = self.create_user('celebrity')
+        self.stranger = self.create_user('stranger')
+        self.reader = self.login(self.create_user('reader'))
+        self.client.post(f'/social/follow/{self.writer.id}/')
+        self.client.post(f'/social/follow/{self.celebrity.id}/')
+        User.objects.filter(pk=self.celebrity.pk).update(follower_count=3)
+        for index in range(8):
+            self._publish(self.writer, f'w{index}', minutes=2 * index)
+            self._publish(self.celebrity, f'c{index}', minutes=2 * index + 1)
+        self._publish(self.stranger, 'unfollowed', minutes=0)
+
+    def _publish(self, author, title, minutes=None):
+        """ minutes 为空时按当前时间发布 """
+        published_at = timezone.now() if minutes is None else self.now - timezone.timedelta(minutes=minutes)
+        return self.create_article(author, title, published_at=published_at)
+
+    def _walk(self):
+        titles, url = [], '/articles/feed/'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            titles.extend(item['title'] for item in response.data['results'])
+            url = response.data['next']
+        return titles
+
+    @staticmethod
+    def _expected(*authors):
+        return list(
+            Article.objects.filter(author__in=authors, status=Article.Status.PUBLISHED)
+            .order_by('-published_at', '-id').values_list('title', flat=True)
+        )
+
+    def test_timeline_merges_pushed_and_pulled(self):
+        titles = self._walk()
+        self.assertEqual(len(titles), 16)
+        self.assertEqual(titles, self._expected(self.writer, self.celebrity))
+
+    def test_new_article_is_pushed_to_inbox(self):
+        self._walk()  # 首次读取时建立收件箱
+        article = self._publish(self.writer, 'fresh')
+        celebrity_article = self._publish(self.celebrity, 'loud')
+        inbox = home_feed._key(self.reader.id)
+        self.assertIsNotNone(home_feed.redis.zscore(inbox, article.id))
+        self.assertIsNone(home_feed.redis.zscore(inbox, celebrity_article.id))
+        self.assertEqual(self._walk()[:2], ['loud', 'fresh'])
+
+    def test_unpublished_articles_are_skipped(self):
+        self._walk()
+        with self.captureOnCommitCallbacks(execute=True):
+            for title in ('w0', 'c0', 'w1'):
+                article = Article.objects.get(title=title)
+                article.is_draft = True
+                article.published_at = None
+                article.save()
+        self.assertEqual(self._walk(), self._expected(self.writer, self.celebrity))
+
+    def test_follow_and_unfollow(self):
+        self._walk()
+        self.client.post(f'/social/follow/{self.stranger.id}/')
+        self.assertIn('unfollowed', self._walk())
+        self.client.post(f'/social/follow/{self.writer.id}/')
+        self.assertEqual(self._walk(), self._expected(self.celebrity, self.stranger))
+
+    def test_expired_inbox_is_rebuilt(self):
+        self._walk()
+        home_feed.redis.delete(home_feed._key(self.reader.id))
+        self.assertEqual(self._walk(), self._expected(self.writer, self.celebrity))
+
+        home_feed.redis.flushdb()
+        call_command('rebuild_home_feeds', stdout=io.StringIO())
+        self.assertTrue(home_feed.redis.exists(home_feed._key(self.reader.id)))
+
+    @override_settings(FEED_MAX_LENGTH=3)
+    def test_inbox_is_trimmed(self):
+        self._walk()
+        self._publish(self.writer, 'fresh')
+        pushed = home_feed.redis.zrevrange(home_feed._key(self.reader.id), 0, -1)
+        self.assertEqual(len(pushed), 3)
+        self.assertEqual(self._walk()[:3], ['fresh', 'w0', 'c0'])
+
+    def test_forged_cursor(self):
+        for payload in ({'v': 'x', 'id': 1}, {'v': 1, 'id': '1'}, {'v': 10 ** 30, 'id': 1}, {'v': 1.5, 'id': 1}):
+            with self.subTest(payload=payload):
+                response = self.client.get('/articles/feed/', {'cursor': encode_cursor(payload)})
+                self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.client.get('/articles/feed/', {'cursor': 'not-base64!'}).status_code, 404)
+
+
+class ArticleViewCounterTests(RedisAPITestCase):
+    """ 浏览量（Redis 计数）与独立读者数（HyperLogLog 估算） """
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.article = self.create_article(self.author, 'viewed')
+
+    def test_detail_counts_views_and_readers(self):
+        self.client.get('/articles/viewed/', REMOTE_ADDR='10.0.0.1')
+        self.client.get('/articles/viewed/', REMOTE_ADDR='10.0.0.1')  # 命中响应缓存也计数
+        self.client.get('/articles/viewed/', REMOTE_ADDR='10.0.0.2')
+        self.login(self.create_user('reader'))
+        response = self.client.get('/articles/viewed/')
+        self.assertEqual((response.data['view_count'], response.data['unique_readers']), (4, 3))
+
+        self.client.force_authenticate(None)
+        response = self.client.get('/articles/viewed/', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual((response.data['view_count'], response.data['unique_readers']), (5, 3))
+        result = self.client.get('/articles/').data['results'][0]
+        self.assertEqual((result['view_count'], result['unique_readers']), (5, 3))
+
+    def test_not_modified_is_not_counted(self):
+        etag = self.client.get('/articles/viewed/')['ETag']
+        self.assertEqual(self.client.get('/articles/viewed/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(article_view_counter.counts([self.article.id]), {self.article.id: (1, 1)})
+
+    def test_raw_ip_is_not_stored(self):
+        request = mock.Mock(META={'REMOTE_ADDR': '192.168.1.20'})
+        request.user.is_authenticated = False
+        viewer = article_view_counter.viewer_id(request)
+        self.assertNotIn('192.168.1.20', viewer)
+        self.assertEqual(viewer, article_view_counter.viewer_id(request))
+
+    def test_unique_readers_estimate(self):
+        for index in range(2000):
+            article_view_counter.record(self.article.id, f'u{index}')
+            if index % 2:
+                article_view_counter.record(self.article.id, f'u{index}')
+        views, readers = article_view_counter.counts([self.article.id])[self.article.id]
+        self.assertEqual(views, 3000)
+        self.assertAlmostEqual(readers, 2000, delta=2000 * 0.03)
+
+    def test_persist_daily_stats(self):
+        other = self.create_article(self.author, 'other')
+        for viewer in ('a', 'b', 'a'):
+            article_view_counter.record(self.article.id, viewer)
+        article_view_counter.record(other.id, 'a')
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+
+        today = timezone.localdate()
+        self.assertEqual(article_view_counter.persist_recent(), 1)
+        stats = ArticleDailyStats.objects.get()
+        self.assertEqual((stats.article_id, stats.date, stats.views, stats.unique_readers), (self.article.id, today, 3, 2))
+
+        # 当天的累计值重复落库时覆盖
+        article_view_counter.record(self.article.id, 'c')
+        self.assertEqual(article_view_counter.persist(today), 1)
+        stats.refresh_from_db()
+        self.assertEqual((stats.views, stats.unique_readers), (4, 3))
+
+
+class ArticleSlugResolverTests(RedisAPITestCase):
+    """ slug → id 两级解析缓存 """
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.article = self.create_article(self.author, 'resolved')
+
+    def test_resolve_levels(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(article_slug_resolver.resolve('resolved'), self.article.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(article_slug_resolver.resolve('resolved'), self.article.id)
+            # 进程内条目失效后从 Redis 读取
+            article_slug_resolver.local.clear()
+            self.assertEqual(article_slug_resolver.resolve('resolved'), self.article.id)
+
+    def test_missing_slug_is_not_cached(self):
+        self.assertIsNone(article_slug_resolver.resolve('later'))
+        article = self.create_article(self.author, 'later')
+        self.assertEqual(article_slug_resolver.resolve('later'), article.id)
+
+    def test_delete_invalidates(self):
+        article_slug_resolver.resolve('resolved')
+        self.login(self.create_user('reader'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.delete()
+        self.assertIsNone(article_slug_resolver.resolve('resolved'))
+        self.assertEqual(self.client.post('/social/like/resolved/').status_code, 404)
+
+        # 同名的新文章复用 slug 时不会解析到已删除的文章
+        article = self.create_article(self.author, 'resolved')
+        self.assertEqual(article_slug_resolver.resolve(article.slug), article.id)
+
+    def test_slug_change_invalidates(self):
+        article_slug_resolver.resolve('resolved')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.slug = 'renamed'
+            self.article.save()
+        self.assertIsNone(article_slug_resolver.resolve('resolved'))
+        self.assertEqual(article_slug_resolver.resolve('renamed'), self.article.id)
+
+
+class LocalLRUCacheTests(SimpleTestCase):
+    """ 带过期时间的进程内 LRU 缓存 """
+
+    def test_eviction_and_expiry(self):
+        cache = LocalLRUCache(max_size=2, ttl=10)
+        with mock.patch('services.cache_utils.time.monotonic', return_value=100):
+            cache.set('a', 1)
+            cache.set('b', 2)
+            self.assertEqual(cache.get('a'), 1)  # a 变为最近使用
+            cache.set('c', 3)
+            self.assertIsNone(cache.get('b'))
+            self.assertEqual((cache.get('a'), cache.get('c')), (1, 3))
+        with mock.patch('services.cache_utils.time.monotonic', return_value=110):
+            self.assertEqual(cache.get('a', 'expired'), 'expired')
+
+
+class ApplyDeltaTests(SimpleTestCase):
+    """ 增量操作的应用与校验 """
+
+    def test_operations(self):
+        self.assertEqual(revisions.apply_delta('hello world', [{'retain': 6}, {'delete': 5}, {'insert': 'there'}]),
+                         'hello there')
+        self.assertEqual(revisions.apply_delta('abc', [{'insert': '>'}]), '>abc')
+        self.assertEqual(revisions.apply_delta('abc', []), 'abc')
+        self.assertEqual(revisions.apply_delta('abc', [{'delete': 3}]), '')
+
+    def test_lengths_are_unicode_characters(self):
+        self.assertEqual(revisions.apply_delta('中文😀正文', [{'retain': 3}, {'delete': 1}, {'insert': '的'}]), '中文😀的文')
+
+    def test_invalid_operations(self):
+        for ops in (
+            [{'retain': 4}],
+            [{'retain': 2}, {'delete': 2}],
+            [{'retain': 0}],
+            [{'delete': -1}],
+            [{'retain': True}],
+            [{'retain': 1.0}],
+            [{'insert': 1}],
+            [{'replace': 'x'}],
+            [{'retain': 1, 'insert': 'x'}],
+            ['insert'],
+        ):
+            with self.subTest(ops=ops), self.assertRaises(ValueError):
+                revisions.apply_delta('abc', ops)
+
+
+@override_settings(ARTICLE_REVISION_SNAPSHOT_INTERVAL=3)
+class ArticleRevisionTests(RedisAPITestCase):
+    """ 草稿自动保存（增量修订）、冲突检测和提交 """
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.login(self.create_user('author'))
+        self.article = self.create_article(self.author, 'draft', content='hello')
+
+    def _autosave(self, base, delta):
+        return self.client.post('/articles/my/draft/autosave/', {'base_revision': base, 'delta': delta}, format='json')
+
+    def _draft(self):
+        data = self.client.get('/articles/my/draft/draft/').data
+        return data['revision'], data['content']
+
+    def test_autosave_does_not_touch_article(self):
+        self.assertEqual(self._draft(), (0, 'hello'))
+        response = self._autosave(0, [{'retain': 5}, {'insert': ' world'}])
+        self.assertEqual((response.status_code, response.data['revision']), (201, 1))
+        response = self._autosave(1, [{'insert': '> '}])
+        self.assertEqual(response.data['revision'], 2)
+        self.assertEqual(self._draft(), (2, '> hello world'))
+
+        article = Article.objects.get(pk=self.article.pk)
+        self.assertEqual((article.content, article.updated_at), ('hello', self.article.updated_at))
+
+    def test_stale_base_revision_conflicts(self):
+        self._autosave(0, [{'insert': 'a'}])
+        self._autosave(1, [{'insert': 'b'}])
+        # 另一个窗口仍基于修订 1
+        response = self._autosave(1, [{'insert': 'c'}])
+        self.assertEqual((response.status_code, response.data['revision']), (409, 2))
+        self.assertEqual(self._autosave(5, [{'insert': 'c'}]).status_code, 409)
+        self.assertEqual(self._draft(), (2, 'bahello'))
+
+    def test_concurrent_autosave_conflicts(self):
+        self._autosave(0, [{'insert': 'a'}])
+        # 两个请求同时读到修订 1 为最新，后写入的一方触发唯一约束
+        with mock.patch('articles.revisions.head', side_effect=[0, 1]):
+            with self.assertRaises(revisions.RevisionConflict) as raised:
+                revisions.autosave(self.article, 0, [{'insert': 'b'}])
+        self.assertEqual(raised.exception.head, 1)
+        self.assertEqual(ArticleRevision.objects.count(), 1)
+
+    def test_invalid_delta(self):
+        response = self._autosave(0, [{'retain': 10}])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('delta', response.data)
+        self.assertFalse(ArticleRevision.objects.exists())
+
+    def test_snapshots_and_replay(self):
+        expected = ['hello']
+        for index in range(7):
+            self._autosave(index, [{'retain': len(expected[-1])}, {'insert': str(index)}])
+            expected.append(expected[-1] + str(index))
+        snapshots = ArticleRevision.objects.filter(is_snapshot=True).values_list('number', flat=True)
+        self.assertEqual(sorted(snapshots), [1, 4, 7])
+
+        cache.clear()
+        article = Article.objects.get(pk=self.article.pk)
+        for number, text in enumerate(expected):
+            with self.subTest(number=number):
+                self.assertEqual(revisions.text_at(article, number), text)
+
+    def test_commit(self):
+        self.assertEqual(self.client.post('/articles/my/draft/commit/').data['content'], 'hello')
+        for index in range(5):
+            self._autosave(index, [{'insert': '*'}])
+        response = self.client.post('/articles/my/draft/commit/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['content'], '*****hello')
+
+        article = Article.objects.get(pk=self.article.pk)
+        self.assertEqual(article.content, '*****hello')
+        # 提交经过 save()，渲染结果随正文更新
+        self.assertEqual(article.content_html, rendering.render_content('*****hello')['content_html'])
+        self.assertEqual(list(ArticleRevision.objects.values_list('number', 'is_snapshot')), [(5, True)])
+        cache.clear()
+        with self.assertRaises(ArticleRevision.DoesNotExist):
+            revisions.text_at(article, 4)
+
+        # 提交后继续基于最新修订编辑
+        self.assertEqual(self._autosave(5, [{'insert': '#'}]).data['revision'], 6)
+        self.assertEqual(self._draft(), (6, '#*****hello'))
+
+    def test_full_update_resets_revisions(self):
+        self._autosave(0, [{'insert': 'a'}])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.content = 'replaced'
+            self.article.save()
+        self.assertEqual(revisions.reset(self.article, self.article.content), 2)
+        self.assertEqual(self._autosave(1, [{'insert': 'b'}]).status_code, 409)
+        self.assertEqual(self._draft(), (2, 'replaced'))
+
+    def test_other_users_article(self):
+        self.login(self.create_user('other'))
+        self.assertEqual(self._autosave(0, [{'insert': 'x'}]).status_code, 404)
+        self.assertEqual(self.client.get('/articles/my/draft/draft/').status_code, 404)
+        self.assertEqual(self.client.post('/articles/my/draft/commit/').status_code, 404)
+
+
+def _image(size, fmt='PNG', color='navy'):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+class CoverDerivativeTests(RedisAPITestCase):
+    """ 封面上传后异步生成多尺寸 JPEG / WebP 派生图 """
+
+    def setUp(self):
+        super().setUp()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        self.enterContext(override_settings(STORAGES={
+            'default': {
+                'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                'OPTIONS': {'location': media, 'base_url': '/media/'},
+            },
+            'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+        }))
+        self.author = self.create_user('author')
+        self.article = self.create_article(self.author, 'covered')
+
+    def _set_cover(self, size, name='cover/pic.png'):
+        name = default_storage.save(name, ContentFile(_image(size)))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.cover_pic = name
+            self.article.save()
+        self.article.refresh_from_db()
+        return name
+
+    def test_derivatives_are_generated(self):
+        self._set_cover((1000, 500))
+        derivatives = self.article.cover_derivatives
+        self.assertEqual(set(derivatives), {'webp', 'jpeg'})
+        for fmt, pil_format in (('webp', 'WEBP'), ('jpeg', 'JPEG')):
+            self.assertEqual(set(derivatives[fmt]), {'64', '200', '800'})
+            with default_storage.open(derivatives[fmt]['800']) as f:
+                image = Image.open(f)
+                self.assertEqual((image.format, image.size), (pil_format, (800, 400)))
+
+        srcset = self.client.get('/articles/covered/').data['cover_srcset']
+        self.assertEqual(srcset['jpeg'], ', '.join(
+            f'/media/cover/derivatives/pic/{width}.jpg {width}w' for width in (64, 200, 800)
+        ))
+        self.assertEqual(self.client.get('/articles/').data['results'][0]['cover_srcset'], srcset)
+
+    def test_small_image_is_not_upscaled(self):
+        self._set_cover((150, 100))
+        self.assertEqual(set(self.article.cover_derivatives['jpeg']), {'64'})
+        tiny = self._set_cover((40, 40), name='cover/tiny.png')
+        self.assertEqual(set(self.article.cover_derivatives['jpeg']), {'40'})
+        self.assertTrue(self.article.cover_derivatives['jpeg']['40'].startswith(images.derivative_dir(tiny)))
+
+    def test_replaced_cover_cleans_up(self):
+        self._set_cover((1000, 500))
+        old = self.article.cover_derivatives
+        self._set_cover((300, 300), name='cover/other.png')
+        for paths in old.values():
+            for path in paths.values():
+                self.assertFalse(default_storage.exists(path))
+        self.assertEqual(set(self.article.cover_derivatives['webp']), {'64', '200'})
+
+        # 封面在任务执行前又被替换：过期的任务不写入
+        self.assertFalse(images.refresh_derivatives(
+            Article.objects.filter(pk=self.article.pk), 'cover_pic', 'cover_derivatives', 'cover/pic.png'
+        ))
+
+    def test_default_cover_has_no_derivatives(self):
+        self.assertEqual(self.article.cover_derivatives, {})
+        self.assertEqual(self.client.get('/articles/covered/').data['cover_srcset'], {})
+
+    def test_backfill_command(self):
+        name = default_storage.save('cover/old.png', ContentFile(_image((500, 500))))
+        Article.objects.filter(pk=self.article.pk).update(cover_pic=name)
+        call_command('generate_image_derivatives', stdout=io.StringIO())
+        self.article.refresh_from_db()
+        self.assertEqual(set(self.article.cover_derivatives['jpeg']), {'64', '200'})
+
+
+class SparseFieldsTests(RedisAPITestCase):
+    """ ?fields= 稀疏字段集：未请求的字段不序列化，也不产生连接和预取查询 """
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        for index in range(3):
+            self.create_article(self.author, f'post-{index}', tags=['python', 'django'])
+
+    def _get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data, [query['sql'] for query in queries]
+
+    def test_list_fields(self):
+        data, queries = self._get('/articles/?fields=id,title,url')
+        self.assertEqual(set(data['results'][0]), {'id', 'title', 'url'})
+        self.assertFalse(any('tb_custom_user' in sql or 'tb_tag' in sql for sql in queries))
+
+        data, queries = self._get('/articles/?fields=title,author')
+        self.assertEqual(set(data['results'][0]['author']), {'id', 'username', 'followers', 'avatar_srcset'})
+        self.assertTrue(any('tb_custom_user' in sql for sql in queries))
+        self.assertFalse(any('tb_tag' in sql for sql in queries))
+
+        data, queries = self._get('/articles/?fields=title,tags')
+        self.assertEqual([tag['name'] for tag in data['results'][0]['tags']], ['python', 'django'])
+        self.assertFalse(any('tb_custom_user' in sql for sql in queries))
+
+    def test_unrequested_counters_skip_redis(self):
+        with mock.patch('articles.views.article_view_counter.apply') as apply:
+            self._get('/articles/?fields=title')
+        apply.assert_not_called()
+        with mock.patch('articles.views.article_view_counter.apply') as apply:
+            self._get('/articles/?fields=title,view_count')
+        apply.assert_called_once()
+
+    def test_detail_fields(self):
+        data, _ = self._get('/articles/post-0/?fields=title,content_html')
+        self.assertEqual(set(data), {'title', 'content_html'})
+        # 响应中没有 id 时浏览量仍然计入
+        data, _ = self._get('/articles/post-0/?fields=view_count')
+        self.assertEqual(data, {'view_count': 2})
+
+    def test_other_views(self):
+        data, _ = self._get('/articles/tags/?fields=name')
+        self.assertEqual(data['results'], [{'name': 'python'}, {'name': 'django'}])
+        data, queries = self._get('/articles/tags/python/?fields=title')
+        self.assertEqual(len(data['results']), 3)
+        self.assertFalse(any('tb_custom_user' in sql for sql in queries))
+        self.login(self.author)
+        data, _ = self._get(f'/users/info/?user_id={self.author.id}&fields=username,followers')
+        self.assertEqual(data, {'username': 'author', 'followers': 0})
+
+    def test_unknown_fields_and_write_requests(self):
+        data, _ = self._get('/articles/?fields=nope')
+        self.assertEqual(data['results'][0], {})
+        self.login(self.author)
+        response = self.client.post(
+            '/articles/my/?fields=title', {'title': 'new', 'content': 'body', 'is_draft': True}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('content', response.data)
@@ -1,21 +1,38 @@
 from django.urls import path
 from .views import ArticleView, ArticleDetailView, TagListView, TagArticleView, ArticleListView, ArticleListDetailView, \
-    ReadingHistoryListView, ReadingHistoryDestroyView
+    ReadingHistoryListView, ReadingHistoryDestroyView, ArticleSearchView, TagCloudView, \
+    ArticleImportView, ArticleExportView, TagSuggestView, ArticleHotView, \
+    ArticleRelatedView, ArticleFeedView, ArticleDraftView, ArticleAutosaveView, ArticleCommitView, \
+    ArticleCoverUploadView, ArticleCoverUploadCompleteView
 
 urlpatterns = [
     # 公开列表和标签相关放前面，避免被 <slug> 抢占
     path('', ArticleListView.as_view(), name='article-list'),
+    path('search/', ArticleSearchView.as_view(), name='article-search'),
+    path('hot/', ArticleHotView.as_view(), name='article-hot'),
+    path('feed/', ArticleFeedView.as_view(), name='article-feed'),
     path('tags/', TagListView.as_view(), name='tag-list'),
+    path('tags/cloud/', TagCloudView.as_view(), name='tag-cloud'),
+    path('tags/suggest/', TagSuggestView.as_view(), name='tag-suggest'),
     path('tags/<slug:slug>/', TagArticleView.as_view(), name='tag-article'),
 
     # 个人文章（需要登录）
     path('my/', ArticleView.as_view(), name='my-article'),
+    path('my/import/', ArticleImportView.as_view(), name='my-article-import'),
+    path('my/export/', ArticleExportView.as_view(), name='my-article-export'),
     path('my/<slug:slug>/', ArticleDetailView.as_view(), name='my-article-detail'),
+    path('my/<slug:slug>/draft/', ArticleDraftView.as_view(), name='my-article-draft'),
+    path('my/<slug:slug>/autosave/', ArticleAutosaveView.as_view(), name='my-article-autosave'),
+    path('my/<slug:slug>/commit/', ArticleCommitView.as_view(), name='my-article-commit'),
+    path('my/<slug:slug>/cover/upload/', ArticleCoverUploadView.as_view(), name='my-article-cover-upload'),
+    path('my/<slug:slug>/cover/upload/complete/', ArticleCoverUploadCompleteView.as_view(),
+         name='my-article-cover-upload-complete'),
 
     # 阅读历史
     path('history/', ReadingHistoryListView.as_view(), name='article-history-list'),
     path('history/<int:history_id>/', ReadingHistoryDestroyView.as_view(), name='article-history-destroy'),
 
     # 公开详情（最后，以免与上面的前缀冲突）
+    path('<slug:slug>/related/', ArticleRelatedView.as_view(), name='article-related'),
     path('<slug:slug>/', ArticleListDetailView.as_view(), name='article-detail'),
 ]
@@ -1,18 +1,86 @@
 from django.contrib.auth import get_user_model
-from django.db.models import Count
-from django.utils import timezone
+from django.http import StreamingHttpResponse
 from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework.exceptions import NotFound
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from .models import Article, Tag, ReadingHistory
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
+from .models import Article, Tag, ReadingHistory, RelatedArticle
+from . import revisions
+from .buffers import reading_history_buffer
+from .bulk import import_articles, export_articles
+from .feed import home_feed, from_score
+from .hot import hot_ranking
+from .pageviews import article_view_counter
+from .search import search_articles
+from .slugs import article_slug_resolver
+from .suggest import tag_suggest_index
 from .serializers import ArticleSerializer, TagSerializer, ArticleListDetailSerializer, ArticleListSerializer, \
-    ReadingHistorySerializer
-from rest_framework import generics, filters
-from articles.tasks import record_reading_history
+    ReadingHistorySerializer, TagCloudSerializer, TagCloudQuerySerializer, TagSuggestionSerializer, \
+    TagSuggestQuerySerializer, HotArticleQuerySerializer, ArticleAutosaveSerializer, ArticleDraftSerializer
+from rest_framework import generics, filters, serializers, status
+from services.storage import direct_upload_service, UploadError, DirectUploadSerializer, \
+    DirectUploadCompleteSerializer
+from services.pagination import PageNumberOrCursorPagination, encode_cursor, decode_cursor
+from services.parsers import NDJSONParser
+from services.response_cache import VersionedResponseCacheMixin
+from services.serializers import field_requested
 from services.permissions import IsSelf, IsActiveAccount
+from social.buffers import apply_buffered_counts
 
 User = get_user_model()
 
 
+class ArticlePagination(PageNumberOrCursorPagination):
+    """ 公开文章列表分页，游标模式按 (published_at, id) 定位 """
+    cursor_ordering = '-published_at'
+
+
+class ReadingHistoryPagination(PageNumberOrCursorPagination):
+    """ 阅读历史分页，游标模式按 (last_read_at, id) 定位 """
+    cursor_ordering = '-last_read_at'
+
+
+def apply_live_counts(articles, request=None):
+    """
+    用 Redis 中的实时计数（点赞/收藏写回缓冲、浏览量）覆盖或填充文章对象上的计数；
+    传入 request 时跳过 ?fields 中未请求的计数
+    """
+    if field_requested(request, 'like_count', 'favorite_count'):
+        apply_buffered_counts(articles)
+    if field_requested(request, 'view_count', 'unique_readers'):
+        article_view_counter.apply(articles)
+
+
+def with_article_relations(queryset, request, prefix='', author='author', tags='tags'):
+    """
+    按 ?fields 连接作者表、预取标签：响应中不含作者卡片（author 字段）或标签列表（tags 字段）时
+    不产生对应的 JOIN 和预取查询；prefix 用于从其他模型经外键取文章的查询集
+    """
+    if author and field_requested(request, author):
+        queryset = queryset.select_related(f'{prefix}author')
+    if tags and field_requested(request, tags):
+        queryset = queryset.prefetch_related(f'{prefix}tags')
+    return queryset
+
+
+class BufferedCountsMixin:
+    """ 用 Redis 中的实时计数覆盖当前页文章的计数（见 apply_live_counts） """
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None:
+            apply_live_counts(page, self.request)
+        return page
+
+    def get_object(self):
+        obj = super().get_object()
+        apply_live_counts([obj], self.request)
+        return obj
+
+
 class ArticleView(generics.ListCreateAPIView):
     """ 用户文章列表视图 """
     serializer_class = ArticleSerializer
@@ -22,11 +90,9 @@ class ArticleView(generics.ListCreateAPIView):
     ordering = ['-published_at']  # 默认排序
 
     def get_queryset(self):
-        # 只返回当前用户的文章
-        return (
-            Article.objects.filter(author=self.request.user)
-            .select_related('author')
-            .prefetch_related('tags')
+        # 只返回当前用户的文章；ArticleSerializer 不输出作者，标签以 tag_list 输出
+        return with_article_relations(
+            Article.objects.filter(author=self.request.user), self.request, author=None, tags='tag_list'
         )
 
     def perform_create(self, serializer):
@@ -48,11 +114,177 @@ class ArticleDetailView(generics.RetrieveUpdateDestroyAPIView):
             .prefetch_related('tags')
         )
 
+    def perform_update(self, serializer):
+        instance = serializer.save()
+        # 正文被整体覆盖后，编辑器手中的修订号全部作废
+        if 'content' in serializer.validated_data:
+            revisions.reset(instance, instance.content)
+
+
+class ArticleCoverUploadView(generics.GenericAPIView):
+    """ 封面直传视图：签发对象存储的 POST 上传策略，图片不经过应用服务器 """
+    serializer_class = DirectUploadSerializer
+    lookup_field = 'slug'
+    permission_classes = [IsAuthenticated, IsActiveAccount]
+
+    def get_queryset(self):
+        return Article.objects.filter(author=self.request.user).only('id', 'slug', 'author')
+
+    @extend_schema(
+        responses={201: {'type': 'object', 'properties': {
+            'url': {'type': 'string'}, 'fields': {'type': 'object'}, 'key': {'type': 'string'},
+            'token': {'type': 'string'}, 'expires_in': {'type': 'integer'},
+        }}},
+        operation_id="articles_my_cover_upload"
+    )
+    def post(self, request, *args, **kwargs):
+        article = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            policy = direct_upload_service.presign(
+                'cover', serializer.validated_data['content_type'], request.user.id, article.id
+            )
+        except UploadError as e:
+            raise serializers.ValidationError({"detail": str(e)})
+        return Response(policy, status=status.HTTP_201_CREATED)
+
+
+class ArticleCoverUploadCompleteView(generics.GenericAPIView):
+    """ 封面直传完成回调：校验已上传的对象后替换封面，派生图由 celery 异步生成 """
+    serializer_class = DirectUploadCompleteSerializer
+    lookup_field = 'slug'
+    permission_classes = [IsAuthenticated, IsActiveAccount]
+
+    def get_queryset(self):
+        return Article.objects.filter(author=self.request.user).defer(*Article.LIST_DEFERRED_FIELDS)
+
+    @extend_schema(
+        responses={202: {'type': 'object', 'properties': {'cover_pic': {'type': 'string'}}}},
+        operation_id="articles_my_cover_upload_complete"
+    )
+    def post(self, request, *args, **kwargs):
+        article = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            key = direct_upload_service.complete(
+                serializer.validated_data['token'], 'cover', request.user.id, article.id
+            )
+        except UploadError as e:
+            raise serializers.ValidationError({"token": str(e)})
+        # 保存后由 article_saved 信号触发派生图生成和缓存失效
+        article.cover_pic = key
+        article.save(update_fields=['cover_pic', 'updated_at'])
+        return Response({"cover_pic": request.build_absolute_uri(article.cover_pic.url)}, status=status.HTTP_202_ACCEPTED)
+
+
+class ArticleDraftView(generics.GenericAPIView):
+    """ 草稿最新修订视图：返回编辑器继续编辑所需的修订号和全文 """
+    serializer_class = ArticleDraftSerializer
+    lookup_field = 'slug'
+    permission_classes = [IsAuthenticated, IsActiveAccount]
+
+    def get_queryset(self):
+        return Article.objects.filter(author=self.request.user)
+
+    def get(self, request, *args, **kwargs):
+        article = self.get_object()
+        number = revisions.head(article.id)
+        return Response(self.get_serializer({'revision': number, 'content': revisions.text_at(article, number)}).data)
+
+
+class ArticleAutosaveView(generics.GenericAPIView):
+    """ 草稿自动保存视图：提交相对某个修订号的增量，只追加修订记录，不写文章表 """
+    serializer_class = ArticleAutosaveSerializer
+    lookup_field = 'slug'
+    permission_classes = [IsAuthenticated, IsActiveAccount]
+
+    def get_queryset(self):
+        # 只需要文章 id；基于已保存正文（修订号 0）时才会加载正文
+        return Article.objects.filter(author=self.request.user).only('id', 'slug', 'author')
+
+    @extend_schema(
+        responses={201: {'type': 'object', 'properties': {'revision': {'type': 'integer'}}}},
+        operation_id="articles_my_autosave"
+    )
+    def post(self, request, *args, **kwargs):
+        article = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            number = revisions.autosave(
+                article, serializer.validated_data['base_revision'], serializer.validated_data['delta']
+            )
+        except revisions.RevisionConflict as e:
+            return Response(
+                {"detail": "草稿已在其他地方更新，请先获取最新修订", "revision": e.head},
+                status=status.HTTP_409_CONFLICT,
+            )
+        except ValueError as e:
+            raise serializers.ValidationError({"delta": str(e)})
+        return Response({"revision": number}, status=status.HTTP_201_CREATED)
+
+
+class ArticleCommitView(generics.GenericAPIView):
+    """ 草稿提交视图：将最新修订写回文章正文 """
+    serializer_class = ArticleSerializer
+    lookup_field = 'slug'
+    permission_classes = [IsAuthenticated, IsActiveAccount]
+
+    def get_queryset(self):
+        return Article.objects.filter(author=self.request.user).prefetch_related('tags')
+
+    def post(self, request, *args, **kwargs):
+        article = self.get_object()
+        revisions.commit(article)
+        return Response(self.get_serializer(article).data)
+
+
+class ArticleImportView(APIView):
+    """ 文章批量导入视图：请求体为 NDJSON（每行一篇文章），作者为当前用户 """
+    parser_classes = [NDJSONParser]
+    permission_classes = [IsAuthenticated, IsActiveAccount]
+
+    @extend_schema(
+        request={'application/x-ndjson': {'type': 'string', 'format': 'binary'}},
+        responses={200: {
+            'type': 'object',
+            'properties': {
+                'created': {'type': 'integer'},
+                'failed': {'type': 'integer'},
+                'errors': {'type': 'array', 'items': {'type': 'object'}},
+            },
+        }},
+        operation_id="articles_my_import"
+    )
+    def post(self, request):
+        # request.data 为请求体流，逐行读取，不会一次性载入内存
+        return Response(import_articles(request.data, request.user))
+
+
+class ArticleExportView(APIView):
+    """ 文章批量导出视图：以 NDJSON 流式返回当前用户的全部文章 """
+    permission_classes = [IsAuthenticated, IsActiveAccount]
+
+    @extend_schema(
+        responses={(200, 'application/x-ndjson'): {'type': 'string', 'format': 'binary'}},
+        operation_id="articles_my_export"
+    )
+    def get(self, request):
+        response = StreamingHttpResponse(
+            export_articles(Article.objects.filter(author=request.user)),
+            content_type='application/x-ndjson; charset=utf-8',
+        )
+        response['Content-Disposition'] = 'attachment; filename="articles.ndjson"'
+        return response
+
 
-class ArticleListView(generics.ListAPIView):
+class ArticleListView(VersionedResponseCacheMixin, BufferedCountsMixin, generics.ListAPIView):
     """文章列表视图（公开版本，可选 user_id 查询）"""
     serializer_class = ArticleListSerializer
     permission_classes = [AllowAny]
+    pagination_class = ArticlePagination
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['like_count', 'favorite_count', 'published_at']
     ordering = ['-published_at']
@@ -64,81 +296,289 @@ class ArticleListView(generics.ListAPIView):
                 type=int,
                 required=False,
                 description="指定作者ID，如果不填则返回所有文章"
-            )
+            ),
+            OpenApiParameter(
+                name="cursor",
+                type=str,
+                required=False,
+                description="游标分页：首页传空值，之后使用响应中的 next/previous 链接"
+            ),
         ],
         operation_id="articles_list"
     )
     def get_queryset(self):
         user_id = self.request.query_params.get("user_id")
-        qs = Article.objects.filter(
-            is_draft=False,
-            published_at__lte=timezone.now()
-        ).select_related('author').prefetch_related('tags')
+        qs = with_article_relations(
+            Article.objects.filter(status=Article.Status.PUBLISHED).defer(*Article.LIST_DEFERRED_FIELDS),
+            self.request,
+        )
 
         if user_id:
             qs = qs.filter(author_id=user_id)
+        return qs
+
+    def get_cache_scopes(self):
+        user_id = self.request.query_params.get("user_id")
+        return [f'author:{user_id}'] if user_id else ['articles']
+
+
+class ArticleSearchView(generics.ListAPIView):
+    """ 文章全文搜索视图（公开版本，按 BM25 相关度排序） """
+    serializer_class = ArticleListSerializer
+    permission_classes = [AllowAny]
 
-        qs = qs.annotate(
-            like_count=Count('likes', distinct=True),
-            favorite_count=Count('collected_items', distinct=True)
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name="q", type=str, required=True, description="搜索关键词，支持中英文")
+        ],
+        operation_id="articles_search"
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        return search_articles(self.request.query_params.get("q", "").strip())
+
+    def list(self, request, *args, **kwargs):
+        # 先对 (article_id, score) 分页，再按页批量取文章，保持相关度顺序
+        hits = self.paginate_queryset(self.get_queryset())
+        articles = with_article_relations(
+            Article.objects.filter(id__in=[hit['article_id'] for hit in hits]).defer(*Article.LIST_DEFERRED_FIELDS),
+            request,
+        ).in_bulk()
+        page = [articles[hit['article_id']] for hit in hits if hit['article_id'] in articles]
+        apply_live_counts(page, request)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class ArticleHotView(generics.ListAPIView):
+    """ 热门文章视图（公开版本）：按时间衰减后的互动热度排序 """
+    serializer_class = ArticleListSerializer
+    permission_classes = [AllowAny]
+    pagination_class = None
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name="limit", type=int, required=False, description="返回数量，默认 20，最多 50")
+        ],
+        operation_id="articles_hot"
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        params = HotArticleQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        # ZREVRANGE 取排名，再批量取文章，保持排名顺序；已撤回的文章跳过，不足 limit 篇时继续往后取
+        limit = params.validated_data['limit']
+        queryset = with_article_relations(
+            Article.objects.filter(status=Article.Status.PUBLISHED).defer(*Article.LIST_DEFERRED_FIELDS),
+            request,
         )
-        return qs
+        page, offset = [], 0
+        while len(page) < limit:
+            # 多取一些候选，通常一轮即可补足被跳过的文章
+            article_ids = hot_ranking.top(limit * 2, offset)
+            if not article_ids:
+                break
+            offset += len(article_ids)
+            articles = queryset.filter(id__in=article_ids).in_bulk()
+            page.extend(articles[article_id] for article_id in article_ids if article_id in articles)
+        page = page[:limit]
+        apply_live_counts(page, request)
+        return Response(self.get_serializer(page, many=True).data)
+
+
+class ArticleFeedView(generics.ListAPIView):
+    """ 关注动态视图：关注作者的已发布文章，按发布时间倒序，游标分页 """
+    serializer_class = ArticleListSerializer
+    pagination_class = None
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name="cursor", type=str, required=False, description="上一页响应中 next 链接携带的游标")
+        ],
+        operation_id="articles_feed"
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        cursor = request.query_params.get(self.cursor_query_param)
+        position = None
+        if cursor:
+            payload = decode_cursor(cursor)
+            # 分值和 id 都必须是整数，分值须能换算为发布时间，伪造的游标返回 404
+            if type(payload['v']) is not int or type(payload['id']) is not int:
+                raise NotFound("无效的游标")
+            try:
+                from_score(payload['v'])
+            except OverflowError:
+                raise NotFound("无效的游标")
+            position = (payload['v'], payload['id'])
+        articles, next_position = home_feed.timeline(
+            request.user.id, self.page_size, position,
+            queryset=with_article_relations(Article.objects.defer(*Article.LIST_DEFERRED_FIELDS), request),
+        )
+        apply_live_counts(articles, request)
+        next_link = None
+        if next_position is not None:
+            next_link = replace_query_param(
+                request.build_absolute_uri(),
+                self.cursor_query_param,
+                encode_cursor({'v': next_position[0], 'id': next_position[1]}),
+            )
+        return Response({'next': next_link, 'results': self.get_serializer(articles, many=True).data})
+
+
+class ArticleRelatedView(VersionedResponseCacheMixin, generics.ListAPIView):
+    """ 相关文章视图（公开版本）：读取预计算结果，按排名返回 """
+    serializer_class = ArticleListSerializer
+    permission_classes = [AllowAny]
+    pagination_class = None
+
+    def get_queryset(self):
+        # 一次按 (article_id, rank) 索引的查询，撤回的文章直接过滤掉
+        queryset = (
+            RelatedArticle.objects.filter(
+                article__slug=self.kwargs['slug'],
+                article__status=Article.Status.PUBLISHED,
+                related__status=Article.Status.PUBLISHED,
+            )
+            .select_related('related')
+            .defer(*[f'related__{field}' for field in Article.LIST_DEFERRED_FIELDS])
+            .order_by('rank')
+        )
+        return with_article_relations(queryset, self.request, prefix='related__')
 
+    def get_cache_scopes(self):
+        # 相关列表由定时任务更新 related:<slug>；文章标题、计数等变化随 articles 作用域失效
+        return [f"related:{self.kwargs['slug']}", 'articles']
 
-class ArticleListDetailView(generics.RetrieveAPIView):
+    def list(self, request, *args, **kwargs):
+        articles = [link.related for link in self.get_queryset()]
+        apply_live_counts(articles, request)
+        return Response(self.get_serializer(articles, many=True).data)
+
+
+class ArticleListDetailView(VersionedResponseCacheMixin, BufferedCountsMixin, generics.RetrieveAPIView):
     """ 文章详情页视图（公开版本） """
     serializer_class = ArticleListDetailSerializer
     permission_classes = [AllowAny]  # 允许任何人访问
     lookup_field = 'slug'
 
-    queryset = (
-        Article.objects.filter(
-            is_draft=False,
-            published_at__lte=timezone.now()
-        )
-        .select_related('author')
-        .prefetch_related('tags')
-        .annotate(
-            like_count=Count('likes', distinct=True),
-            favorite_count=Count('collected_items', distinct=True)
+    def get_queryset(self):
+        # 在请求时构造查询集，发布状态由定时任务物化，不再依赖进程启动时的 timezone.now()
+        return with_article_relations(
+            # 详情返回预渲染的 HTML，不需要 Markdown 原文
+            Article.objects.filter(status=Article.Status.PUBLISHED).defer('content'),
+            self.request,
         )
-    )
 
-    # 方案一：perform_retrieve方法，添加阅读记录模型
+    def get_cache_scopes(self):
+        return [f"article:{self.kwargs['slug']}"]
+
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        # 响应缓存命中时也计入热度和浏览量（304 没有响应体，不计入）
+        if response.status_code == 200:
+            # ?fields 中可能不含 id，此时从 slug 缓存中取
+            article_id = response.data.get('id') or article_slug_resolver.resolve(self.kwargs['slug'])
+            hot_ranking.record(article_id, 'read')
+            article_view_counter.record(article_id, article_view_counter.viewer_id(request))
+            # 缓存的响应体中浏览量是缓存时的值，这里换成实时值（只读 Redis）
+            view_count, unique_readers = article_view_counter.counts([article_id])[article_id]
+            if 'view_count' in response.data:
+                response.data['view_count'] = view_count
+            if 'unique_readers' in response.data:
+                response.data['unique_readers'] = unique_readers
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        # RetrieveAPIView.retrieve 不会调用 perform_retrieve，这里显式补上
+        instance = self.get_object()
+        self.perform_retrieve(instance)
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
+
     def perform_retrieve(self, instance):
+        # 只向 Redis 追加阅读事件，由定时任务去重后批量落库，读路径上不再写数据库
         if self.request.user.is_authenticated:
-            ReadingHistory.objects.update_or_create(
-                user=self.request.user,
-                article=instance,
-                defaults={'last_read_at': timezone.now()}
-            )
-
-    # # 方案二：perform_retrieve方法，使用 celery 异步任务添加阅读记录模型
-    # def perform_retrieve(self, instance):
-    #     if self.request.user.is_authenticated:
-    #         record_reading_history.delay(self.request.user.id, instance.id)
+            reading_history_buffer.record(self.request.user.id, instance.id)
 
 
-
-class TagListView(generics.ListAPIView):
+class TagListView(VersionedResponseCacheMixin, generics.ListAPIView):
     """ 标签列表视图（公开版本） """
     serializer_class = TagSerializer
     permission_classes = [AllowAny]  # 允许任何人访问
 
     def get_queryset(self):
         # 按需：只列出“至少有一篇已发布文章”的标签
+        # 文章数读取物化字段，无需预取文章
+        return Tag.objects.all().order_by('-name')
+
+    def get_cache_scopes(self):
+        return ['tags']
+
+
+class TagCloudView(VersionedResponseCacheMixin, generics.ListAPIView):
+    """ 标签云视图（公开版本）：按已发布文章数降序，单条查询返回 """
+    serializer_class = TagCloudSerializer
+    permission_classes = [AllowAny]
+    pagination_class = None
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name="top", type=int, required=False, description="返回的标签数量，默认 100，最多 500"),
+            OpenApiParameter(name="min_count", type=int, required=False, description="最少已发布文章数，默认 1"),
+        ],
+        operation_id="articles_tags_cloud"
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        params = TagCloudQuerySerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
         return (
-            Tag.objects.all()
-            .prefetch_related('articles')
-            .order_by('-name')
+            Tag.objects.filter(published_article_count__gte=params.validated_data['min_count'])
+            .order_by('-published_article_count', 'name')
+            .values('name', 'slug', 'published_article_count')[:params.validated_data['top']]
         )
 
+    def get_cache_scopes(self):
+        return ['tags']
+
+
+class TagSuggestView(APIView):
+    """ 标签补全视图（公开版本）：按前缀匹配标签名，已发布文章数多的在前 """
+    permission_classes = [AllowAny]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name="q", type=str, required=True, description="标签名前缀，忽略大小写"),
+            OpenApiParameter(name="limit", type=int, required=False, description="返回数量，默认 10，最多 50"),
+        ],
+        responses=TagSuggestionSerializer(many=True),
+        operation_id="articles_tags_suggest"
+    )
+    def get(self, request):
+        params = TagSuggestQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        # 直接读取 Redis 中的前缀索引，不查询数据库
+        suggestions = tag_suggest_index.suggest(params.validated_data['q'], params.validated_data['limit'])
+        return Response(TagSuggestionSerializer(suggestions, many=True).data)
+
 
-class TagArticleView(generics.ListAPIView):
+class TagArticleView(VersionedResponseCacheMixin, BufferedCountsMixin, generics.ListAPIView):
     """ 标签文章列表视图（公开版本） """
     serializer_class = ArticleListSerializer
     lookup_field = 'slug'
     permission_classes = [AllowAny]  # 允许任何人访问
+    pagination_class = ArticlePagination
 
     filter_backends = [filters.OrderingFilter]  # 启用排序
     ordering_fields = ['like_count', 'favorite_count', 'published_at']  # 可排序字段
@@ -146,23 +586,39 @@ class TagArticleView(generics.ListAPIView):
 
     def get_queryset(self):
         slug = self.kwargs['slug']
-        return (
+        return with_article_relations(
             Article.objects.filter(
                 tags__slug=slug,
-                is_draft=False,
-                published_at__lte=timezone.now()
+                status=Article.Status.PUBLISHED
             )
-            .select_related('author')
-            .prefetch_related('tags')
-            .distinct()
+            .defer(*Article.LIST_DEFERRED_FIELDS)
+            .distinct(),
+            self.request,
         )
 
+    def get_cache_scopes(self):
+        return [f"tag:{self.kwargs['slug']}"]
+
 
 class ReadingHistoryListView(generics.ListAPIView):
     serializer_class = ReadingHistorySerializer
+    pagination_class = ReadingHistoryPagination
 
     def get_queryset(self):
-        return ReadingHistory.objects.filter(user=self.request.user)
+        # 最近阅读在前，命中 (user, -last_read_at) 索引
+        return (
+            ReadingHistory.objects.filter(user=self.request.user)
+            .select_related('article__author')
+            .prefetch_related('article__tags')
+            .defer(*(f'article__{field}' for field in Article.LIST_DEFERRED_FIELDS))
+            .order_by('-last_read_at', '-id')
+        )
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None:
+            apply_live_counts([history.article for history in page])
+        return page
 
 
 class ReadingHistoryDestroyView(generics.DestroyAPIView):
@@ -25,4 +25,34 @@ app.conf.beat_schedule = {
         'task': 'users.tasks.clear_expired_tokens',  # 指向我们定义的任务
         'schedule': crontab(hour=11, minute=18),  # 使用 crontab 语法
     },
+    # 任务名：点赞/收藏写回缓冲批量落库（仅 SOCIAL_WRITE_BEHIND 开启时有数据）
+    'flush-social-toggle-buffers': {
+        'task': 'social.tasks.flush_toggle_buffers',
+        'schedule': 10.0,  # 每 10 秒
+    },
+    # 任务名：阅读历史缓冲去重后批量落库
+    'flush-reading-history': {
+        'task': 'articles.tasks.flush_reading_history',
+        'schedule': 10.0,  # 每 10 秒
+    },
+    # 任务名：文章每日浏览量、独立读者数落库
+    'persist-article-views': {
+        'task': 'articles.tasks.persist_article_views',
+        'schedule': crontab(minute='*/5'),  # 每 5 分钟
+    },
+    # 任务名：热门文章排行缩放分值、裁剪冷门文章
+    'rescale-hot-articles': {
+        'task': 'articles.tasks.rescale_hot_articles',
+        'schedule': crontab(minute=0),  # 每小时
+    },
+    # 任务名：增量重算相关文章（标签共现相似度）
+    'update-related-articles': {
+        'task': 'articles.tasks.update_related_articles',
+        'schedule': crontab(minute='*/10'),  # 每 10 分钟
+    },
+    # 任务名：发布已到期的定时文章（ETA 任务的兜底）
+    'publish-due-articles': {
+        'task': 'articles.tasks.publish_due_articles',
+        'schedule': crontab(),  # 每分钟
+    },
 }
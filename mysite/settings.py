@@ -257,6 +257,43 @@ CACHES = {
     },
 }
 
+# 匿名用户公开接口的响应缓存时间（版本号变更后旧缓存不再命中，到期自然淘汰）
+RESPONSE_CACHE_SECONDS = 60 * 10
+
+# 定时发布：发布时间在该窗口（秒）内的文章投递 celery ETA 任务，其余由每分钟的定时扫描兜底
+ARTICLE_PUBLISH_ETA_WINDOW = 60 * 60
+
+# 点赞/收藏写回缓冲：开启后切换操作只写 Redis，由 celery 定时任务批量落库
+SOCIAL_WRITE_BEHIND = False
+
+# 热门文章排行的半衰期（秒）：互动带来的热度每经过该时长减半
+HOT_HALF_LIFE_SECONDS = 60 * 60 * 24
+
+# 压缩文本字段（CompressedTextField）的压缩阈值（字节），小于该长度的内容不压缩
+TEXT_COMPRESS_THRESHOLD = 1024
+
+# 关注动态：粉丝数达到该值的作者发布文章时不写扩散，读取时再拉取
+FEED_FANOUT_FOLLOWER_THRESHOLD = 5000
+# 关注动态：每个用户收件箱保留的最近文章数
+FEED_MAX_LENGTH = 800
+# 收件箱闲置多久后过期（秒），过期后下次读取时从数据库重建
+FEED_INBOX_TTL = 60 * 60 * 24 * 7
+
+# 文章 slug → id 解析的进程内缓存：条目数上限和有效期（秒，其他进程删除文章后最长在该时间内失效）
+SLUG_RESOLVER_LOCAL_SIZE = 10000
+SLUG_RESOLVER_LOCAL_TTL = 30
+
+# 草稿自动保存：每隔多少个增量修订存一次全文快照（重建任意版本最多回放这么多个增量）
+ARTICLE_REVISION_SNAPSHOT_INTERVAL = 20
+
+# 头像处理：压缩后的最长边（像素，即最大展示分辨率）和目标体积上限（字节）
+AVATAR_MAX_SIZE = 800
+AVATAR_MAX_BYTES = 400 * 1024
+
+# 图片直传对象存储：上传策略有效期（秒）和文件体积上限（字节）
+DIRECT_UPLOAD_EXPIRE_SECONDS = 60 * 10
+DIRECT_UPLOAD_MAX_BYTES = 10 * 1024 * 1024
+
 # 验证码过期时间
 CAPTCHA_EXPIRE_SECONDS = 60 * 5
 DEFAULT_EXPIRE_SECONDS = 60 * 5
@@ -6,6 +6,9 @@ Author      : wzw
 Date Created: 2025/9/2
 Description : 为其他服务提供基础的缓存服务
 """
+import threading
+import time
+from collections import OrderedDict
 
 from django.conf import settings
 from django.core.cache import caches
@@ -39,3 +42,85 @@ class CacheVerifyService:
 
 
 cache_verify_service = CacheVerifyService()
+
+
+class CacheVersionService:
+    """
+    缓存版本号服务：每个作用域（单篇文章、标签、作者、全局列表等）维护一个版本号，
+    缓存键中带上版本号，数据变更时只需更新版本号，旧缓存无需扫描删除，到期自然淘汰
+    """
+    CACHE_NAME = 'default'
+    KEY_PREFIX = 'version'
+
+    def _key(self, scope):
+        return f'{self.KEY_PREFIX}:{scope}'
+
+    @staticmethod
+    def _new_version():
+        # 使用微秒时间戳，版本号被淘汰后重新生成也不会与旧值重复
+        return time.time_ns() // 1000
+
+    def get_versions(self, scopes):
+        """ 批量获取版本号，返回 {scope: version} """
+        cache = caches[self.CACHE_NAME]
+        keys = {self._key(scope): scope for scope in scopes}
+        found = cache.get_many(list(keys))
+        versions = {}
+        for key, scope in keys.items():
+            if key not in found:
+                version = self._new_version()
+                # add 不会覆盖并发请求已写入的版本号
+                if not cache.add(key, version, None):
+                    version = cache.get(key, version)
+                found[key] = version
+            versions[scope] = found[key]
+        return versions
+
+    def bump(self, *scopes):
+        """ 更新版本号，使相关作用域下的缓存全部失效 """
+        if scopes:
+            caches[self.CACHE_NAME].set_many({self._key(scope): self._new_version() for scope in scopes}, None)
+
+
+cache_version_service = CacheVersionService()
+
+
+class LocalLRUCache:
+    """
+    进程内 LRU 缓存，条目带过期时间。
+    其他进程无法主动失效本进程的条目，过期时间即为跨进程失效的最长延迟
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File Name   : fields.py
+Author      : wzw
+Date Created: 2026/10/17
+Description : 自定义模型字段
+"""
+import zlib
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.migrations.exceptions import IrreversibleError
+
+
+class CompressedTextField(models.TextField):
+    """
+    透明压缩的长文本字段：在 Python 侧表现为普通字符串，数据库中以二进制存储，
+    超过阈值的内容用 zlib 压缩。存储格式为 1 字节头 + 数据：
+    0xFF 表示 zlib 压缩，0xFE 表示未压缩的 UTF-8；两者都不是合法的 UTF-8 首字节，
+    因此由文本列直接转换过来、尚未回填的旧数据（无头）也能正确读取。
+    已有的文本列改为该字段时，迁移中用 AlterToCompressedTextField 替换 makemigrations 生成的 AlterField。
+    注意：二进制列不支持 icontains 等文本查找
+    """
+    COMPRESSED = b'\xff'
+    PLAIN = b'\xfe'
+
+    def __init__(self, *args, threshold=None, level=6, **kwargs):
+        # threshold 为 None 时读取 settings.TEXT_COMPRESS_THRESHOLD，便于按部署环境调整
+        self.threshold = threshold
+        self.level = level
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.threshold is not None:
+            kwargs['threshold'] = self.threshold
+        if self.level != 6:
+            kwargs['level'] = self.level
+        return name, path, args, kwargs
+
+    def get_internal_type(self):
+        # 使用二进制列类型（bytea / BLOB / longblob）
+        return 'BinaryField'
+
+    def compress(self, value):
+        """ 字符串 → 带头的存储格式，压缩后没有变小时按原文存储 """
+        data = value.encode()
+        threshold = settings.TEXT_COMPRESS_THRESHOLD if self.threshold is None else self.threshold
+        if len(data) >= threshold:
+            compressed = zlib.compress(data, self.level)
+            if len(compressed) < len(data):
+                return self.COMPRESSED + compressed
+        return self.PLAIN + data
+
+    def decompress(self, data):
+        """ 存储格式 → 字符串 """
+        header = data[:1]
+        if header == self.COMPRESSED:
+            return zlib.decompress(data[1:]).decode()
+        if header == self.PLAIN:
+            return data[1:].decode()
+        return data.decode()
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        value = super().get_db_prep_value(value, connection, prepared)
+        if value is None:
+            return None
+        return connection.Database.Binary(self.compress(value))
+
+    def from_db_value(self, value, expression, connection):
+        # SQLite 中未回填的旧数据仍是 TEXT，原样返回
+        if value is None or isinstance(value, str):
+            return value
+        return self.decompress(bytes(value))
+
+
+class AlterToCompressedTextField(migrations.AlterField):
+    """
+    将已有的文本列改为 CompressedTextField 的迁移操作。
+    PostgreSQL 上 AlterField 生成的 ALTER ... TYPE bytea USING col::bytea 会把文本中的反斜杠当作 bytea 转义符，
+    内容被改写或迁移失败；这里改为新增 bytea 列，用 convert_to(col, 'UTF8') 写入原始 UTF-8 字节
+    （无头的旧格式，读取时兼容，之后由 compress_article_bodies 压缩），再删除旧列并改名。其他数据库沿用 AlterField
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        to_model = to_state.apps.get_model(app_label, self.model_name)
+        if schema_editor.connection.vendor != 'postgresql' or not self.allow_migrate_model(
+            schema_editor.connection.alias, to_model
+        ):
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        from_field = from_state.apps.get_model(app_label, self.model_name)._meta.get_field(self.name)
+        to_field = to_model._meta.get_field(self.name)
+
+        quote = schema_editor.quote_name
+        table = quote(to_model._meta.db_table)
+        column, temp = quote(from_field.column), quote(f'{to_field.column}__bytea')
+        schema_editor.execute(f'ALTER TABLE {table} ADD COLUMN {temp} bytea')
+        schema_editor.execute(f"UPDATE {table} SET {temp} = convert_to({column}, 'UTF8')")
+        schema_editor.execute(f'ALTER TABLE {table} DROP COLUMN {column}')
+        schema_editor.execute(f'ALTER TABLE {table} RENAME COLUMN {temp} TO {quote(to_field.column)}')
+        if not to_field.null:
+            schema_editor.execute(f'ALTER TABLE {table} ALTER COLUMN {quote(to_field.column)} SET NOT NULL')
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        # 压缩后的数据无法在 SQL 中还原为文本
+        if schema_editor.connection.vendor == 'postgresql':
+            raise IrreversibleError(f"{self.describe()} 在 PostgreSQL 上不可回滚")
+        return super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+    def describe(self):
+        return f"Alter field {self.name} on {self.model_name} to CompressedTextField"
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File Name   : images.py
+Author      : wzw
+Date Created: 2026/10/17
+Description : 图片派生图（缩略图）生成
+              原图上传后由 celery 任务生成固定宽度的 JPEG 和 WebP 派生图，写入 STORAGES['default']，
+              模型中以 JSON 保存派生图的存储路径 {格式: {宽度: 路径}}，序列化时转换为 srcset 字符串
+"""
+import io
+import posixpath
+
+from PIL import Image, ImageOps
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+# 派生图宽度（像素）
+DERIVATIVE_WIDTHS = (64, 200, 800)
+# 格式 → (PIL 格式名, 扩展名, 编码参数)
+DERIVATIVE_FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def open_image(file, max_side=None):
+    """
+    打开图片并按 EXIF 方向摆正，统一转换为 RGB（去掉透明通道，避免 JPEG 编码出错）。
+    指定 max_side 时，JPEG 在解码阶段按 DCT 缩放（draft），大图无需解码全部像素
+    """
+    image = Image.open(file)
+    if max_side and image.format == 'JPEG':
+        image.draft('RGB', (max_side, max_side))
+    image = ImageOps.exif_transpose(image)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    return image
+
+
+def encode_image(image, fmt):
+    """ 按 DERIVATIVE_FORMATS 中的参数编码，返回字节串 """
+    pil_format, _, options = DERIVATIVE_FORMATS[fmt]
+    buffer = io.BytesIO()
+    image.save(buffer, format=pil_format, **options)
+    return buffer.getvalue()
+
+
+def downscale(image, max_side):
+    """ 等比缩小到最长边不超过 max_side，不放大 """
+    if max(image.size) > max_side:
+        image = image.copy()
+        image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+    return image
+
+
+def encode_jpeg_within(image, max_bytes, min_quality=20, max_quality=95):
+    """
+    二分查找体积不超过 max_bytes 的最高 JPEG 质量，返回 (质量, 字节串)，最多编码约 log2(质量区间) 次；
+    最高质量即满足时只编码一次，最低质量仍然超出时返回最低质量的结果
+    """
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=max_quality, optimize=True)
+    if buffer.tell() <= max_bytes:
+        return max_quality, buffer.getvalue()
+    best = None
+    low, high = min_quality, max_quality - 1
+    while low <= high:
+        quality = (low + high) // 2
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=quality, optimize=True)
+        if buffer.tell() <= max_bytes:
+            best = (quality, buffer.getvalue())
+            low = quality + 1
+        else:
+            high = quality - 1
+    if best is None:
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=min_quality, optimize=True)
+        best = (min_quality, buffer.getvalue())
+    return best
+
+
+def compress_image(file, max_side, max_bytes):
+    """ 先缩小到展示所需的最大分辨率，再二分质量编码为 JPEG，返回字节串 """
+    image = downscale(open_image(file, max_side=max_side), max_side)
+    return encode_jpeg_within(image, max_bytes)[1]
+
+
+def derivative_dir(name):
+    """ 原图 cover/abc.png → 派生图目录 cover/derivatives/abc """
+    directory, filename = posixpath.split(name)
+    return posixpath.join(directory, 'derivatives', posixpath.splitext(filename)[0])
+
+
+def generate_derivatives(name, square=False, storage=None):
+    """
+    为存储中的原图生成各尺寸、各格式的派生图，返回 {格式: {宽度: 存储路径}}。
+    square 为 True 时居中裁剪为正方形（头像），否则按宽度等比缩放（封面）；不会放大小于目标宽度的原图
+    """
+    storage = storage or default_storage
+    with storage.open(name, 'rb') as f:
+        original = open_image(f)
+        original.load()
+
+    directory = derivative_dir(name)
+    derivatives = {fmt: {} for fmt in DERIVATIVE_FORMATS}
+    source_width = min(original.size) if square else original.width
+    # 原图比最小尺寸还小时仍生成一份原尺寸的派生图
+    widths = [width for width in DERIVATIVE_WIDTHS if width <= source_width] or [source_width]
+    # 从大到小依次缩放，较小的尺寸基于上一次的结果计算，减少重采样的像素量
+    image = original
+    for width in sorted(widths, reverse=True):
+        if square:
+            image = ImageOps.fit(image, (width, width), method=Image.Resampling.LANCZOS)
+        else:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.Resampling.LANCZOS)
+        for fmt, (_, extension, _) in DERIVATIVE_FORMATS.items():
+            path = posixpath.join(directory, f'{width}.{extension}')
+            if storage.exists(path):
+                storage.delete(path)
+            derivatives[fmt][str(width)] = storage.save(path, ContentFile(encode_image(image, fmt)))
+    return derivatives
+
+
+def delete_derivatives(derivatives, storage=None):
+    """ 删除派生图文件（原图被替换后清理旧的派生图） """
+    storage = storage or default_storage
+    for paths in (derivatives or {}).values():
+        for path in paths.values():
+            storage.delete(path)
+
+
+def refresh_derivatives(queryset, image_field, derivatives_field, name, square=False):
+    """
+    为 queryset 中（唯一的）对象的图片生成派生图，写回 derivatives_field 后清理旧的派生图，返回是否写入。
+    对象的图片已不是 name（生成期间又被替换）时放弃；默认图片不生成派生图，srcset 为空时客户端使用原图
+    """
+    queryset = queryset.filter(**{image_field: name})
+    old = queryset.values_list(derivatives_field, flat=True).first()
+    if old is None:
+        return False
+    default = queryset.model._meta.get_field(image_field).default
+    derivatives = {} if name == default else generate_derivatives(name, square=square)
+    if not queryset.update(**{derivatives_field: derivatives}):
+        delete_derivatives(derivatives)
+        return False
+    # 同一原图重新生成时路径不变，只删除不再使用的文件
+    delete_derivatives({
+        fmt: {width: path for width, path in paths.items() if path != derivatives.get(fmt, {}).get(width)}
+        for fmt, paths in old.items()
+    })
+    return True
+
+
+def build_srcset(derivatives, storage=None):
+    """ {格式: {宽度: 路径}} → {格式: "url 64w, url 200w, ..."}，没有派生图时返回空字典 """
+    storage = storage or default_storage
+    return {
+        fmt: ', '.join(f'{storage.url(path)} {width}w' for width, path in sorted(paths.items(), key=lambda i: int(i[0])))
+        for fmt, paths in (derivatives or {}).items()
+        if paths
+    }
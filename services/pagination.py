@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File Name   : pagination.py
+Author      : wzw
+Date Created: 2026/10/17
+Description : 分页工具，提供基于 (排序字段, id) 的键集（游标）分页
+"""
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+
+
+def encode_cursor(payload):
+    """ 将游标位置编码为不透明字符串 """
+    data = json.dumps(payload, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """ 解码游标，格式错误时返回 404 """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (TypeError, ValueError, binascii.Error):
+        raise NotFound("无效的游标")
+    if not isinstance(payload, dict) or 'v' not in payload or 'id' not in payload:
+        raise NotFound("无效的游标")
+    return payload
+
+
+class KeysetPagination(BasePagination):
+    """
+    键集分页：按 (排序字段, id) 定位下一页的起点，不做 OFFSET 和 COUNT，
+    因此第 N 页和第 1 页的查询代价相同。
+    排序字段优先取视图 OrderingFilter 解析出的第一个字段（必须是非空的模型字段），否则使用 ordering
+    """
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    ordering = '-published_at'
+
+    def get_ordering(self, request, queryset, view):
+        for backend in getattr(view, 'filter_backends', []):
+            if issubclass(backend, OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view)
+                if ordering:
+                    return ordering[0]
+        return self.ordering
+
+    @staticmethod
+    def _dump_value(value):
+        return value.isoformat() if hasattr(value, 'isoformat') else value
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        ordering = self.get_ordering(request, queryset, view)
+        self.ordering_key = ordering
+        self.field_name = ordering.lstrip('-')
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        position = decode_cursor(cursor) if cursor else None
+        reverse = bool(position and position.get('r'))
+
+        # 向前翻页时反转排序方向，取出后再翻转回来
+        descending = ordering.startswith('-') != reverse
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(f'{prefix}{self.field_name}', f'{prefix}pk')
+
+        if position:
+            value = self._load_position(queryset, ordering, position)
+            lookup = 'lt' if descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{self.field_name}__{lookup}': value})
+                | Q(**{self.field_name: value, f'pk__{lookup}': position['id']})
+            )
+
+        # 多取一条用来判断是否还有下一页
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_previous, self.has_next = position is not None, has_more
+
+        self.page = results
+        return results
+
+    def _load_position(self, queryset, ordering, position):
+        """
+        校验游标并将其中的排序值转换为字段类型；伪造的游标、或切换 ordering 后沿用的旧游标返回 404。
+        游标中记录了生成时的排序（o），不一致时直接拒绝
+        """
+        if position.get('o', ordering) != ordering or type(position['id']) is not int:
+            raise NotFound("无效的游标")
+        field = queryset.model._meta.get_field(self.field_name)
+        try:
+            value = field.to_python(position['v'])
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound("无效的游标")
+        if value is None:
+            raise NotFound("无效的游标")
+        return value
+
+    def _make_link(self, obj, reverse):
+        payload = {'v': self._dump_value(getattr(obj, self.field_name)), 'id': obj.pk, 'o': self.ordering_key}
+        if reverse:
+            payload['r'] = 1
+        return replace_query_param(self.base_url, self.cursor_query_param, encode_cursor(payload))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._make_link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self._make_link(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class PageNumberOrCursorPagination(PageNumberPagination):
+    """
+    默认使用页码分页，兼容已有客户端；
+    请求中带有 cursor 参数时（首页传空值即可）切换为键集分页，不再做 COUNT 和 OFFSET
+    """
+    cursor_pagination_class = KeysetPagination
+    cursor_ordering = '-published_at'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.cursor_pagination_class.cursor_query_param in request.query_params:
+            self.cursor_paginator = self.cursor_pagination_class()
+            self.cursor_paginator.ordering = self.cursor_ordering
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
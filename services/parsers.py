@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File Name   : parsers.py
+Author      : wzw
+Date Created: 2026/10/17
+Description : 自定义请求体解析器
+"""
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """
+    NDJSON（每行一个 JSON 对象）解析器：不一次性读入请求体，
+    request.data 直接返回底层流，由视图逐行读取、逐行解析
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return stream if stream is not None else []
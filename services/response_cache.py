@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File Name   : response_cache.py
+Author      : wzw
+Date Created: 2026/10/17
+Description : 匿名 GET 请求的版本化响应缓存，以及基于同一组版本号的条件请求（ETag / Last-Modified / 304）
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from services.cache_utils import cache_version_service
+
+
+def viewer_scope(user_id):
+    """ 登录用户个人状态（是否点赞、收藏等）的作用域，个人状态变化时更新其版本号 """
+    return f'viewer:{user_id}'
+
+
+class VersionedResponseCacheMixin:
+    """
+    匿名用户 GET 响应缓存（视图 Mixin）
+    缓存键 = 路径 + 排序后的查询参数 + 视图相关作用域的版本号，
+    数据变更时由业务代码更新对应作用域的版本号（见 CacheVersionService）。
+    同一组版本号同时作为 ETag / Last-Modified 的依据，客户端和 CDN 的条件请求
+    命中时直接返回 304，不执行查询集和序列化
+    """
+    response_cache_name = 'default'
+    response_cache_timeout = settings.RESPONSE_CACHE_SECONDS
+
+    def get_cache_scopes(self):
+        """ 当前请求的响应依赖的作用域列表，由子类实现 """
+        raise NotImplementedError
+
+    def get_response_cache_key(self, request, versions):
+        params = sorted((key, sorted(values)) for key, values in request.query_params.lists())
+        raw = f'{request.path}|{params}|{sorted(versions.items())}'
+        return f'response:{hashlib.md5(raw.encode()).hexdigest()}'
+
+    def get_validators(self, request, versions):
+        """
+        计算 (ETag, Last-Modified)：
+        作者粉丝数等少量字段不随本视图的作用域更新，校验值按响应缓存的有效期轮换，
+        使其最长陈旧时间与响应缓存一致；登录用户的响应含个人状态，ETag 中带上用户 id，
+        versions 中还包含其 viewer 作用域的版本号
+        """
+        bucket = int(time.time()) // self.response_cache_timeout
+        user_id = request.user.id if request.user.is_authenticated else ''
+        raw = f'{self.get_response_cache_key(request, versions)}|{bucket}|{user_id}'
+        etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+        # 版本号是微秒时间戳
+        last_modified = max([bucket * self.response_cache_timeout, *(v // 1_000_000 for v in versions.values())])
+        return etag, last_modified
+
+    def get(self, request, *args, **kwargs):
+        scopes = self.get_cache_scopes()
+        if request.user.is_authenticated:
+            # 登录用户的响应含个人状态，校验值还要随其个人状态变化
+            scopes = [*scopes, viewer_scope(request.user.id)]
+        versions = cache_version_service.get_versions(scopes)
+        etag, last_modified = self.get_validators(request, versions)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = self.get_cached_response(request, versions, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            # 允许客户端/CDN 存储，但每次使用前都需要重新校验；登录用户的响应不允许共享缓存
+            if request.user.is_authenticated:
+                patch_cache_control(response, no_cache=True, private=True)
+            else:
+                patch_cache_control(response, no_cache=True)
+        return response
+
+    def get_cached_response(self, request, versions, *args, **kwargs):
+        # 登录用户的响应可能包含个人状态，不做缓存
+        if request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+
+        cache = caches[self.response_cache_name]
+        key = self.get_response_cache_key(request, versions)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, self.response_cache_timeout)
+        return response
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File Name   : serializers.py
+Author      : wzw
+Date Created: 2026/10/17
+Description : 稀疏字段集与按需展开
+              ?fields=id,title,url 只输出列出的字段；?expand=user 将 Meta.expandable_fields 中的字段替换为嵌套对象。
+              只作用于 GET 等只读请求的最外层序列化器，未输出的字段不会被构建，也不会调用其 get_xxx；
+              视图通过 field_requested 判断是否需要连接 / 预取对应的关联表
+"""
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def _parse_list(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def requested_fields(request):
+    """ 返回 (要输出的字段集合，未指定 ?fields 时为 None, 要展开的字段集合)；写请求不做裁剪 """
+    if request is None or request.method not in SAFE_METHODS:
+        return None, set()
+    fields = request.query_params.get(FIELDS_PARAM)
+    return (_parse_list(fields) if fields else None), _parse_list(request.query_params.get(EXPAND_PARAM, ''))
+
+
+def field_requested(request, *names):
+    """ 响应中是否会输出 names 中的任一字段（视图据此决定是否 select_related / prefetch_related） """
+    fields, _ = requested_fields(request)
+    return fields is None or not fields.isdisjoint(names)
+
+
+class DynamicFieldsMixin:
+    """
+    序列化器混入：按请求参数裁剪和展开字段。
+    Meta.expandable_fields = {字段名: (序列化器类或其导入路径, 初始化参数)}，展开时替换同名的默认字段（或新增字段）
+    """
+
+    def _is_root(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self._is_root():
+            return fields
+        only, expand = requested_fields(self.context.get('request'))
+
+        for name, (serializer_class, kwargs) in getattr(self.Meta, 'expandable_fields', {}).items():
+            if name in expand:
+                if isinstance(serializer_class, str):
+                    serializer_class = import_string(serializer_class)
+                fields[name] = serializer_class(**kwargs)
+
+        if only is not None:
+            fields = type(fields)((name, field) for name, field in fields.items() if name in only)
+        return fields
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File Name   : storage.py
+Author      : wzw
+Date Created: 2026/10/17
+Description : 图片直传对象存储
+              服务端只签发 POST 上传策略（限定对象键、Content-Type 和体积），图片字节由客户端直接上传到 MinIO / S3，
+              不再经过应用服务器；上传完成后客户端携带签发时的 token 回调，服务端校验对象（体积、文件头中的格式和像素数）
+              后写回模型并触发异步处理。token 中签名了用途、对象键、用户和目标对象，回调无法指定任意对象键
+"""
+import io
+import uuid
+
+from PIL import Image
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import default_storage
+from rest_framework import serializers
+
+# 用途 → 对象键前缀（与模型字段的 upload_to 一致）
+UPLOAD_PREFIXES = {
+    'avatar': 'avatar/',
+    'cover': 'cover/',
+}
+# 允许的 Content-Type → 扩展名
+CONTENT_TYPES = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/webp': '.webp',
+    'image/gif': '.gif',
+}
+# 允许的图片格式（PIL 识别结果），MPO 为手机拍摄的多帧 JPEG
+IMAGE_FORMATS = {'JPEG', 'MPO', 'PNG', 'WEBP', 'GIF'}
+# 校验时只读取对象开头的字节，足以解析各格式的文件头（含较大的 EXIF）
+HEADER_BYTES = 256 * 1024
+
+
+class UploadError(Exception):
+    """ 直传签发或回调校验失败 """
+
+
+class DirectUploadService:
+    """ 签发直传策略并校验上传结果 """
+    SALT = 'direct-upload'
+
+    def __init__(self, storage=None):
+        self._storage = storage
+
+    @property
+    def storage(self):
+        return self._storage or default_storage
+
+    def presign(self, kind, content_type, user_id, target_id=None):
+        """ 签发 POST 上传策略，返回 {url, fields, key, token, expires_in}；客户端以 multipart 表单提交 fields 和 file """
+        storage = self.storage
+        if not hasattr(storage, 'bucket'):
+            raise UploadError("当前存储不支持直传，请使用表单上传")
+        if content_type not in CONTENT_TYPES:
+            raise UploadError("不支持的图片类型")
+
+        key = f'{UPLOAD_PREFIXES[kind]}{uuid.uuid4().hex}{CONTENT_TYPES[content_type]}'
+        expires = settings.DIRECT_UPLOAD_EXPIRE_SECONDS
+        policy = storage.bucket.meta.client.generate_presigned_post(
+            storage.bucket_name,
+            storage._normalize_name(key),
+            Fields={'Content-Type': content_type},
+            Conditions=[
+                {'Content-Type': content_type},
+                ['content-length-range', 1, settings.DIRECT_UPLOAD_MAX_BYTES],
+            ],
+            ExpiresIn=expires,
+        )
+        token = signing.dumps(
+            {'kind': kind, 'key': key, 'user': user_id, 'target': target_id}, salt=self.SALT
+        )
+        return {'url': policy['url'], 'fields': policy['fields'], 'key': key, 'token': token, 'expires_in': expires}
+
+    def complete(self, token, kind, user_id, target_id=None):
+        """ 校验回调 token 和已上传的对象，返回对象键；对象不合格时删除后抛出 UploadError """
+        try:
+            # 策略过期前开始的上传在过期后才结束也应当能回调
+            payload = signing.loads(token, salt=self.SALT, max_age=settings.DIRECT_UPLOAD_EXPIRE_SECONDS * 2)
+        except signing.BadSignature:
+            raise UploadError("上传凭证无效或已过期")
+        if (payload['kind'], payload['user'], payload['target']) != (kind, user_id, target_id):
+            raise UploadError("上传凭证无效或已过期")
+
+        key = payload['key']
+        # 对象键必须直接位于该用途的前缀下，即使 token 被伪造也不能校验或删除其他对象
+        prefix = UPLOAD_PREFIXES[kind]
+        if not key.startswith(prefix) or '/' in key[len(prefix):]:
+            raise UploadError("上传凭证无效或已过期")
+        storage = self.storage
+        if not storage.exists(key):
+            raise UploadError("文件尚未上传完成")
+        try:
+            if storage.size(key) > settings.DIRECT_UPLOAD_MAX_BYTES:
+                raise UploadError("文件过大")
+            self._check_image(key)
+        except UploadError:
+            storage.delete(key)
+            raise
+        return key
+
+    def _read_header(self, key):
+        """ 读取对象开头的字节；S3 使用 Range 请求，不下载整个文件 """
+        storage = self.storage
+        if hasattr(storage, 'bucket'):
+            response = storage.bucket.Object(storage._normalize_name(key)).get(Range=f'bytes=0-{HEADER_BYTES - 1}')
+            return response['Body'].read()
+        with storage.open(key, 'rb') as f:
+            return f.read(HEADER_BYTES)
+
+    def _check_image(self, key):
+        """ 只解析文件头：格式必须是允许的图片格式，像素数超过 PIL 的解压炸弹阈值时拒绝 """
+        try:
+            image_format = Image.open(io.BytesIO(self._read_header(key))).format
+        except (OSError, Image.DecompressionBombError):
+            raise UploadError("无法识别的图片文件")
+        if image_format not in IMAGE_FORMATS:
+            raise UploadError("不支持的图片格式")
+
+
+class DirectUploadSerializer(serializers.Serializer):
+    content_type = serializers.ChoiceField(choices=list(CONTENT_TYPES), help_text="待上传图片的 Content-Type")
+
+
+class DirectUploadCompleteSerializer(serializers.Serializer):
+    token = serializers.CharField(help_text="签发上传策略时返回的 token")
+
+
+direct_upload_service = DirectUploadService()
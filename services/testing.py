@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File Name   : testing.py
+Author      : wzw
+Date Created: 2026/10/17
+Description : 测试基类
+              业务代码依赖 Redis（缓存版本号、写回缓冲、排行等）和 celery：测试期间 celery 任务同步执行，
+              每个用例开始前清空 settings.CACHES 中各 Redis 库（测试需连接专用的 Redis 实例，不要指向线上库）。
+              事务提交后才执行的操作（on_commit）用 captureOnCommitCallbacks(execute=True) 触发
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django_redis import get_redis_connection
+from rest_framework.test import APITestCase
+
+from mysite.celery import app
+
+User = get_user_model()
+
+
+class RedisAPITestCase(APITestCase):
+    """ 同步执行 celery 任务、每个用例使用空的 Redis 的接口测试基类 """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._celery_conf = app.conf.task_always_eager, app.conf.task_eager_propagates
+        app.conf.task_always_eager = True
+        app.conf.task_eager_propagates = True
+
+    @classmethod
+    def tearDownClass(cls):
+        app.conf.task_always_eager, app.conf.task_eager_propagates = cls._celery_conf
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        from articles.slugs import article_slug_resolver
+
+        for name in settings.CACHES:
+            get_redis_connection(name).flushdb()
+        # 进程内的 slug 缓存不随 Redis 清空，回滚后重复使用的 slug 可能指向上个用例的文章
+        article_slug_resolver.local.clear()
+
+    @staticmethod
+    def create_user(username, **kwargs):
+        """ 创建已激活的用户 """
+        kwargs.setdefault('is_active_account', True)
+        return User.objects.create_user(username, f'{username}@example.com', 'pw123456', **kwargs)
+
+    def login(self, user):
+        self.client.force_authenticate(user)
+        return user
+
+    def create_article(self, author, title, content='content', tags=(), **kwargs):
+        """ 创建文章（默认已发布）并执行提交后的回调（索引、发布通知等） """
+        from articles.models import Article, Tag
+
+        kwargs.setdefault('is_draft', False)
+        kwargs.setdefault('published_at', timezone.now())
+        with self.captureOnCommitCallbacks(execute=True):
+            article = Article.objects.create(title=title, content=content, author=author, **kwargs)
+            if tags:
+                article.tags.set([Tag.objects.get_or_create(name=name)[0] for name in tags])
+        return article
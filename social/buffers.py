@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File Name   : buffers.py
+Author      : wzw
+Date Created: 2026/10/17
+Description : 点赞/收藏的 Redis 写回缓冲
+              每篇文章在 Redis 中维护一个成员集合（点赞的用户 / 收藏的收藏夹），
+              切换操作只修改集合并记录待落库操作，由 celery 定时任务批量写回数据库。
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count
+from django_redis import get_redis_connection
+from redis.exceptions import ResponseError
+
+from articles.models import Article
+from services.cache_utils import cache_version_service
+from .models import Like, CollectionItem, Collection
+
+User = get_user_model()
+
+# 集合不存在时才从数据库加载（分段 SADD，避免成员过多时 unpack 超出 Lua 栈限制）
+LOAD_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+for i = 1, #ARGV, 5000 do
+    redis.call('SADD', KEYS[1], unpack(ARGV, i, math.min(i + 4999, #ARGV)))
+end
+return 1
+"""
+
+# 原子切换成员，并记录该 (成员, 文章) 的最新待落库操作：1 新增，0 删除
+TOGGLE_SCRIPT = """
+if redis.call('SISMEMBER', KEYS[1], ARGV[1]) == 1 then
+    redis.call('SREM', KEYS[1], ARGV[1])
+    redis.call('HSET', KEYS[2], ARGV[2], '0')
+    return 0
+end
+redis.call('SADD', KEYS[1], ARGV[1])
+redis.call('HSET', KEYS[2], ARGV[2], '1')
+return 1
+"""
+
+
+class ToggleBuffer:
+    """ 切换类操作的写回缓冲 """
+    CACHE_NAME = 'default'
+    # 占位成员，用来区分“已加载但为空的集合”和“尚未加载”，数据库主键不会为 0
+    SENTINEL = '0'
+
+    def __init__(self, name, model, member_model, member_field, counter_field):
+        self.name = name
+        self.model = model
+        self.member_model = member_model
+        self.member_field = member_field
+        self.counter_field = counter_field
+
+    @property
+    def redis(self):
+        return get_redis_connection(self.CACHE_NAME)
+
+    def _members_key(self, article_id):
+        return f'{self.name}:members:{article_id}'
+
+    @property
+    def _pending_key(self):
+        return f'{self.name}:pending'
+
+    def _ensure_loaded(self, article_id):
+        """ 首次访问时用数据库中的记录初始化成员集合 """
+        key = self._members_key(article_id)
+        if self.redis.exists(key):
+            return
+        members = self.model.objects.filter(article_id=article_id).values_list(self.member_field, flat=True)
+        script = self.redis.register_script(LOAD_SCRIPT)
+        script(keys=[key], args=[self.SENTINEL, *members])
+
+    def toggle(self, article_id, member_id):
+        """ 切换成员状态，返回 True 表示新增，False 表示取消 """
+        self._ensure_loaded(article_id)
+        script = self.redis.register_script(TOGGLE_SCRIPT)
+        added = script(
+            keys=[self._members_key(article_id), self._pending_key],
+            args=[member_id, f'{member_id}:{article_id}'],
+        )
+        return bool(added)
+
+    def contains(self, article_id, member_id):
+        """ 成员是否在集合中，未加载的文章直接查数据库 """
+        key = self._members_key(article_id)
+        pipe = self.redis.pipeline()
+        pipe.exists(key)
+        pipe.sismember(key, member_id)
+        loaded, is_member = pipe.execute()
+        if loaded:
+            return bool(is_member)
+        return self.model.objects.filter(article_id=article_id, **{self.member_field: member_id}).exists()
+
+    def counts(self, article_ids):
+        """
+        批量获取缓冲中的计数，返回 {article_id: count}
+        未加载的文章不会有待落库操作，不在结果中，调用方沿用数据库中的冗余计数
+        """
+        pipe = self.redis.pipeline()
+        for article_id in article_ids:
+            pipe.scard(self._members_key(article_id))
+        return {
+            article_id: size - 1
+            for article_id, size in zip(article_ids, pipe.execute())
+            if size
+        }
+
+    def _take_pending(self):
+        """ 取出待落库操作；上次落库中断时优先重放遗留的批次 """
+        flushing_key = f'{self._pending_key}:flushing'
+        if not self.redis.exists(flushing_key):
+            try:
+                self.redis.rename(self._pending_key, flushing_key)
+            except ResponseError:
+                # 没有待落库的操作
+                return flushing_key, {}
+        return flushing_key, self.redis.hgetall(flushing_key)
+
+    def flush(self, batch_size=1000):
+        """ 将待落库操作批量写回数据库，返回处理的操作数量 """
+        flushing_key, pending = self._take_pending()
+        if not pending:
+            return 0
+
+        adds, removes = [], defaultdict(list)
+        for field, op in pending.items():
+            member_id, article_id = map(int, field.decode().split(':'))
+            if op == b'1':
+                adds.append((member_id, article_id))
+            else:
+                removes[article_id].append(member_id)
+
+        # 过滤掉缓冲期间已被删除的文章和成员，避免外键错误导致整批失败
+        article_ids = {article_id for _, article_id in adds}
+        member_ids = {member_id for member_id, _ in adds}
+        existing_articles = set(Article.objects.filter(id__in=article_ids).values_list('id', flat=True))
+        existing_members = set(self.member_model.objects.filter(id__in=member_ids).values_list('id', flat=True))
+
+        with transaction.atomic():
+            self.model.objects.bulk_create(
+                [
+                    self.model(article_id=article_id, **{self.member_field: member_id})
+                    for member_id, article_id in adds
+                    if article_id in existing_articles and member_id in existing_members
+                ],
+                batch_size=batch_size,
+                ignore_conflicts=True,
+            )
+            for article_id, members in removes.items():
+                for start in range(0, len(members), batch_size):
+                    self.model.objects.filter(
+                        article_id=article_id,
+                        **{f'{self.member_field}__in': members[start:start + batch_size]}
+                    ).delete()
+            self._refresh_counters(article_ids | set(removes))
+
+        self.redis.delete(flushing_key)
+        # 写回模式下请求中不更新缓存版本号，计数落库后按批统一失效
+        affected = sorted(article_ids | set(removes))
+        for start in range(0, len(affected), batch_size):
+            cache_version_service.bump(*Article.bulk_cache_scopes(affected[start:start + batch_size]))
+        return len(pending)
+
+    def _refresh_counters(self, article_ids):
+        """ 以数据库为准重算受影响文章的冗余计数 """
+        totals = dict(
+            self.model.objects.filter(article_id__in=article_ids)
+            .order_by()
+            .values('article_id')
+            .annotate(total=Count('pk'))
+            .values_list('article_id', 'total')
+        )
+        for article_id in article_ids:
+            Article.objects.filter(pk=article_id).update(**{self.counter_field: totals.get(article_id, 0)})
+
+
+like_buffer = ToggleBuffer('like', Like, User, 'user_id', 'like_count')
+collect_buffer = ToggleBuffer('collect', CollectionItem, Collection, 'collection_id', 'favorite_count')
+
+
+def apply_buffered_counts(articles):
+    """ 写回模式下，用缓冲中的实时计数覆盖文章对象上的冗余计数 """
+    if not settings.SOCIAL_WRITE_BEHIND or not articles:
+        return
+    article_ids = [article.id for article in articles]
+    like_counts = like_buffer.counts(article_ids)
+    favorite_counts = collect_buffer.counts(article_ids)
+    for article in articles:
+        article.like_count = like_counts.get(article.id, article.like_count)
+        article.favorite_count = favorite_counts.get(article.id, article.favorite_count)
+
+
+def has_liked(article_id, user_id):
+    """ 用户是否点赞过文章，写回模式下以缓冲为准 """
+    if settings.SOCIAL_WRITE_BEHIND:
+        return like_buffer.contains(article_id, user_id)
+    return Like.objects.filter(article_id=article_id, user_id=user_id).exists()
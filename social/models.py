@@ -54,6 +54,10 @@ class Comment(models.Model):
     class Meta:
         db_table = "tb_comment"
         ordering = ['created_at']
+        indexes = [
+            # 文章评论列表：article_id = ? AND parent_id IS NULL ORDER BY created_at
+            models.Index(fields=['article', 'parent', 'created_at'], name='idx_comment_article_parent'),
+        ]
 
 
 class Follow(models.Model):
@@ -1,5 +1,7 @@
 from django.contrib.auth import get_user_model
+from django.urls import reverse
 from rest_framework import serializers
+from services.serializers import DynamicFieldsMixin
 from .models import Like, Comment, Collection, CollectionItem, Follow
 
 User = get_user_model()
@@ -34,7 +36,7 @@ class CollectionSerializer(serializers.ModelSerializer):
         read_only_fields = ['collection_id', 'created_at', 'items']
 
 
-class CommentArticleSerializer(serializers.ModelSerializer):
+class CommentArticleSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     comment_id = serializers.IntegerField(source='id', read_only=True)
     # 默认返回前 3 条二级评论
     user = serializers.StringRelatedField()
@@ -48,15 +50,22 @@ class CommentArticleSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = '__all__'
+        # ?expand=user 时以作者卡片代替用户名
+        expandable_fields = {
+            'user': ('articles.serializers.AuthorNestedSerializer', {'read_only': True}),
+        }
 
 
-class ReplySerializer(serializers.ModelSerializer):
+class ReplySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     comment_id = serializers.IntegerField(source='id', read_only=True)
     user = serializers.StringRelatedField()
 
     class Meta:
         model = Comment
         fields = '__all__'
+        expandable_fields = {
+            'user': ('articles.serializers.AuthorNestedSerializer', {'read_only': True}),
+        }
 
 
 class CommentUserSerializer(serializers.ModelSerializer):
@@ -82,6 +91,11 @@ class CommentUserSerializer(serializers.ModelSerializer):
         return attrs
 
     def get_article(self, obj):
+        # 创建评论时 URL 中已带有 slug，直接拼接链接，不为此加载文章行
+        view = self.context.get('view')
+        slug = view.kwargs.get('slug') if view else None
+        if slug:
+            return reverse('article-detail', kwargs={'slug': slug})
         return obj.article.get_absolute_url()
 
 
@@ -0,0 +1,11 @@
+from social.buffers import like_buffer, collect_buffer
+from mysite.celery import app
+
+
+@app.task
+def flush_toggle_buffers():
+    """ 定时将点赞/收藏写回缓冲中的操作批量落库 """
+    return {
+        "like": like_buffer.flush(),
+        "collect": collect_buffer.flush(),
+    }
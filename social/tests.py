@@ -1,3 +1,250 @@
-from django.test import TestCase
+import io
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from articles.models import Article
+from services.testing import RedisAPITestCase
+from social.buffers import like_buffer, collect_buffer
+from social.models import Like, Collection, CollectionItem, Comment, Follow
+
+
+def _refresh(instance):
+    instance.refresh_from_db()
+    return instance
+
+
+@override_settings(SOCIAL_WRITE_BEHIND=False)
+class ArticleCounterTests(RedisAPITestCase):
+    """ 文章的点赞、收藏、评论冗余计数 """
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.article = self.create_article(self.author, 'counters')
+        self.user = self.login(self.create_user('reader'))
+        self.collection = Collection.objects.create(user=self.user, name='default')
+
+    def test_like_toggle(self):
+        self.assertEqual(self.client.post('/social/like/counters/').status_code, 201)
+        self.assertEqual(_refresh(self.article).like_count, 1)
+        self.assertEqual(self.client.post('/social/like/counters/').status_code, 200)
+        self.assertEqual(_refresh(self.article).like_count, 0)
+
+    def test_collect_toggle(self):
+        url = f'/social/collect/{self.collection.id}/counters/'
+        self.assertEqual(self.client.post(url).status_code, 201)
+        self.assertEqual(_refresh(self.article).favorite_count, 1)
+        self.assertEqual(self.client.post(url).status_code, 200)
+        self.assertEqual(_refresh(self.article).favorite_count, 0)
+
+    def test_counter_never_goes_negative(self):
+        self.assertEqual(Article.incr_counter(self.article.id, 'like_count', -1), 0)
+        self.assertEqual(_refresh(self.article).like_count, 0)
+
+    def test_comment_counts_include_replies(self):
+        response = self.client.post('/social/comment/counters/create/', {'content': 'first'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        parent = Comment.objects.get()
+        self.client.post('/social/comment/counters/create/', {'content': 'reply', 'parent': parent.id}, format='json')
+        self.assertEqual(_refresh(self.article).comment_count, 2)
+
+        # 删除一级评论会级联删除回复，计数一并扣除
+        self.assertEqual(self.client.delete(f'/social/comment/{parent.id}/delete/').status_code, 204)
+        self.assertEqual(_refresh(self.article).comment_count, 0)
+
+    def test_public_list_reads_counters(self):
+        self.client.post('/social/like/counters/')
+        self.client.post(f'/social/collect/{self.collection.id}/counters/')
+        self.client.force_authenticate(None)
+        result = self.client.get('/articles/').data['results'][0]
+        self.assertEqual((result['like_count'], result['favorite_count']), (1, 1))
+
+    def test_rebuild_article_counters(self):
+        Like.objects.create(user=self.user, article=self.article)
+        CollectionItem.objects.create(collection=self.collection, article=self.article)
+        Comment.objects.create(user=self.user, article=self.article, content='c')
+        Article.objects.filter(pk=self.article.pk).update(like_count=7, favorite_count=0, comment_count=3)
+
+        call_command('rebuild_article_counters', batch_size=1, stdout=io.StringIO())
+        article = _refresh(self.article)
+        self.assertEqual((article.like_count, article.favorite_count, article.comment_count), (1, 1, 1))
+
+
+@override_settings(SOCIAL_WRITE_BEHIND=True)
+class ToggleBufferTests(RedisAPITestCase):
+    """ 点赞/收藏写回缓冲：请求只写 Redis，定时任务批量落库 """
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.article = self.create_article(self.author, 'buffered')
+        self.user = self.login(self.create_user('reader'))
+        self.collection = Collection.objects.create(user=self.user, name='default')
+
+    def test_toggle_is_buffered_until_flush(self):
+        self.assertEqual(self.client.post('/social/like/buffered/').status_code, 201)
+        self.assertFalse(Like.objects.exists())
+        # 读取时用缓冲中的计数覆盖数据库中的冗余计数
+        self.assertEqual(self.client.get('/articles/buffered/').data['like_count'], 1)
+
+        self.assertEqual(like_buffer.flush(), 1)
+        self.assertTrue(Like.objects.filter(user=self.user, article=self.article).exists())
+        self.assertEqual(_refresh(self.article).like_count, 1)
+
+    def test_only_latest_toggle_is_flushed(self):
+        for _ in range(3):
+            self.client.post('/social/like/buffered/')
+        like_buffer.flush()
+        self.assertEqual(Like.objects.count(), 1)
+
+        self.client.post('/social/like/buffered/')
+        like_buffer.flush()
+        self.assertFalse(Like.objects.exists())
+        self.assertEqual(_refresh(self.article).like_count, 0)
+
+    def test_flush_is_idempotent(self):
+        self.client.post('/social/like/buffered/')
+        self.assertEqual(like_buffer.flush(), 1)
+        self.assertEqual(like_buffer.flush(), 0)
+        self.assertEqual(Like.objects.count(), 1)
+        self.assertEqual(_refresh(self.article).like_count, 1)
+
+    def test_interrupted_flush_is_replayed(self):
+        self.client.post('/social/like/buffered/')
+        # 模拟上次落库在取出待落库操作后中断：遗留的批次在下次落库时重放，新的操作留到再下一次
+        flushing_key, pending = like_buffer._take_pending()
+        self.assertEqual(len(pending), 1)
+        other = self.login(self.create_user('other'))
+        self.client.post('/social/like/buffered/')
+
+        self.assertEqual(like_buffer.flush(), 1)
+        self.assertEqual(list(Like.objects.values_list('user_id', flat=True)), [self.user.id])
+        self.assertEqual(like_buffer.flush(), 1)
+        self.assertEqual(Like.objects.filter(user=other).count(), 1)
+        self.assertEqual(_refresh(self.article).like_count, 2)
+
+    def test_buffer_is_loaded_from_database(self):
+        Like.objects.create(user=self.user, article=self.article)
+        Article.objects.filter(pk=self.article.pk).update(like_count=1)
+        # 已点赞的用户再次切换是取消
+        self.assertEqual(self.client.post('/social/like/buffered/').status_code, 200)
+        like_buffer.flush()
+        self.assertFalse(Like.objects.exists())
+
+    def test_deleted_article_is_skipped(self):
+        self.client.post('/social/like/buffered/')
+        self.client.post(f'/social/collect/{self.collection.id}/buffered/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.delete()
+        like_buffer.flush()
+        collect_buffer.flush()
+        self.assertFalse(Like.objects.exists())
+        self.assertFalse(CollectionItem.objects.exists())
+
+    def test_collect_is_buffered(self):
+        url = f'/social/collect/{self.collection.id}/buffered/'
+        self.assertEqual(self.client.post(url).status_code, 201)
+        self.assertEqual(collect_buffer.flush(), 1)
+        self.assertTrue(CollectionItem.objects.filter(collection=self.collection, article=self.article).exists())
+        self.assertEqual(_refresh(self.article).favorite_count, 1)
+
+    def test_is_liked_reads_buffer(self):
+        self.client.post('/social/like/buffered/')
+        self.assertTrue(self.client.get('/articles/buffered/').data['is_liked'])
+
+
+class CollectionOwnershipTests(RedisAPITestCase):
+    """ 只能把文章收藏到自己的收藏夹 """
+
+    def setUp(self):
+        super().setUp()
+        self.article = self.create_article(self.create_user('author'), 'owned')
+        self.owner = self.create_user('owner')
+        self.collection = Collection.objects.create(user=self.owner, name='mine')
+        self.login(self.create_user('intruder'))
+
+    def test_other_users_collection(self):
+        for write_behind in (True, False):
+            with self.subTest(write_behind=write_behind), override_settings(SOCIAL_WRITE_BEHIND=write_behind):
+                self.assertEqual(self.client.post(f'/social/collect/{self.collection.id}/owned/').status_code, 404)
+                self.assertEqual(self.client.post('/social/collect/999999/owned/').status_code, 404)
+        collect_buffer.flush()
+        self.assertFalse(CollectionItem.objects.exists())
+        self.assertEqual(_refresh(self.article).favorite_count, 0)
+
+
+class FollowCounterTests(RedisAPITestCase):
+    """ 关注切换与作者卡片中的粉丝数 """
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.create_article(self.author, 'card')
+        self.reader = self.login(self.create_user('reader'))
+
+    def _followers(self):
+        return self.client.get(f'/users/info/?user_id={self.author.id}').data['followers']
+
+    def test_follow_toggle_counters(self):
+        self.assertEqual(self._followers(), 0)  # 写入响应缓存
+        self.assertEqual(self.client.post(f'/social/follow/{self.author.id}/').status_code, 201)
+        self.assertEqual((_refresh(self.author).follower_count, _refresh(self.reader).following_count), (1, 1))
+        self.assertEqual(self._followers(), 1)
+        self.assertEqual(self.client.get('/articles/').data['results'][0]['author']['followers'], 1)
+
+        self.assertEqual(self.client.post(f'/social/follow/{self.author.id}/').status_code, 200)
+        self.assertEqual((_refresh(self.author).follower_count, _refresh(self.reader).following_count), (0, 0))
+        self.assertEqual(self._followers(), 0)
+
+    def test_cannot_follow_self_or_missing_user(self):
+        self.assertEqual(self.client.post(f'/social/follow/{self.reader.id}/').status_code, 400)
+        self.assertEqual(self.client.post('/social/follow/999999/').status_code, 400)
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(_refresh(self.reader).following_count, 0)
+
+    def test_article_list_does_not_count_per_author(self):
+        for index in range(5):
+            self.create_article(self.create_user(f'writer{index}'), f'post-{index}')
+        with CaptureQueriesContext(connection) as few:
+            self.client.get('/articles/?no_cache=1')
+        for index in range(5):
+            self.create_article(self.create_user(f'more{index}'), f'more-{index}')
+        with CaptureQueriesContext(connection) as more:
+            self.client.get('/articles/?no_cache=2')
+        # 作者卡片的计数随 select_related 一并读取，查询数不随作者数量增长
+        self.assertEqual(len(few), len(more))
+
+
+class CommentFieldsTests(RedisAPITestCase):
+    """ 评论列表的 ?fields= 与 ?expand=user """
+
+    def setUp(self):
+        super().setUp()
+        author = self.create_user('author')
+        self.article = self.create_article(author, 'commented')
+        self.user = self.create_user('reader')
+        for index in range(3):
+            parent = Comment.objects.create(user=self.user, article=self.article, content=f'c{index}')
+            Comment.objects.create(user=author, article=self.article, content=f'r{index}', parent=parent)
+
+    def test_default_and_expanded_user(self):
+        result = self.client.get('/social/comment/commented/').data['results'][0]
+        self.assertEqual(result['user'], 'reader')
+        result = self.client.get('/social/comment/commented/?expand=user').data['results'][0]
+        self.assertEqual((result['user']['id'], result['user']['username']), (self.user.id, 'reader'))
+        self.assertIn('followers', result['user'])
+        # 嵌套的二级回复不受最外层参数影响
+        self.assertEqual(result['replies'][0]['user'], 'author')
+
+    def test_fields_skip_joins(self):
+        with CaptureQueriesContext(connection) as full:
+            self.client.get('/social/comment/commented/')
+        with CaptureQueriesContext(connection) as sparse:
+            results = self.client.get('/social/comment/commented/?fields=comment_id,content').data['results']
+        self.assertEqual(results[0], {'comment_id': results[0]['comment_id'], 'content': 'c0'})
+        # 不连接用户表，也不查询二级回复
+        self.assertFalse(any('tb_custom_user' in query['sql'] for query in sparse))
+        self.assertLess(len(sparse), len(full))
@@ -1,26 +1,66 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from rest_framework.exceptions import NotFound
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import serializers, generics, status
 from services import permissions
+from services.cache_utils import cache_version_service
+from services.response_cache import viewer_scope
+from services.serializers import field_requested
+from .buffers import like_buffer, collect_buffer
 from .models import Like, Collection, CollectionItem, Comment, Follow
 from .serializers import CollectionSerializer, LikeSerializer, CommentArticleSerializer, CommentUserSerializer, \
     ReplySerializer, FollowListSerializer
+from articles.hot import hot_ranking
 from articles.models import Article
+from articles.slugs import article_slug_resolver
+from articles.tasks import sync_follow_feed, bump_article_cache_versions
 
 User = get_user_model()
 
 
+def bump_toggle_cache_versions(slug, user_id):
+    """
+    点赞/收藏后同步更新文章详情、全局列表和操作者个人状态的缓存版本号（一次写入，不查询数据库），
+    计数和 is_liked 的变化立即可见，操作者的条件请求不会再得到 304；
+    作者、标签作用域需要查询文章的作者和标签，直接写模式由异步任务更新，写回模式在落库时统一更新
+    """
+    cache_version_service.bump('articles', f'article:{slug}', viewer_scope(user_id))
+
+
 class LikeToggleView(APIView):
     """ 点赞/取消点赞视图 """
 
+    @staticmethod
+    def _toggle(user, article_id):
+        """ 直接写数据库，返回 True 表示点赞，False 表示取消 """
+        with transaction.atomic():
+            like, created = Like.objects.get_or_create(user=user, article_id=article_id)
+            if not created:
+                # 并发重复取消时，只有真正删除了记录才递减计数
+                deleted, _ = like.delete()
+                if deleted:
+                    Article.incr_counter(article_id, 'like_count', -1)
+                return False
+            Article.incr_counter(article_id, 'like_count')
+        return True
+
     def post(self, request, slug):
         user = request.user
-        article = Article.objects.get(slug=slug)
-        like, created = Like.objects.get_or_create(user=user, article=article)
+        # 只解析出文章 id，不加载文章行
+        article_id = article_slug_resolver.resolve_or_404(slug)
+        if settings.SOCIAL_WRITE_BEHIND:
+            # 写回模式：只记录到 Redis 缓冲，由定时任务批量落库并更新作者、标签作用域的缓存版本号
+            created = like_buffer.toggle(article_id, user.id)
+        else:
+            created = self._toggle(user, article_id)
+            bump_article_cache_versions.delay(article_id)
+        bump_toggle_cache_versions(slug, user.id)
+        hot_ranking.record(article_id, 'like', 1 if created else -1)
         if not created:
-            like.delete()
             return Response({"detail": "取消点赞成功"}, status=status.HTTP_200_OK)
         return Response({"detail": "点赞成功"}, status=status.HTTP_201_CREATED)
 
@@ -73,11 +113,34 @@ class CollectionDetailView(generics.RetrieveUpdateDestroyAPIView):
 class CollectionToggleView(APIView):
     """ 文章收藏/取消收藏视图 """
 
+    @staticmethod
+    def _toggle(collection_id, article_id):
+        """ 直接写数据库，返回 True 表示收藏，False 表示取消 """
+        with transaction.atomic():
+            collect_item, created = CollectionItem.objects.get_or_create(
+                collection_id=collection_id, article_id=article_id
+            )
+            if not created:
+                deleted, _ = collect_item.delete()
+                if deleted:
+                    Article.incr_counter(article_id, 'favorite_count', -1)
+                return False
+            Article.incr_counter(article_id, 'favorite_count')
+        return True
+
     def post(self, request, collection_id, slug):
-        article = Article.objects.get(slug=slug)
-        collect_item, created = CollectionItem.objects.get_or_create(collection_id=collection_id, article=article)
+        # 只能操作自己的收藏夹；写回模式下要在写入缓冲前检查，落库时不再校验归属
+        if not Collection.objects.filter(id=collection_id, user=request.user).exists():
+            raise NotFound("收藏夹不存在")
+        article_id = article_slug_resolver.resolve_or_404(slug)
+        if settings.SOCIAL_WRITE_BEHIND:
+            created = collect_buffer.toggle(article_id, collection_id)
+        else:
+            created = self._toggle(collection_id, article_id)
+            bump_article_cache_versions.delay(article_id)
+        bump_toggle_cache_versions(slug, request.user.id)
+        hot_ranking.record(article_id, 'collect', 1 if created else -1)
         if not created:
-            collect_item.delete()
             return Response({"detail": "取消收藏成功"}, status=status.HTTP_200_OK)
         return Response({"detail": "收藏成功"}, status=status.HTTP_201_CREATED)
 
@@ -88,11 +151,20 @@ class CommentArticleListView(generics.ListAPIView):
     permission_classes = [AllowAny]  # 所有人可见
 
     def get_queryset(self):
-        article_slug = self.kwargs.get("slug")
-        return Comment.objects.filter(
-            article__slug=article_slug,
+        # 按文章 id 过滤，命中 (article, parent, created_at) 索引，无需关联文章表
+        article_id = article_slug_resolver.resolve(self.kwargs.get("slug"))
+        if article_id is None:
+            return Comment.objects.none()
+        queryset = Comment.objects.filter(
+            article_id=article_id,
             parent__isnull=True  # 一级评论
-        ).prefetch_related("replies__user").order_by("created_at")
+        ).order_by("created_at")
+        # ?fields 中不含用户或二级回复时不连接用户表、不预取回复
+        if field_requested(self.request, "user"):
+            queryset = queryset.select_related("user")
+        if field_requested(self.request, "replies"):
+            queryset = queryset.prefetch_related("replies__user")
+        return queryset
 
 
 class CommentRepliesView(generics.ListAPIView):
@@ -103,7 +175,10 @@ class CommentRepliesView(generics.ListAPIView):
 
     def get_queryset(self):
         comment_id = self.kwargs.get("comment_id")
-        return Comment.objects.filter(parent_id=comment_id).select_related("user").order_by("created_at")
+        queryset = Comment.objects.filter(parent_id=comment_id).order_by("created_at")
+        if field_requested(self.request, "user"):
+            queryset = queryset.select_related("user")
+        return queryset
 
 
 class CommentUserCreateView(generics.CreateAPIView):
@@ -111,9 +186,12 @@ class CommentUserCreateView(generics.CreateAPIView):
     serializer_class = CommentUserSerializer
 
     def perform_create(self, serializer):
-        article_slug = self.kwargs['slug']
-        article = Article.objects.get(slug=article_slug)
-        serializer.save(user=self.request.user, article=article)
+        article_id = article_slug_resolver.resolve_or_404(self.kwargs['slug'])
+        with transaction.atomic():
+            serializer.save(user=self.request.user, article_id=article_id)
+            Article.incr_counter(article_id, 'comment_count')
+        bump_article_cache_versions.delay(article_id)
+        hot_ranking.record(article_id, 'comment')
 
 
 class CommentUserDestroyView(generics.DestroyAPIView):
@@ -125,6 +203,15 @@ class CommentUserDestroyView(generics.DestroyAPIView):
     def get_queryset(self):
         return Comment.objects.filter(user=self.request.user)
 
+    def perform_destroy(self, instance):
+        # 删除一级评论会级联删除其下的二级回复，计数需要一并扣除
+        with transaction.atomic():
+            removed = 1 + instance.replies.count()
+            instance.delete()
+            Article.incr_counter(instance.article_id, 'comment_count', -removed)
+        bump_article_cache_versions.delay(instance.article_id)
+        hot_ranking.record(instance.article_id, 'comment', -removed)
+
 
 class FollowUserToggleView(APIView):
     """ 用户订阅/取消订阅视图 """
@@ -138,9 +225,22 @@ class FollowUserToggleView(APIView):
         except User.DoesNotExist:
             raise serializers.ValidationError({"following": "您关注的用户不存在"})
 
-        follow, created = Follow.objects.get_or_create(follower=follower, following=following)
+        with transaction.atomic():
+            follow, created = Follow.objects.get_or_create(follower=follower, following=following)
+            if created:
+                delta = 1
+            else:
+                # 并发取消时只有真正删除了记录的请求才扣减计数
+                deleted, _ = Follow.objects.filter(pk=follow.pk).delete()
+                delta = -1 if deleted else 0
+            if delta:
+                User.incr_counter(following.id, 'follower_count', delta)
+                User.incr_counter(follower.id, 'following_count', delta)
+        # 作者卡片中的粉丝数发生变化
+        cache_version_service.bump(f'author:{following.id}')
+        if delta:
+            sync_follow_feed.delay(follower.id, following.id, created)
         if not created:
-            follow.delete()
             return Response({"detail": "取消关注成功"}, status=status.HTTP_200_OK)
         return Response({"detail": "关注成功"}, status=status.HTTP_201_CREATED)
 
@@ -0,0 +1,86 @@
+import io
+import statistics
+import time
+
+import numpy as np
+from PIL import Image
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from services import images
+
+# 未指定图片时生成的手机照片尺寸
+SYNTHETIC_SIZES = ((1200, 900), (3000, 2000), (4032, 3024))
+
+
+def _synthetic_photo(width, height):
+    """ 渐变背景叠加噪声，近似相机照片的可压缩程度 """
+    rng = np.random.default_rng(width * height)
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack([x * 255 / width, y * 255 / height, (x + y) * 127 / (width + height)], axis=-1)
+    pixels = np.clip(base + rng.normal(0, 24, base.shape), 0, 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels, 'RGB').save(buffer, format='JPEG', quality=92)
+    return buffer.getvalue()
+
+
+def _legacy(data, max_bytes):
+    """ 原同步实现：全尺寸解码，质量从 95 开始每次降 5 直到满足体积，返回 (字节串, 编码次数) """
+    image = Image.open(io.BytesIO(data)).convert('RGB')
+    quality, encodes = 95, 0
+    while True:
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', optimize=True, quality=quality)
+        encodes += 1
+        if buffer.tell() <= max_bytes or quality <= 20:
+            return buffer.getvalue(), encodes
+        quality -= 5
+
+
+def _current(data, max_bytes):
+    """ 现实现：draft 解码 + 缩小到 AVATAR_MAX_SIZE + 二分质量，返回 (字节串, 编码次数) """
+    image = images.downscale(images.open_image(io.BytesIO(data), max_side=settings.AVATAR_MAX_SIZE),
+                             settings.AVATAR_MAX_SIZE)
+    encodes = 0
+    save = image.save
+
+    def counting_save(*args, **kwargs):
+        nonlocal encodes
+        encodes += 1
+        return save(*args, **kwargs)
+
+    image.save = counting_save
+    return images.encode_jpeg_within(image, max_bytes)[1], encodes
+
+
+class Command(BaseCommand):
+    help = "对比头像原同步压缩循环与现实现（draft 解码、缩小、二分质量）的 CPU 耗时、输出体积和编码次数"
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', help="参与测试的图片路径，不指定时使用合成的相机照片")
+        parser.add_argument('--rounds', type=int, default=3, help="每张图片重复压缩的次数")
+
+    def handle(self, *args, **options):
+        samples = []
+        for path in options['paths']:
+            try:
+                with open(path, 'rb') as f:
+                    samples.append((path, f.read()))
+            except OSError as e:
+                raise CommandError(f"无法读取 {path}: {e}")
+        if not samples:
+            samples = [(f'synthetic {w}x{h}', _synthetic_photo(w, h)) for w, h in SYNTHETIC_SIZES]
+
+        max_bytes = settings.AVATAR_MAX_BYTES
+        for label, data in samples:
+            self.stdout.write(f"{label}（{len(data) / 1024:.0f}KB）")
+            for name, compress in (('原实现', _legacy), ('现实现', _current)):
+                timings = []
+                for _ in range(options['rounds']):
+                    start = time.process_time()
+                    output, encodes = compress(data, max_bytes)
+                    timings.append((time.process_time() - start) * 1000)
+                self.stdout.write(
+                    f"  {name}: CPU 平均 {statistics.mean(timings):.1f}ms，"
+                    f"输出 {len(output) / 1024:.0f}KB，编码 {encodes} 次"
+                )
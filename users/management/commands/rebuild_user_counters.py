@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery, IntegerField
+from django.db.models.functions import Coalesce
+
+from articles.models import Article
+from social.models import Follow
+
+User = get_user_model()
+
+
+def _count_subquery(model, field):
+    """ 按用户分组统计关联记录数量的子查询 """
+    subquery = (
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(subquery, output_field=IntegerField()), 0)
+
+
+class Command(BaseCommand):
+    help = "根据关注、文章记录重建用户的粉丝数、关注数、文章数"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="每批更新的用户数量")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+
+        # 按主键分批更新，避免一次性长时间锁表
+        updated = 0
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            updated += User.objects.filter(pk__in=batch).update(
+                follower_count=_count_subquery(Follow, 'following'),
+                following_count=_count_subquery(Follow, 'follower'),
+                article_count=_count_subquery(Article, 'author'),
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"已重建 {updated} 个用户的计数"))
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import F
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
 from django.utils import timezone
@@ -10,6 +11,11 @@ from services.oauth import CONTACT_CHOICES
 
 
 class CustomUser(AbstractUser):
+    class AvatarStatus(models.TextChoices):
+        READY = 'ready', '已处理'
+        PENDING = 'pending', '处理中'
+        FAILED = 'failed', '处理失败'
+
     bio = models.CharField(max_length=255, default='该用户暂未填写简介', null=True, blank=True, verbose_name="个人简介")
     avatar = models.ImageField(
         upload_to='avatar/',
@@ -18,10 +24,21 @@ class CustomUser(AbstractUser):
         blank=True,
         verbose_name="头像"
     )
+    # 头像派生图 {格式: {宽度: 存储路径}}，上传后由 celery 任务生成（见 services.images）
+    avatar_derivatives = models.JSONField(default=dict, blank=True, editable=False, verbose_name="头像派生图")
+    # 上传后先保存原始文件，由 celery 任务压缩完成后置为 ready
+    avatar_status = models.CharField(
+        max_length=16, choices=AvatarStatus.choices, default=AvatarStatus.READY, verbose_name="头像处理状态"
+    )
     is_active_account = models.BooleanField(default=False)  # 用户是否激活（业务逻辑用，系统的 is_activate 保留，用作系统逻辑）
     is_deleted = models.BooleanField(default=False)
     deleted_at = models.DateTimeField(null=True, blank=True)
 
+    # 冗余计数字段，避免作者卡片和用户信息逐个 COUNT
+    follower_count = models.PositiveIntegerField(default=0, verbose_name="粉丝数")
+    following_count = models.PositiveIntegerField(default=0, verbose_name="关注数")
+    article_count = models.PositiveIntegerField(default=0, verbose_name="文章数")
+
     class Meta:
         db_table = 'tb_custom_user'
         verbose_name = '用户'
@@ -30,6 +47,14 @@ class CustomUser(AbstractUser):
     def __str__(self):
         return self.username
 
+    @classmethod
+    def incr_counter(cls, user_id, field, delta=1):
+        """ 原子更新冗余计数字段，递减时不会减到负数 """
+        qs = cls.objects.filter(pk=user_id)
+        if delta < 0:
+            qs = qs.filter(**{f'{field}__gte': -delta})
+        return qs.update(**{field: F(field) + delta})
+
 
 class UserContact(models.Model):
     user = models.ForeignKey(
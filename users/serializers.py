@@ -1,15 +1,17 @@
-import io
+import os
 import uuid
 
-from PIL import Image
 from django.contrib import auth
 from django.contrib.auth import get_user_model, authenticate
-from django.core.files.base import ContentFile
+from django.db import transaction
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 from services import auth, oauth
 from services.auth import CaptchaValidateMixin
+from services.images import build_srcset
+from services.serializers import DynamicFieldsMixin
 from users.models import UserContact
+from users.tasks import compress_avatar
 
 User = get_user_model()
 
@@ -210,7 +212,7 @@ class UserContactSerializer(serializers.ModelSerializer):
         return user_contact
 
 
-class UserInfoSerializer(serializers.ModelSerializer):
+class UserInfoSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """ 用户信息序列化器 """
     username = serializers.CharField(
         required=False,
@@ -218,25 +220,36 @@ class UserInfoSerializer(serializers.ModelSerializer):
     )
     # 邮箱的修改单独通过其他接口验证
     email = serializers.EmailField(read_only=True)
-    followers = serializers.IntegerField(source="followers.count", read_only=True)
-    articles_count = serializers.IntegerField(source="articles.count", read_only=True)
+    followers = serializers.IntegerField(source="follower_count", read_only=True)
+    articles_count = serializers.IntegerField(source="article_count", read_only=True)
+    avatar_srcset = serializers.SerializerMethodField(read_only=True)  # 头像派生图 {格式: srcset}
 
     class Meta:
         model = User
-        fields = ['id', 'username', 'bio', 'last_name', 'first_name', 'email', 'articles_count', 'followers']
+        fields = ['id', 'username', 'bio', 'last_name', 'first_name', 'email', 'articles_count', 'followers',
+                  'avatar_srcset']
         extra_kwargs = {
             'id': {'read_only': True}
         }
 
+    def get_avatar_srcset(self, obj):
+        return build_srcset(obj.avatar_derivatives)
+
 
 class UserAvatarSerializer(serializers.ModelSerializer):
+    avatar_srcset = serializers.SerializerMethodField(read_only=True)  # 派生图生成前为空
+
     class Meta:
         model = User
-        fields = ['id', 'avatar']
+        fields = ['id', 'avatar', 'avatar_srcset', 'avatar_status']
         extra_kwargs = {
-            'id': {'read_only': True}
+            'id': {'read_only': True},
+            'avatar_status': {'read_only': True},
         }
 
+    def get_avatar_srcset(self, obj):
+        return build_srcset(obj.avatar_derivatives)
+
     def validate(self, attrs):
         avatar_file = attrs.get("avatar")
         if avatar_file:
@@ -254,41 +267,29 @@ class UserAvatarSerializer(serializers.ModelSerializer):
         return attrs
 
     @staticmethod
-    def _process_image(uploaded_file, target_size=400 * 1024):
-        # 打开图片
-        img = Image.open(uploaded_file)
-        img = img.convert("RGB")  # 避免 PNG 转 JPG 出错
-
-        # 压缩循环（保证小于400KB）
-        quality = 95
-        while True:
-            buffer = io.BytesIO()
-            img.save(buffer, format="JPEG", optimize=True, quality=quality)
-            size = buffer.tell()
-            if size <= target_size or quality <= 20:
-                break
-            quality -= 5
-
-        buffer.seek(0)
-        return buffer  # 可以直接传给 MinIO 客户端上传
-
-    def create(self, validated_data):
-        avatar_file = validated_data.get("avatar")
-        buffer = self._process_image(avatar_file)
+    def _stash_upload(validated_data):
+        """ 原始上传文件直接存储（流式写入，不在请求线程中解码或编码图片），状态置为处理中 """
+        avatar_file = validated_data["avatar"]
+        extension = os.path.splitext(avatar_file.name)[1].lower()[:8]
+        avatar_file.name = f"{uuid.uuid4().hex}{extension}"
+        validated_data["avatar_status"] = User.AvatarStatus.PENDING
 
-        # 生成唯一文件名
-        filename = f"{uuid.uuid4().hex}.jpg"
+    @staticmethod
+    def schedule(instance):
+        # 压缩和派生图由 celery 异步处理
+        name = instance.avatar.name
+        transaction.on_commit(lambda: compress_avatar.delay(instance.id, name))
 
-        # Django 默认使用 DEFAULT_FILE_STORAGE 上传到 MinIO
-        validated_data["avatar"] = ContentFile(buffer.read(), name=filename)
-        return super().create(validated_data)
+    def create(self, validated_data):
+        self._stash_upload(validated_data)
+        instance = super().create(validated_data)
+        self.schedule(instance)
+        return instance
 
     def update(self, instance, validated_data):
-        avatar_file = validated_data.get("avatar")
-        buffer = self._process_image(avatar_file)
-
-        filename = f"{instance.id}.jpg"
-        validated_data["avatar"] = ContentFile(buffer.read(), name=filename)
-        return super().update(instance, validated_data)
+        self._stash_upload(validated_data)
+        instance = super().update(instance, validated_data)
+        self.schedule(instance)
+        return instance
 
 # TODO: 文件去重
\ No newline at end of file
@@ -1,18 +1,57 @@
+import uuid
+
+from PIL import Image
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.utils import timezone
 from rest_framework_simplejwt.token_blacklist.models import OutstandingToken, BlacklistedToken
 
 from articles.models import Article, ReadingHistory
 from mysite.celery import app
+from services import images
+from services.cache_utils import cache_version_service
 
 User = get_user_model()
 
-# TODO:异步任务缩略图
+
+def _compress_raw_avatar(user_id, name):
+    """ 将原始上传缩放、压缩为 JPEG 并替换头像字段，返回新的存储路径；头像已被再次替换时返回 None """
+    users = User.objects.filter(pk=user_id, avatar=name)
+    try:
+        with default_storage.open(name, 'rb') as f:
+            data = images.compress_image(f, settings.AVATAR_MAX_SIZE, settings.AVATAR_MAX_BYTES)
+    except (OSError, Image.DecompressionBombError):
+        # 无法识别或像素过多的图片：恢复默认头像
+        users.update(avatar=User._meta.get_field('avatar').default, avatar_status=User.AvatarStatus.FAILED)
+        default_storage.delete(name)
+        return None
+
+    new_name = default_storage.save(f'avatar/{uuid.uuid4().hex}.jpg', ContentFile(data))
+    if not users.update(avatar=new_name, avatar_status=User.AvatarStatus.READY):
+        default_storage.delete(new_name)
+        return None
+    default_storage.delete(name)
+    return new_name
+
 
 @app.task
-def compress_avatar():
-    """ 生成用户上传图片的缩略图 """
-    pass
+def compress_avatar(user_id, name):
+    """
+    处理用户上传的头像：原始上传先压缩为不超过 AVATAR_MAX_SIZE 像素、AVATAR_MAX_BYTES 字节的 JPEG，
+    再生成各尺寸的 JPEG / WebP 正方形派生图；头像已被再次替换时跳过
+    """
+    status = User.objects.filter(pk=user_id, avatar=name).values_list('avatar_status', flat=True).first()
+    if status is None:
+        return
+    if status == User.AvatarStatus.PENDING:
+        name = _compress_raw_avatar(user_id, name)
+        if name is None:
+            return
+    if images.refresh_derivatives(User.objects.filter(pk=user_id), 'avatar', 'avatar_derivatives', name, square=True):
+        # 作者卡片和用户信息中的头像 srcset 发生变化
+        cache_version_service.bump(f'author:{user_id}')
 
 
 @app.task
@@ -1,3 +1,285 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+import time
+from unittest import mock
 
-# Create your tests here.
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from storages.backends.s3 import S3Storage
+
+from services import images
+from services.storage import DirectUploadService, UploadError
+from services.testing import RedisAPITestCase
+from social.models import Follow
+from users.tasks import compress_avatar
+
+User = get_user_model()
+
+
+def _png(size=(8, 8)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+@override_settings(DIRECT_UPLOAD_EXPIRE_SECONDS=600, DIRECT_UPLOAD_MAX_BYTES=1024)
+class DirectUploadCompleteTests(SimpleTestCase):
+    """ 直传回调：token 校验、对象键前缀和体积限制 """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.storage = FileSystemStorage(location=self.root)
+        self.service = DirectUploadService(storage=self.storage)
+
+    def _token(self, key, kind='avatar', user=1, target=None):
+        return signing.dumps({'kind': kind, 'key': key, 'user': user, 'target': target}, salt=DirectUploadService.SALT)
+
+    def _upload(self, key, data):
+        return self.storage.save(key, ContentFile(data))
+
+    def test_complete(self):
+        key = self._upload('avatar/a.png', _png())
+        self.assertEqual(self.service.complete(self._token(key), 'avatar', 1), key)
+
+    def test_forged_token(self):
+        key = self._upload('avatar/a.png', _png())
+        forged = signing.dumps({'kind': 'avatar', 'key': key, 'user': 1, 'target': None}, salt='other')
+        for token in (forged, self._token(key)[:-1] + 'x', 'garbage'):
+            with self.assertRaisesMessage(UploadError, "上传凭证无效或已过期"):
+                self.service.complete(token, 'avatar', 1)
+
+    def test_expired_token(self):
+        key = self._upload('avatar/a.png', _png())
+        token = self._token(key)
+        with mock.patch('django.core.signing.time.time', return_value=time.time() + 600 * 2 + 1):
+            with self.assertRaisesMessage(UploadError, "上传凭证无效或已过期"):
+                self.service.complete(token, 'avatar', 1)
+
+    def test_token_of_other_user_or_purpose(self):
+        key = self._upload('avatar/a.png', _png())
+        with self.assertRaises(UploadError):
+            self.service.complete(self._token(key, user=2), 'avatar', 1)
+        with self.assertRaises(UploadError):
+            self.service.complete(self._token(key, kind='cover', target=5), 'avatar', 1)
+
+    def test_key_outside_prefix(self):
+        for key in ('cover/a.png', 'other.png', 'avatar/sub/a.png', 'avatar/../cover/a.png'):
+            with self.assertRaisesMessage(UploadError, "上传凭证无效或已过期"):
+                self.service.complete(self._token(key), 'avatar', 1)
+        # 前缀外的对象不会被校验或删除
+        key = self._upload('cover/a.png', b'not an image')
+        with self.assertRaises(UploadError):
+            self.service.complete(self._token(key), 'avatar', 1)
+        self.assertTrue(self.storage.exists(key))
+
+    def test_oversized_upload(self):
+        key = self._upload('avatar/big.png', _png() + b'\0' * 2048)
+        with self.assertRaisesMessage(UploadError, "文件过大"):
+            self.service.complete(self._token(key), 'avatar', 1)
+        self.assertFalse(self.storage.exists(key))
+
+    def test_not_an_image(self):
+        key = self._upload('avatar/a.png', b'<svg></svg>')
+        with self.assertRaisesMessage(UploadError, "无法识别的图片文件"):
+            self.service.complete(self._token(key), 'avatar', 1)
+        self.assertFalse(self.storage.exists(key))
+
+    def test_missing_object(self):
+        with self.assertRaisesMessage(UploadError, "文件尚未上传完成"):
+            self.service.complete(self._token('avatar/missing.png'), 'avatar', 1)
+
+
+@override_settings(DIRECT_UPLOAD_EXPIRE_SECONDS=600, DIRECT_UPLOAD_MAX_BYTES=1024)
+class DirectUploadPresignTests(SimpleTestCase):
+    """ 签发上传策略（boto3 在本地签名，不访问对象存储） """
+
+    def setUp(self):
+        storage = S3Storage(
+            access_key='test', secret_key='test', bucket_name='bucket', endpoint_url='http://127.0.0.1:9000'
+        )
+        self.service = DirectUploadService(storage=storage)
+
+    def test_presign(self):
+        policy = self.service.presign('avatar', 'image/png', 1)
+        self.assertRegex(policy['key'], r'^avatar/[0-9a-f]{32}\.png$')
+        self.assertEqual(policy['fields']['key'], policy['key'])
+        self.assertEqual(policy['fields']['Content-Type'], 'image/png')
+        self.assertEqual(policy['expires_in'], 600)
+        payload = signing.loads(policy['token'], salt=DirectUploadService.SALT)
+        self.assertEqual(payload, {'kind': 'avatar', 'key': policy['key'], 'user': 1, 'target': None})
+
+    def test_presign_rejects_content_type(self):
+        with self.assertRaisesMessage(UploadError, "不支持的图片类型"):
+            self.service.presign('avatar', 'image/svg+xml', 1)
+
+    def test_presign_requires_s3(self):
+        service = DirectUploadService(storage=FileSystemStorage(location=tempfile.gettempdir()))
+        with self.assertRaisesMessage(UploadError, "当前存储不支持直传"):
+            service.presign('avatar', 'image/png', 1)
+
+
+class UserCounterTests(RedisAPITestCase):
+    """ 用户的粉丝数、关注数、文章数冗余计数 """
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.reader = self.login(self.create_user('reader'))
+
+    def test_article_count_follows_create_and_delete(self):
+        article = self.create_article(self.author, 'one')
+        self.create_article(self.author, 'two')
+        self.assertEqual(self.client.get(f'/users/info/?user_id={self.author.id}').data['articles_count'], 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            article.delete()
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.article_count, 1)
+        self.assertEqual(self.client.get(f'/users/info/?user_id={self.author.id}').data['articles_count'], 1)
+
+    def test_rebuild_user_counters(self):
+        self.create_article(self.author, 'one')
+        Follow.objects.create(follower=self.reader, following=self.author)
+        User.objects.update(follower_count=5, following_count=5, article_count=5)
+
+        call_command('rebuild_user_counters', batch_size=1, stdout=io.StringIO())
+        counts = {
+            user.username: (user.follower_count, user.following_count, user.article_count)
+            for user in User.objects.all()
+        }
+        self.assertEqual(counts, {'author': (1, 0, 1), 'reader': (0, 1, 0)})
+
+
+class MediaStorageMixin:
+    """ 用例期间默认存储指向临时目录 """
+
+    def setUp(self):
+        super().setUp()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        self.enterContext(override_settings(STORAGES={
+            'default': {
+                'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                'OPTIONS': {'location': media, 'base_url': '/media/'},
+            },
+            'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+        }))
+
+
+class AvatarDerivativeTests(MediaStorageMixin, RedisAPITestCase):
+    """ 头像的正方形派生图与 srcset """
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.login(self.create_user('author'))
+
+    def test_square_derivatives(self):
+        name = default_storage.save('avatar/face.png', ContentFile(_png((600, 300))))
+        User.objects.filter(pk=self.user.pk).update(avatar=name)
+        compress_avatar(self.user.id, name)
+        self.user.refresh_from_db()
+        self.assertEqual(set(self.user.avatar_derivatives['webp']), {'64', '200'})
+        with default_storage.open(self.user.avatar_derivatives['jpeg']['200']) as f:
+            self.assertEqual(Image.open(f).size, (200, 200))
+
+        srcset = self.client.get(f'/users/info/?user_id={self.user.id}').data['avatar_srcset']
+        self.assertEqual(srcset['webp'], '/media/avatar/derivatives/face/64.webp 64w, '
+                                         '/media/avatar/derivatives/face/200.webp 200w')
+        self.create_article(self.user, 'card')
+        self.assertEqual(self.client.get('/articles/').data['results'][0]['author']['avatar_srcset'], srcset)
+
+
+def _noise_jpeg(size):
+    """ 难以压缩的随机噪声图，体积随质量明显变化 """
+    buffer = io.BytesIO()
+    Image.effect_noise(size, 64).convert('RGB').save(buffer, format='JPEG', quality=95)
+    return buffer.getvalue()
+
+
+@override_settings(AVATAR_MAX_SIZE=400, AVATAR_MAX_BYTES=30 * 1024)
+class AvatarCompressionTests(MediaStorageMixin, RedisAPITestCase):
+    """ 头像上传只存原始文件，由 celery 任务缩放并二分质量压缩 """
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.login(self.create_user('author'))
+
+    def _upload(self, data, name='face.jpg', content_type='image/jpeg'):
+        return self.client.put(
+            '/users/info/avatar/', {'avatar': SimpleUploadedFile(name, data, content_type)}, format='multipart'
+        )
+
+    def test_upload_is_compressed_in_background(self):
+        response = self._upload(_noise_jpeg((1200, 900)))
+        self.assertEqual((response.status_code, response.data['avatar_status']), (202, 'pending'))
+        self.user.refresh_from_db()
+        raw = self.user.avatar.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._upload(_noise_jpeg((1200, 900)))
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.avatar_status, User.AvatarStatus.READY)
+        self.assertTrue(self.user.avatar.name.endswith('.jpg'))
+        with default_storage.open(self.user.avatar.name) as f:
+            data = f.read()
+        self.assertLessEqual(len(data), 30 * 1024)
+        image = Image.open(io.BytesIO(data))
+        self.assertEqual((image.format, image.size), ('JPEG', (400, 300)))
+        self.assertTrue(self.user.avatar_derivatives)
+        # 第一次上传的任务迟到执行时头像已被替换，不会覆盖新头像
+        self.assertTrue(default_storage.exists(raw))
+        current = self.user.avatar.name
+        compress_avatar(self.user.id, raw)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.avatar.name, current)
+
+    def test_rejects_non_image(self):
+        response = self._upload(b'plain text', name='a.txt', content_type='text/plain')
+        self.assertEqual(response.status_code, 400)
+
+    def test_corrupt_image_falls_back_to_default(self):
+        self.assertEqual(self._upload(b'not really a jpeg').status_code, 400)
+        # 直传的对象不经过序列化器校验，由任务识别失败后恢复默认头像
+        name = default_storage.save('avatar/broken.jpg', ContentFile(b'not really a jpeg'))
+        User.objects.filter(pk=self.user.pk).update(avatar=name, avatar_status=User.AvatarStatus.PENDING)
+        compress_avatar(self.user.id, name)
+        self.assertFalse(default_storage.exists(name))
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.avatar_status, User.AvatarStatus.FAILED)
+        self.assertEqual(self.user.avatar.name, User._meta.get_field('avatar').default)
+        self.assertEqual(self.user.avatar_derivatives, {})
+
+
+class EncodeJpegWithinTests(SimpleTestCase):
+    """ 二分查找满足体积上限的最高 JPEG 质量 """
+
+    def setUp(self):
+        self.image = Image.open(io.BytesIO(_noise_jpeg((300, 300))))
+
+    def _size(self, quality):
+        buffer = io.BytesIO()
+        self.image.save(buffer, format='JPEG', quality=quality, optimize=True)
+        return buffer.tell()
+
+    def test_highest_quality_within_limit(self):
+        max_bytes = (self._size(40) + self._size(70)) // 2
+        quality, data = images.encode_jpeg_within(self.image, max_bytes)
+        self.assertLessEqual(len(data), max_bytes)
+        self.assertGreater(self._size(quality + 1), max_bytes)
+
+    def test_limits(self):
+        self.assertEqual(images.encode_jpeg_within(self.image, 10 ** 7)[0], 95)
+        quality, data = images.encode_jpeg_within(self.image, 100)
+        self.assertEqual(quality, 20)
+        self.assertGreater(len(data), 100)
+
+    def test_downscale_keeps_small_images(self):
+        self.assertIs(images.downscale(self.image, 500), self.image)
+        self.assertEqual(images.downscale(self.image, 150).size, (150, 150))
@@ -1,6 +1,7 @@
 from django.urls import path
 from .views import RegisterView, LoginView, OauthLoginView, UserInfoView, UserContactView, \
-    UserInfoDetailView, UserContactDetailView, LogoutView, ResetPasswordView, DestroyUserView, UserAvatarView
+    UserInfoDetailView, UserContactDetailView, LogoutView, ResetPasswordView, DestroyUserView, UserAvatarView, \
+    UserAvatarUploadView, UserAvatarUploadCompleteView
 
 urlpatterns = [
     # 普通注册
@@ -17,6 +18,9 @@ urlpatterns = [
     path('info/detial/', UserInfoDetailView.as_view(), name='info-detail'),
     # 用户头像
     path('info/avatar/', UserAvatarView.as_view(), name='info-avatar'),
+    # 头像直传对象存储：签发上传策略、上传完成回调
+    path('info/avatar/upload/', UserAvatarUploadView.as_view(), name='info-avatar-upload'),
+    path('info/avatar/upload/complete/', UserAvatarUploadCompleteView.as_view(), name='info-avatar-upload-complete'),
     # 绑定账号
     path('contact/', UserContactView.as_view(), name='contact'),
     path('contact/<str:type>/', UserContactDetailView.as_view(), name='contact-detail'),
@@ -10,16 +10,21 @@ from rest_framework_simplejwt.token_blacklist.models import OutstandingToken, Bl
 from services.code_send import email_service
 from social.models import Like
 from .models import UserContact
-from articles.models import ReadingHistory
+from articles.models import Article, ReadingHistory
 from django.contrib.auth import get_user_model
 from .serializers import RegisterSerializer, LoginSerializer, OauthLoginSerializer, \
     UserInfoSerializer, UserContactSerializer, ResetPasswordSerializer, LogoutSerializer, UserContactBindSerializer, \
     UserContactUnbindSerializer, UserAvatarSerializer
 from rest_framework.response import Response
 from services import auth
+from services.cache_utils import cache_version_service
+from services.storage import direct_upload_service, UploadError, DirectUploadSerializer, \
+    DirectUploadCompleteSerializer
+from services.response_cache import VersionedResponseCacheMixin
 from services.permissions import IsSelf, IsActiveAccount
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.db import transaction
+from django.db.models import F
 from rest_framework import serializers, status
 from rest_framework.permissions import IsAuthenticated, AllowAny
 
@@ -96,6 +101,7 @@ class DestroyUserView(GenericAPIView):
         user.username = f"user_{user.id}"
         user.email = ""
         user.avatar = "avatar/default.png"
+        user.avatar_derivatives = {}
         user.bio = "该用户已注销"
         user.is_active = False
         user.is_active_account = False
@@ -121,8 +127,11 @@ class DestroyUserView(GenericAPIView):
                 user = request.user
                 UserContact.objects.filter(user=user).delete()
                 ReadingHistory.objects.filter(user=user).delete()
+                # 先扣减文章的冗余点赞数，再删除点赞记录
+                Article.objects.filter(likes__user=user, like_count__gt=0).update(like_count=F('like_count') - 1)
                 Like.objects.filter(user=user).delete()  # 临时性数据，关联较少，直接硬删除
                 self.anonymize_user(user)
+            cache_version_service.bump(f'author:{user.id}')
         except Exception as e:
             return Response({"detail": f"注销失败: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -233,7 +242,7 @@ class UserContactDetailView(RetrieveUpdateDestroyAPIView):
         return UserContactSerializer
 
 
-class UserInfoView(RetrieveAPIView):
+class UserInfoView(VersionedResponseCacheMixin, RetrieveAPIView):
     """用户基本信息展示视图"""
     serializer_class = UserInfoSerializer
 
@@ -259,6 +268,11 @@ class UserInfoView(RetrieveAPIView):
             return User.objects.get(id=user_id)
         return self.request.user
 
+    def get_cache_scopes(self):
+        # 与作者卡片共用作用域：关注、发文、修改资料时都会更新
+        user_id = self.request.query_params.get("user_id") or self.request.user.id
+        return [f'author:{user_id}']
+
 
 class UserInfoDetailView(RetrieveUpdateAPIView):
     """ 用户基本信息修改视图 """
@@ -271,6 +285,11 @@ class UserInfoDetailView(RetrieveUpdateAPIView):
         # 直接返回当前登录用户
         return self.request.user
 
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        # 用户名等变化会影响用户信息页和作者卡片
+        cache_version_service.bump(f'author:{self.request.user.id}')
+
 class UserAvatarView(RetrieveUpdateDestroyAPIView):
     """ 用户头像查看、修改、删除视图 """
     serializer_class = UserAvatarSerializer
@@ -280,3 +299,51 @@ class UserAvatarView(RetrieveUpdateDestroyAPIView):
     def get_object(self):
         # 直接返回当前登录用户
         return self.request.user
+
+    def update(self, request, *args, **kwargs):
+        response = super().update(request, *args, **kwargs)
+        # 头像在后台压缩：此时 avatar_status 为 pending，处理完成后变为 ready
+        response.status_code = status.HTTP_202_ACCEPTED
+        return response
+
+
+class UserAvatarUploadView(GenericAPIView):
+    """ 头像直传视图：签发对象存储的 POST 上传策略，图片不经过应用服务器 """
+    serializer_class = DirectUploadSerializer
+    permission_classes = [IsAuthenticated, IsActiveAccount]
+
+    @extend_schema(
+        responses={201: {'type': 'object', 'properties': {
+            'url': {'type': 'string'}, 'fields': {'type': 'object'}, 'key': {'type': 'string'},
+            'token': {'type': 'string'}, 'expires_in': {'type': 'integer'},
+        }}},
+    )
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            policy = direct_upload_service.presign('avatar', serializer.validated_data['content_type'], request.user.id)
+        except UploadError as e:
+            raise serializers.ValidationError({"detail": str(e)})
+        return Response(policy, status=status.HTTP_201_CREATED)
+
+
+class UserAvatarUploadCompleteView(GenericAPIView):
+    """ 头像直传完成回调：校验已上传的对象后替换头像，压缩和派生图由 celery 异步处理 """
+    serializer_class = DirectUploadCompleteSerializer
+    permission_classes = [IsAuthenticated, IsActiveAccount]
+
+    @extend_schema(responses={202: UserAvatarSerializer})
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            key = direct_upload_service.complete(serializer.validated_data['token'], 'avatar', request.user.id)
+        except UploadError as e:
+            raise serializers.ValidationError({"token": str(e)})
+        user = request.user
+        user.avatar = key
+        user.avatar_status = User.AvatarStatus.PENDING
+        user.save(update_fields=['avatar', 'avatar_status'])
+        UserAvatarSerializer.schedule(user)
+        return Response(UserAvatarSerializer(user, context={'request': request}).data, status=status.HTTP_202_ACCEPTED)